@@ -0,0 +1,412 @@
+import grpc
+import asyncio
+import logging
+import os
+from datetime import timedelta
+
+# Import generated code
+from generated import auth_pb2
+from generated import auth_pb2_grpc
+
+# Import local modules
+import bulk
+import db
+import utils
+from common import admission, grpc_options, logutil, metrics
+from common.revocation import REVOKED
+from token_watch import TERMINAL_KINDS, TOKEN_WATCHES, TokenEvent
+from token_watch import event as token_event
+from server import (
+    ADMISSION_PRIORITIES,
+    MAX_VERIFY_BATCH_SIZE,
+    METRICS_PORT,
+    PORT,
+    SIGNING_KEYS_METADATA,
+    check_token,
+    refresh_response,
+    register_metrics,
+    signing_keys_response,
+    start_revocations,
+    start_signing_keys,
+    watch_token_error,
+)
+
+# asyncio server: in-flight RPCs are bounded by this setting instead of a
+# worker thread count. Beyond it, grpc rejects calls with RESOURCE_EXHAUSTED.
+MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "1000"))
+
+
+async def _bulk_chunks(request_iterator):
+    """Groups a stream of BulkRegisterRequests into lists of bulk.BulkRow."""
+    chunk = []
+    index = 0
+    async for request in request_iterator:
+        chunk.append(
+            bulk.BulkRow(index, request.username, request.password, request.hashed_password)
+        )
+        index += 1
+        if len(chunk) >= bulk.BULK_CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class AsyncAuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
+    """grpc.aio implementation of the AuthService methods.
+
+    Database access goes through the asyncpg helpers in db.py. bcrypt is
+    CPU-bound, so hashing runs in the utils password pool to keep the event loop free.
+    """
+
+    async def Register(self, request, context):
+        """Handles user registration requests."""
+        log_ok = logutil.sample("Register")
+        if log_ok:
+            logging.info("Register request received for username: %s", request.username)
+
+        # Cheap early answer for a username we know exists (cache only, no
+        # round trip); otherwise the insert below reports the conflict.
+        if db.peek_user(request.username):
+            logging.warning(
+                "Registration failed: Username '%s' already exists.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+            context.set_details(f"Username '{request.username}' already exists")
+            return auth_pb2.RegisterResponse(
+                success=False, message="Username already exists"
+            )
+
+        try:
+            hashed_password = await asyncio.wrap_future(
+                utils.submit_password_work(utils.hash_password, request.password)
+            )
+        except utils.PasswordPoolSaturated:
+            logging.warning(
+                "Registration rejected for user '%s': password pool saturated.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details("Server is busy, please retry.")
+            return auth_pb2.RegisterResponse(success=False, message="Server busy")
+        except Exception as e:
+            logging.error(
+                "Password hashing failed for user '%s': %s",
+                request.username,
+                e,
+            )
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error during password hashing.")
+            return auth_pb2.RegisterResponse(
+                success=False, message="Server error during registration"
+            )
+
+        # Insert-or-conflict in one statement and round trip
+        try:
+            user_id = await db.register_user_async(request.username, hashed_password)
+        except Exception as e:
+            logging.error(
+                "Registration failed for user '%s' due to database error: %s",
+                request.username,
+                e,
+            )
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Failed to save user to database.")
+            return auth_pb2.RegisterResponse(
+                success=False, message="Database error during registration"
+            )
+        if user_id is None:
+            logging.warning(
+                "Registration failed: Username '%s' already exists.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+            context.set_details(f"Username '{request.username}' already exists")
+            return auth_pb2.RegisterResponse(
+                success=False, message="Username already exists"
+            )
+        if log_ok:
+            logging.info("User '%s' registered successfully.", request.username)
+        return auth_pb2.RegisterResponse(
+            success=True, message="User registered successfully", user_id=str(user_id)
+        )
+
+    async def Login(self, request, context):
+        """Handles users login requests."""
+        log_ok = logutil.sample("Login")
+        if log_ok:
+            logging.info("Login request received for username: %s", request.username)
+        user = await db.get_user_by_username_async(request.username)
+
+        if not user:
+            logging.warning(
+                "Login failed for username '%s': User not found.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.NOT_FOUND)
+            context.set_details("User not found.")
+            return auth_pb2.LoginResponse(success=False, message="User not found")
+
+        try:
+            password_ok = await asyncio.wrap_future(
+                utils.submit_password_work(
+                    utils.verify_password, request.password, user.hashed_password
+                )
+            )
+        except utils.PasswordPoolSaturated:
+            logging.warning(
+                "Login rejected for user '%s': password pool saturated.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details("Server is busy, please retry.")
+            return auth_pb2.LoginResponse(success=False, message="Server busy")
+        if not password_ok:
+            logging.warning(
+                "Login failed: Invalid password for user '%s'.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+            context.set_details("Invalid credentials.")
+            return auth_pb2.LoginResponse(
+                success=False, message="Invalid username or password"
+            )
+
+        try:
+            token = utils.create_jwt(
+                data={"sub": str(user.id), "username": user.username},
+                expires_delta=timedelta(minutes=utils.ACCESS_TOKEN_EXPIRE_MINUTES),
+            )
+            refresh_token, refresh_hash, refresh_expires = utils.new_refresh_token()
+            await db.create_refresh_token_async(user.id, refresh_hash, refresh_expires)
+            if log_ok:
+                logging.info(
+                    "Login successful for user '%s'. Token issued.",
+                    request.username,
+                )
+            return auth_pb2.LoginResponse(
+                success=True,
+                token=token,
+                refresh_token=refresh_token,
+                message="Login successful",
+            )
+        except Exception as e:
+            logging.error(
+                "Token generation failed for user '%s': %s",
+                request.username,
+                e,
+            )
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error during token generation.")
+            return auth_pb2.LoginResponse(
+                success=False, message="Server error during login"
+            )
+
+    async def RefreshToken(self, request, context):
+        """Issues a new access token for a refresh token, without a password check."""
+        log_ok = logutil.sample("RefreshToken")
+        if log_ok:
+            logging.info("RefreshToken request received.")
+        refresh_token, refresh_hash, refresh_expires = utils.new_refresh_token()
+        try:
+            user = await db.rotate_refresh_token_async(
+                utils.refresh_token_hash(request.refresh_token), refresh_hash, refresh_expires
+            )
+        except Exception as e:
+            logging.error("Failed to rotate refresh token: %s", e)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error during token refresh.")
+            return auth_pb2.RefreshTokenResponse(
+                success=False, message="Server error during token refresh"
+            )
+        return refresh_response(user, refresh_token, context, log_ok)
+
+    async def VerifyToken(self, request, context):
+        """Verifies a JWT token provided by another service or client."""
+        log_ok = logutil.sample("VerifyToken")
+        if log_ok:
+            logging.info("VerifyToken request received.")
+        response = check_token(request.token)
+        if not response.is_valid:
+            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+            context.set_details(response.message)
+        elif log_ok:
+            logging.info("Token verified successfully for user ID: %s", response.user_id)
+        return response
+
+    async def BatchVerifyTokens(self, request, context):
+        """Verifies several tokens in one call. Per-token failures are reported in the results."""
+        if logutil.sample("BatchVerifyTokens"):
+            logging.info(
+                "BatchVerifyTokens request received with %s tokens.",
+                len(request.tokens),
+            )
+        if len(request.tokens) > MAX_VERIFY_BATCH_SIZE:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"At most {MAX_VERIFY_BATCH_SIZE} tokens per batch.")
+            return auth_pb2.BatchVerifyTokensResponse(batch_id=request.batch_id)
+        return auth_pb2.BatchVerifyTokensResponse(
+            results=[check_token(token) for token in request.tokens],
+            batch_id=request.batch_id,
+        )
+
+    async def StreamVerifyTokens(self, request_iterator, context):
+        """Streams one BatchVerifyTokensResponse back for every request message."""
+        logging.info("StreamVerifyTokens stream opened.")
+        async for request in request_iterator:
+            if len(request.tokens) > MAX_VERIFY_BATCH_SIZE:
+                await context.abort(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    f"At most {MAX_VERIFY_BATCH_SIZE} tokens per batch.",
+                )
+            yield auth_pb2.BatchVerifyTokensResponse(
+                results=[check_token(token) for token in request.tokens],
+                batch_id=request.batch_id,
+            )
+        logging.info("StreamVerifyTokens stream closed.")
+
+    async def BulkRegister(self, request_iterator, context):
+        """Registers a stream of users, streaming back one result per request in order."""
+        logging.info("BulkRegister stream opened.")
+        created = total = 0
+        async for chunk in _bulk_chunks(request_iterator):
+            for result in await bulk.register_chunk_async(chunk):
+                created += result["success"]
+                total += 1
+                yield auth_pb2.BulkRegisterResult(**result)
+        logging.info("BulkRegister stream closed: %s of %s users created.", created, total)
+
+    async def RevokeToken(self, request, context):
+        """Revokes a token (e.g. on logout) until it expires."""
+        logging.info("RevokeToken request received.")
+        payload = utils.verify_jwt(request.token)
+        if payload is None:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details("Token invalid, expired or already revoked.")
+            return auth_pb2.RevokeTokenResponse(
+                success=False, message="Token invalid, expired or already revoked"
+            )
+        if "jti" not in payload or "exp" not in payload:
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details("Token has no 'jti'/'exp' claim and cannot be revoked.")
+            return auth_pb2.RevokeTokenResponse(
+                success=False, message="Token cannot be revoked"
+            )
+        try:
+            await db.revoke_token_async(payload["jti"], payload["exp"])
+        except Exception as e:
+            logging.error("Failed to persist revocation of token %s: %s", payload["jti"], e)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Failed to revoke token.")
+            return auth_pb2.RevokeTokenResponse(
+                success=False, message="Database error during revocation"
+            )
+        REVOKED.revoke(payload["jti"], payload["exp"])
+        logging.info("Token %s revoked for user ID: %s", payload["jti"], payload.get("sub"))
+        return auth_pb2.RevokeTokenResponse(success=True, message="Token revoked")
+
+    async def WatchRevocations(self, request, context):
+        """Streams all current revocations, then each new one, until the client leaves."""
+        logging.info("WatchRevocations stream opened.")
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def listener(jti, expires_at):
+            # Revocations may arrive on the database listener thread
+            loop.call_soon_threadsafe(events.put_nowait, (jti, expires_at))
+
+        REVOKED.add_listener(listener)  # Before the snapshot, so nothing is missed
+        try:
+            for jti, expires_at in REVOKED.snapshot():
+                yield auth_pb2.RevocationEvent(jti=jti, expires_at=int(expires_at))
+            while True:
+                jti, expires_at = await events.get()
+                yield auth_pb2.RevocationEvent(jti=jti, expires_at=int(expires_at))
+        finally:
+            REVOKED.remove_listener(listener)
+            logging.info("WatchRevocations stream closed.")
+
+    async def WatchToken(self, request, context):
+        """Pushes the token's validity changes until it expires or is revoked."""
+        payload = utils.verify_jwt(request.token)
+        error = watch_token_error(payload)
+        if error:
+            await context.abort(*error)
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def deliver(kind):
+            # Called from the timer wheel task or a revocation listener thread
+            loop.call_soon_threadsafe(events.put_nowait, kind)
+
+        watch = TOKEN_WATCHES.watch(payload, request.refresh_before_seconds, deliver)
+        try:
+            yield token_event(TokenEvent.VALID, watch.expires_at)
+            while True:
+                kind = await events.get()
+                yield token_event(kind, watch.expires_at)
+                if kind in TERMINAL_KINDS:
+                    return
+        finally:
+            watch.close()
+
+    async def GetSigningKeys(self, request, context):
+        """Publishes the public keys verifiers need for RS256/EdDSA tokens."""
+        await context.send_initial_metadata(SIGNING_KEYS_METADATA)
+        return signing_keys_response()
+
+
+async def serve():
+    """Starts the AuthService on a grpc.aio server."""
+    try:
+        db.init_db()
+        await db.init_async_pool()
+        utils.start_password_pool()
+        start_signing_keys()
+        start_revocations()
+    except Exception as e:
+        logging.critical("Failed to initialize database: %s. Exiting.", e)
+        return
+
+    register_metrics()
+    metrics.start_http_server(METRICS_PORT)
+    TOKEN_WATCHES.start_async()  # WatchToken timers run on this event loop
+
+    controller = admission.create_controller(
+        ADMISSION_PRIORITIES, initial_limit=min(100, MAX_CONCURRENT_RPCS), max_limit=MAX_CONCURRENT_RPCS
+    )
+    server = grpc.aio.server(
+        interceptors=[metrics.AsyncMetricsInterceptor()]
+        + admission.interceptors(controller, is_async=True)
+        + grpc_options.server_interceptors(is_async=True),
+        maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS,
+        options=grpc_options.server_options(),
+        compression=grpc_options.server_compression(),
+    )
+    auth_pb2_grpc.add_AuthServiceServicer_to_server(AsyncAuthServiceServicer(), server)
+
+    server.add_insecure_port(f"[::]:{PORT}")  # Use insecure for simplicity IN DEV ONLY!
+
+    logging.info(
+        "AuthService (asyncio, max %s concurrent RPCs) starting on port %s...",
+        MAX_CONCURRENT_RPCS,
+        PORT,
+    )
+    await server.start()
+    logging.info("AuthService started successfully.")
+    try:
+        await server.wait_for_termination()
+    finally:
+        logging.info("Stopping AuthService...")
+        await server.stop(5)
+        await db.close_async_pool()
+        utils.shutdown_password_pool()
+        logging.info("AuthService stopped.")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,140 @@
+import asyncio
+import itertools
+import logging
+import os
+from typing import NamedTuple
+
+import db
+import utils
+
+# Bulk user registration, shared by the BulkRegister RPC and the offline
+# importer (bulk_import.py). Rows are processed in chunks: passwords are hashed
+# in parallel in the utils hashing pool, then the whole chunk is written with
+# one multi-row INSERT ... ON CONFLICT that reports which usernames were taken.
+
+BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", "500"))  # Rows hashed and inserted together
+
+
+class BulkRow(NamedTuple):
+    index: int  # Position in the input, echoed back in the result
+    username: str
+    password: str = ""
+    hashed_password: str = ""  # Existing bcrypt hash; skips hashing
+
+
+def chunked(iterable, size: int = BULK_CHUNK_SIZE):
+    """Yields lists of up to `size` items."""
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _result(row: BulkRow, success: bool, message: str, user_id: str = "") -> dict:
+    return {
+        "index": row.index,
+        "username": row.username,
+        "success": success,
+        "user_id": user_id,
+        "message": message,
+    }
+
+
+def _fail(results: dict, rows, message: str):
+    for row in rows:
+        results[row.index] = _result(row, False, message)
+
+
+def _invalid(row: BulkRow) -> str:
+    """Why the database would refuse the row (failing its whole chunk), or ""."""
+    if len(row.username) > db.MAX_USERNAME_LENGTH:
+        return f"Username must be at most {db.MAX_USERNAME_LENGTH} characters"
+    if "\x00" in row.username:
+        return "Username must not contain NUL characters"
+    if "\x00" in row.password:
+        return "Password must not contain NUL characters"  # bcrypt refuses them
+    return ""
+
+
+def _plan(rows: list) -> tuple[dict, list, list]:
+    """Rejects invalid rows up front.
+
+    Each chunk is one INSERT (and one hashing batch), so a row the database or
+    bcrypt would refuse must be caught here; otherwise every row in its chunk
+    would fail with it.
+
+    Returns (results, to_hash, hashed): results by index for rejected rows,
+    rows whose password still needs hashing, and (row, hash) pairs ready to insert.
+    """
+    results, to_hash, hashed = {}, [], []
+    seen = set()
+    for row in rows:
+        if not row.username:
+            results[row.index] = _result(row, False, "Username is required")
+            continue
+        if message := _invalid(row):
+            results[row.index] = _result(row, False, message)
+            continue
+        if row.username in seen:
+            results[row.index] = _result(row, False, "Username already exists")
+            continue
+        if row.hashed_password:
+            if not utils.is_password_hash(row.hashed_password):
+                results[row.index] = _result(row, False, "Unsupported password hash")
+                continue
+            hashed.append((row, row.hashed_password))
+        elif row.password:
+            to_hash.append(row)
+        else:
+            results[row.index] = _result(row, False, "Password is required")
+            continue
+        seen.add(row.username)
+    return results, to_hash, hashed
+
+
+def _collect(rows: list, results: dict, hashed: list, inserted: dict) -> list:
+    for row, _ in hashed:
+        if row.username in inserted:
+            user_id = str(inserted[row.username])
+            results[row.index] = _result(row, True, "User registered successfully", user_id)
+        else:
+            results[row.index] = _result(row, False, "Username already exists")
+    return [results[row.index] for row in rows]
+
+
+def register_chunk(rows: list) -> list[dict]:
+    """Registers a chunk of BulkRows. Returns one result dict per row, in input order."""
+    results, to_hash, hashed = _plan(rows)
+    try:
+        hashed.extend(zip(to_hash, utils.hash_passwords_pooled([row.password for row in to_hash])))
+    except Exception as e:
+        logging.error("Bulk password hashing failed: %s", e)
+        _fail(results, to_hash, "Server error during password hashing")
+    try:
+        inserted = db.bulk_register_users([(row.username, hash_) for row, hash_ in hashed])
+    except Exception as e:
+        logging.error("Bulk insert of %s users failed: %s", len(hashed), e)
+        _fail(results, [row for row, _ in hashed], "Database error during registration")
+        return [results[row.index] for row in rows]
+    return _collect(rows, results, hashed, inserted)
+
+
+async def register_chunk_async(rows: list) -> list[dict]:
+    """Async version of register_chunk, for the grpc.aio server."""
+    results, to_hash, hashed = _plan(rows)
+    try:
+        hashes = await asyncio.to_thread(
+            utils.hash_passwords_pooled, [row.password for row in to_hash]
+        )
+        hashed.extend(zip(to_hash, hashes))
+    except Exception as e:
+        logging.error("Bulk password hashing failed: %s", e)
+        _fail(results, to_hash, "Server error during password hashing")
+    try:
+        inserted = await db.bulk_register_users_async(
+            [(row.username, hash_) for row, hash_ in hashed]
+        )
+    except Exception as e:
+        logging.error("Bulk insert of %s users failed: %s", len(hashed), e)
+        _fail(results, [row for row, _ in hashed], "Database error during registration")
+        return [results[row.index] for row in rows]
+    return _collect(rows, results, hashed, inserted)
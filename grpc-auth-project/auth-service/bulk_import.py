@@ -0,0 +1,86 @@
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+
+import bulk
+import db
+import utils
+from common import logutil
+
+# Offline bulk user import: loads users from a CSV or JSONL file straight into
+# the users table, without a running AuthService.
+#
+#   python bulk_import.py users.csv
+#   python bulk_import.py users.jsonl --workers 8 --report results.jsonl
+#
+# Every row needs a username and either a password or an existing bcrypt
+# hashed_password (CSV files need a header row naming those columns). Rows
+# carrying a hash skip bcrypt entirely, which is what makes large migrations
+# fast; plain passwords are hashed in parallel on --workers processes.
+
+
+def read_rows(path: str, fmt: str):
+    """Yields a bulk.BulkRow for every record in a CSV or JSONL file."""
+    with open(path, newline="") as f:
+        if fmt == "csv":
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for index, record in enumerate(records):
+            yield bulk.BulkRow(
+                index,
+                (record.get("username") or "").strip(),
+                record.get("password") or "",
+                record.get("hashed_password") or "",
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import users from a CSV or JSONL file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Default: from the file extension")
+    parser.add_argument("--workers", type=int, help="Hashing processes (default PASSWORD_POOL_SIZE)")
+    parser.add_argument("--chunk-size", type=int, default=bulk.BULK_CHUNK_SIZE)
+    parser.add_argument("--report", help="Write one JSON result per row to this file")
+    args = parser.parse_args(argv)
+    fmt = args.format or ("jsonl" if args.path.endswith((".jsonl", ".json")) else "csv")
+
+    logutil.setup_logging("bulk-import")
+    db.init_db()
+    utils.start_bulk_hash_pool(args.workers or utils.PASSWORD_POOL_SIZE)
+
+    report = open(args.report, "w") if args.report else None
+    created = failed = 0
+    start = time.monotonic()
+    try:
+        for chunk in bulk.chunked(read_rows(args.path, fmt), args.chunk_size):
+            for result in bulk.register_chunk(chunk):
+                if result["success"]:
+                    created += 1
+                else:
+                    failed += 1
+                if report:
+                    report.write(json.dumps(result) + "\n")
+            elapsed = time.monotonic() - start
+            logging.info(
+                "%s rows processed (%s created, %s rejected), %.0f users/min.",
+                created + failed,
+                created,
+                failed,
+                created / elapsed * 60 if elapsed else 0,
+            )
+    finally:
+        if report:
+            report.close()
+        utils.shutdown_password_pool()
+        db.close_pool()
+
+    print(f"Created {created} users, rejected {failed} rows in {time.monotonic() - start:.1f}s.")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"5\n\x0fRegisterRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"4\n\x10RegisterResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"@\n\rLoginResponse\x12\r\n\x05token\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t\"#\n\x12VerifyTokenRequest\x12\r\n\x05token\x18\x01 \x01(\t\"J\n\x13VerifyTokenResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"\x13\n\x11GetProfileRequest\"i\n\x12GetProfileResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x11\n\tfull_name\x18\x03 \x01(\t\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x0f\n\x07message\x18\x05 \x01(\t2\xbe\x01\n\x0b\x41uthService\x12\x39\n\x08Register\x12\x15.auth.RegisterRequest\x1a\x16.auth.RegisterResponse\x12\x30\n\x05Login\x12\x12.auth.LoginRequest\x1a\x13.auth.LoginResponse\x12\x42\n\x0bVerifyToken\x12\x18.auth.VerifyTokenRequest\x1a\x19.auth.VerifyTokenResponse2Q\n\x0eProfileService\x12?\n\nGetProfile\x12\x17.auth.GetProfileRequest\x1a\x18.auth.GetProfileResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\nauth.proto\x12\x04\x61uth\"5\n\x0fRegisterRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"E\n\x10RegisterResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\x12\x0f\n\x07user_id\x18\x03 \x01(\t\"R\n\x13\x42ulkRegisterRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\x12\x17\n\x0fhashed_password\x18\x03 \x01(\t\"h\n\x12\x42ulkRegisterResult\x12\r\n\x05index\x18\x01 \x01(\x04\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x0f\n\x07user_id\x18\x04 \x01(\t\x12\x0f\n\x07message\x18\x05 \x01(\t\"2\n\x0cLoginRequest\x12\x10\n\x08username\x18\x01 \x01(\t\x12\x10\n\x08password\x18\x02 \x01(\t\"W\n\rLoginResponse\x12\r\n\x05token\x18\x01 \x01(\t\x12\x0f\n\x07success\x18\x02 \x01(\x08\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x15\n\rrefresh_token\x18\x04 \x01(\t\",\n\x13RefreshTokenRequest\x12\x15\n\rrefresh_token\x18\x01 \x01(\t\"^\n\x14RefreshTokenResponse\x12\r\n\x05token\x18\x01 \x01(\t\x12\x15\n\rrefresh_token\x18\x02 \x01(\t\x12\x0f\n\x07success\x18\x03 \x01(\x08\x12\x0f\n\x07message\x18\x04 \x01(\t\"#\n\x12VerifyTokenRequest\x12\r\n\x05token\x18\x01 \x01(\t\"[\n\x13VerifyTokenResponse\x12\x10\n\x08is_valid\x18\x01 \x01(\x08\x12\x10\n\x08username\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\x12\x0f\n\x07user_id\x18\x04 \x01(\t\"<\n\x18\x42\x61tchVerifyTokensRequest\x12\x0e\n\x06tokens\x18\x01 \x03(\t\x12\x10\n\x08\x62\x61tch_id\x18\x02 \x01(\x04\"Y\n\x19\x42\x61tchVerifyTokensResponse\x12*\n\x07results\x18\x01 \x03(\x0b\x32\x19.auth.VerifyTokenResponse\x12\x10\n\x08\x62\x61tch_id\x18\x02 \x01(\x04\"#\n\x12RevokeTokenRequest\x12\r\n\x05token\x18\x01 \x01(\t\"7\n\x13RevokeTokenResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\x12\x0f\n\x07message\x18\x02 \x01(\t\"\x19\n\x17WatchRevocationsRequest\"2\n\x0fRevocationEvent\x12\x0b\n\x03jti\x18\x01 \x01(\t\x12\x12\n\nexpires_at\x18\x02 \x01(\x03\"B\n\x11WatchTokenRequest\x12\r\n\x05token\x18\x01 \x01(\t\x12\x1e\n\x16refresh_before_seconds\x18\x02 \x01(\x05\"\x91\x01\n\nTokenEvent\x12#\n\x04kind\x18\x01 \x01(\x0e\x32\x15.auth.TokenEvent.Kind\x12\x12\n\nexpires_at\x18\x02 \x01(\x03\x12\x0f\n\x07message\x18\x03 \x01(\t\"9\n\x04Kind\x12\t\n\x05VALID\x10\x00\x12\x0c\n\x08\x45XPIRING\x10\x01\x12\x0b\n\x07\x45XPIRED\x10\x02\x12\x0b\n\x07REVOKED\x10\x03\"\x17\n\x15GetSigningKeysRequest\"?\n\x16GetSigningKeysResponse\x12\x0c\n\x04jwks\x18\x01 \x01(\t\x12\x17\n\x0fmax_age_seconds\x18\x02 \x01(\x05\"\x13\n\x11GetProfileRequest\"i\n\x12GetProfileResponse\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\r\n\x05\x65mail\x18\x02 \x01(\t\x12\x11\n\tfull_name\x18\x03 \x01(\t\x12\x0f\n\x07success\x18\x04 \x01(\x08\x12\x0f\n\x07message\x18\x05 \x01(\t\"+\n\x17\x42\x61tchGetProfilesRequest\x12\x10\n\x08user_ids\x18\x01 \x03(\t\"F\n\x18\x42\x61tchGetProfilesResponse\x12*\n\x08profiles\x18\x01 \x03(\x0b\x32\x18.auth.GetProfileResponse\"8\n\x14UpdateProfileRequest\x12\r\n\x05\x65mail\x18\x01 \x01(\t\x12\x11\n\tfull_name\x18\x02 \x01(\t\"\"\n WatchProfileInvalidationsRequest\"&\n\x13ProfileInvalidation\x12\x0f\n\x07user_id\x18\x01 \x01(\t2\x97\x06\n\x0b\x41uthService\x12\x39\n\x08Register\x12\x15.auth.RegisterRequest\x1a\x16.auth.RegisterResponse\x12\x30\n\x05Login\x12\x12.auth.LoginRequest\x1a\x13.auth.LoginResponse\x12\x45\n\x0cRefreshToken\x12\x19.auth.RefreshTokenRequest\x1a\x1a.auth.RefreshTokenResponse\x12\x42\n\x0bVerifyToken\x12\x18.auth.VerifyTokenRequest\x1a\x19.auth.VerifyTokenResponse\x12T\n\x11\x42\x61tchVerifyTokens\x12\x1e.auth.BatchVerifyTokensRequest\x1a\x1f.auth.BatchVerifyTokensResponse\x12Y\n\x12StreamVerifyTokens\x12\x1e.auth.BatchVerifyTokensRequest\x1a\x1f.auth.BatchVerifyTokensResponse(\x01\x30\x01\x12G\n\x0c\x42ulkRegister\x12\x19.auth.BulkRegisterRequest\x1a\x18.auth.BulkRegisterResult(\x01\x30\x01\x12\x42\n\x0bRevokeToken\x12\x18.auth.RevokeTokenRequest\x1a\x19.auth.RevokeTokenResponse\x12J\n\x10WatchRevocations\x12\x1d.auth.WatchRevocationsRequest\x1a\x15.auth.RevocationEvent0\x01\x12\x39\n\nWatchToken\x12\x17.auth.WatchTokenRequest\x1a\x10.auth.TokenEvent0\x01\x12K\n\x0eGetSigningKeys\x12\x1b.auth.GetSigningKeysRequest\x1a\x1c.auth.GetSigningKeysResponse2\xcd\x02\n\x0eProfileService\x12?\n\nGetProfile\x12\x17.auth.GetProfileRequest\x1a\x18.auth.GetProfileResponse\x12Q\n\x10\x42\x61tchGetProfiles\x12\x1d.auth.BatchGetProfilesRequest\x1a\x1e.auth.BatchGetProfilesResponse\x12\x45\n\rUpdateProfile\x12\x1a.auth.UpdateProfileRequest\x1a\x18.auth.GetProfileResponse\x12`\n\x19WatchProfileInvalidations\x12&.auth.WatchProfileInvalidationsRequest\x1a\x19.auth.ProfileInvalidation0\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -34,21 +34,61 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_REGISTERREQUEST']._serialized_start=20
   _globals['_REGISTERREQUEST']._serialized_end=73
   _globals['_REGISTERRESPONSE']._serialized_start=75
-  _globals['_REGISTERRESPONSE']._serialized_end=127
-  _globals['_LOGINREQUEST']._serialized_start=129
-  _globals['_LOGINREQUEST']._serialized_end=179
-  _globals['_LOGINRESPONSE']._serialized_start=181
-  _globals['_LOGINRESPONSE']._serialized_end=245
-  _globals['_VERIFYTOKENREQUEST']._serialized_start=247
-  _globals['_VERIFYTOKENREQUEST']._serialized_end=282
-  _globals['_VERIFYTOKENRESPONSE']._serialized_start=284
-  _globals['_VERIFYTOKENRESPONSE']._serialized_end=358
-  _globals['_GETPROFILEREQUEST']._serialized_start=360
-  _globals['_GETPROFILEREQUEST']._serialized_end=379
-  _globals['_GETPROFILERESPONSE']._serialized_start=381
-  _globals['_GETPROFILERESPONSE']._serialized_end=486
-  _globals['_AUTHSERVICE']._serialized_start=489
-  _globals['_AUTHSERVICE']._serialized_end=679
-  _globals['_PROFILESERVICE']._serialized_start=681
-  _globals['_PROFILESERVICE']._serialized_end=762
+  _globals['_REGISTERRESPONSE']._serialized_end=144
+  _globals['_BULKREGISTERREQUEST']._serialized_start=146
+  _globals['_BULKREGISTERREQUEST']._serialized_end=228
+  _globals['_BULKREGISTERRESULT']._serialized_start=230
+  _globals['_BULKREGISTERRESULT']._serialized_end=334
+  _globals['_LOGINREQUEST']._serialized_start=336
+  _globals['_LOGINREQUEST']._serialized_end=386
+  _globals['_LOGINRESPONSE']._serialized_start=388
+  _globals['_LOGINRESPONSE']._serialized_end=475
+  _globals['_REFRESHTOKENREQUEST']._serialized_start=477
+  _globals['_REFRESHTOKENREQUEST']._serialized_end=521
+  _globals['_REFRESHTOKENRESPONSE']._serialized_start=523
+  _globals['_REFRESHTOKENRESPONSE']._serialized_end=617
+  _globals['_VERIFYTOKENREQUEST']._serialized_start=619
+  _globals['_VERIFYTOKENREQUEST']._serialized_end=654
+  _globals['_VERIFYTOKENRESPONSE']._serialized_start=656
+  _globals['_VERIFYTOKENRESPONSE']._serialized_end=747
+  _globals['_BATCHVERIFYTOKENSREQUEST']._serialized_start=749
+  _globals['_BATCHVERIFYTOKENSREQUEST']._serialized_end=809
+  _globals['_BATCHVERIFYTOKENSRESPONSE']._serialized_start=811
+  _globals['_BATCHVERIFYTOKENSRESPONSE']._serialized_end=900
+  _globals['_REVOKETOKENREQUEST']._serialized_start=902
+  _globals['_REVOKETOKENREQUEST']._serialized_end=937
+  _globals['_REVOKETOKENRESPONSE']._serialized_start=939
+  _globals['_REVOKETOKENRESPONSE']._serialized_end=994
+  _globals['_WATCHREVOCATIONSREQUEST']._serialized_start=996
+  _globals['_WATCHREVOCATIONSREQUEST']._serialized_end=1021
+  _globals['_REVOCATIONEVENT']._serialized_start=1023
+  _globals['_REVOCATIONEVENT']._serialized_end=1073
+  _globals['_WATCHTOKENREQUEST']._serialized_start=1075
+  _globals['_WATCHTOKENREQUEST']._serialized_end=1141
+  _globals['_TOKENEVENT']._serialized_start=1144
+  _globals['_TOKENEVENT']._serialized_end=1289
+  _globals['_TOKENEVENT_KIND']._serialized_start=1232
+  _globals['_TOKENEVENT_KIND']._serialized_end=1289
+  _globals['_GETSIGNINGKEYSREQUEST']._serialized_start=1291
+  _globals['_GETSIGNINGKEYSREQUEST']._serialized_end=1314
+  _globals['_GETSIGNINGKEYSRESPONSE']._serialized_start=1316
+  _globals['_GETSIGNINGKEYSRESPONSE']._serialized_end=1379
+  _globals['_GETPROFILEREQUEST']._serialized_start=1381
+  _globals['_GETPROFILEREQUEST']._serialized_end=1400
+  _globals['_GETPROFILERESPONSE']._serialized_start=1402
+  _globals['_GETPROFILERESPONSE']._serialized_end=1507
+  _globals['_BATCHGETPROFILESREQUEST']._serialized_start=1509
+  _globals['_BATCHGETPROFILESREQUEST']._serialized_end=1552
+  _globals['_BATCHGETPROFILESRESPONSE']._serialized_start=1554
+  _globals['_BATCHGETPROFILESRESPONSE']._serialized_end=1624
+  _globals['_UPDATEPROFILEREQUEST']._serialized_start=1626
+  _globals['_UPDATEPROFILEREQUEST']._serialized_end=1682
+  _globals['_WATCHPROFILEINVALIDATIONSREQUEST']._serialized_start=1684
+  _globals['_WATCHPROFILEINVALIDATIONSREQUEST']._serialized_end=1718
+  _globals['_PROFILEINVALIDATION']._serialized_start=1720
+  _globals['_PROFILEINVALIDATION']._serialized_end=1758
+  _globals['_AUTHSERVICE']._serialized_start=1761
+  _globals['_AUTHSERVICE']._serialized_end=2552
+  _globals['_PROFILESERVICE']._serialized_start=2555
+  _globals['_PROFILESERVICE']._serialized_end=2888
 # @@protoc_insertion_point(module_scope)
@@ -1,6 +1,8 @@
+from google.protobuf.internal import containers as _containers
+from google.protobuf.internal import enum_type_wrapper as _enum_type_wrapper
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
-from typing import ClassVar as _ClassVar, Optional as _Optional
+from typing import ClassVar as _ClassVar, Iterable as _Iterable, Mapping as _Mapping, Optional as _Optional, Union as _Union
 
 DESCRIPTOR: _descriptor.FileDescriptor
 
@@ -13,12 +15,38 @@ class RegisterRequest(_message.Message):
     def __init__(self, username: _Optional[str] = ..., password: _Optional[str] = ...) -> None: ...
 
 class RegisterResponse(_message.Message):
-    __slots__ = ("success", "message")
+    __slots__ = ("success", "message", "user_id")
     SUCCESS_FIELD_NUMBER: _ClassVar[int]
     MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    USER_ID_FIELD_NUMBER: _ClassVar[int]
     success: bool
     message: str
-    def __init__(self, success: bool = ..., message: _Optional[str] = ...) -> None: ...
+    user_id: str
+    def __init__(self, success: bool = ..., message: _Optional[str] = ..., user_id: _Optional[str] = ...) -> None: ...
+
+class BulkRegisterRequest(_message.Message):
+    __slots__ = ("username", "password", "hashed_password")
+    USERNAME_FIELD_NUMBER: _ClassVar[int]
+    PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    HASHED_PASSWORD_FIELD_NUMBER: _ClassVar[int]
+    username: str
+    password: str
+    hashed_password: str
+    def __init__(self, username: _Optional[str] = ..., password: _Optional[str] = ..., hashed_password: _Optional[str] = ...) -> None: ...
+
+class BulkRegisterResult(_message.Message):
+    __slots__ = ("index", "username", "success", "user_id", "message")
+    INDEX_FIELD_NUMBER: _ClassVar[int]
+    USERNAME_FIELD_NUMBER: _ClassVar[int]
+    SUCCESS_FIELD_NUMBER: _ClassVar[int]
+    USER_ID_FIELD_NUMBER: _ClassVar[int]
+    MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    index: int
+    username: str
+    success: bool
+    user_id: str
+    message: str
+    def __init__(self, index: _Optional[int] = ..., username: _Optional[str] = ..., success: bool = ..., user_id: _Optional[str] = ..., message: _Optional[str] = ...) -> None: ...
 
 class LoginRequest(_message.Message):
     __slots__ = ("username", "password")
@@ -29,14 +57,34 @@ class LoginRequest(_message.Message):
     def __init__(self, username: _Optional[str] = ..., password: _Optional[str] = ...) -> None: ...
 
 class LoginResponse(_message.Message):
-    __slots__ = ("token", "success", "message")
+    __slots__ = ("token", "success", "message", "refresh_token")
     TOKEN_FIELD_NUMBER: _ClassVar[int]
     SUCCESS_FIELD_NUMBER: _ClassVar[int]
     MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    REFRESH_TOKEN_FIELD_NUMBER: _ClassVar[int]
     token: str
     success: bool
     message: str
-    def __init__(self, token: _Optional[str] = ..., success: bool = ..., message: _Optional[str] = ...) -> None: ...
+    refresh_token: str
+    def __init__(self, token: _Optional[str] = ..., success: bool = ..., message: _Optional[str] = ..., refresh_token: _Optional[str] = ...) -> None: ...
+
+class RefreshTokenRequest(_message.Message):
+    __slots__ = ("refresh_token",)
+    REFRESH_TOKEN_FIELD_NUMBER: _ClassVar[int]
+    refresh_token: str
+    def __init__(self, refresh_token: _Optional[str] = ...) -> None: ...
+
+class RefreshTokenResponse(_message.Message):
+    __slots__ = ("token", "refresh_token", "success", "message")
+    TOKEN_FIELD_NUMBER: _ClassVar[int]
+    REFRESH_TOKEN_FIELD_NUMBER: _ClassVar[int]
+    SUCCESS_FIELD_NUMBER: _ClassVar[int]
+    MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    token: str
+    refresh_token: str
+    success: bool
+    message: str
+    def __init__(self, token: _Optional[str] = ..., refresh_token: _Optional[str] = ..., success: bool = ..., message: _Optional[str] = ...) -> None: ...
 
 class VerifyTokenRequest(_message.Message):
     __slots__ = ("token",)
@@ -45,14 +93,98 @@ class VerifyTokenRequest(_message.Message):
     def __init__(self, token: _Optional[str] = ...) -> None: ...
 
 class VerifyTokenResponse(_message.Message):
-    __slots__ = ("is_valid", "username", "message")
+    __slots__ = ("is_valid", "username", "message", "user_id")
     IS_VALID_FIELD_NUMBER: _ClassVar[int]
     USERNAME_FIELD_NUMBER: _ClassVar[int]
     MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    USER_ID_FIELD_NUMBER: _ClassVar[int]
     is_valid: bool
     username: str
     message: str
-    def __init__(self, is_valid: bool = ..., username: _Optional[str] = ..., message: _Optional[str] = ...) -> None: ...
+    user_id: str
+    def __init__(self, is_valid: bool = ..., username: _Optional[str] = ..., message: _Optional[str] = ..., user_id: _Optional[str] = ...) -> None: ...
+
+class BatchVerifyTokensRequest(_message.Message):
+    __slots__ = ("tokens", "batch_id")
+    TOKENS_FIELD_NUMBER: _ClassVar[int]
+    BATCH_ID_FIELD_NUMBER: _ClassVar[int]
+    tokens: _containers.RepeatedScalarFieldContainer[str]
+    batch_id: int
+    def __init__(self, tokens: _Optional[_Iterable[str]] = ..., batch_id: _Optional[int] = ...) -> None: ...
+
+class BatchVerifyTokensResponse(_message.Message):
+    __slots__ = ("results", "batch_id")
+    RESULTS_FIELD_NUMBER: _ClassVar[int]
+    BATCH_ID_FIELD_NUMBER: _ClassVar[int]
+    results: _containers.RepeatedCompositeFieldContainer[VerifyTokenResponse]
+    batch_id: int
+    def __init__(self, results: _Optional[_Iterable[_Union[VerifyTokenResponse, _Mapping]]] = ..., batch_id: _Optional[int] = ...) -> None: ...
+
+class RevokeTokenRequest(_message.Message):
+    __slots__ = ("token",)
+    TOKEN_FIELD_NUMBER: _ClassVar[int]
+    token: str
+    def __init__(self, token: _Optional[str] = ...) -> None: ...
+
+class RevokeTokenResponse(_message.Message):
+    __slots__ = ("success", "message")
+    SUCCESS_FIELD_NUMBER: _ClassVar[int]
+    MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    success: bool
+    message: str
+    def __init__(self, success: bool = ..., message: _Optional[str] = ...) -> None: ...
+
+class WatchRevocationsRequest(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
+
+class RevocationEvent(_message.Message):
+    __slots__ = ("jti", "expires_at")
+    JTI_FIELD_NUMBER: _ClassVar[int]
+    EXPIRES_AT_FIELD_NUMBER: _ClassVar[int]
+    jti: str
+    expires_at: int
+    def __init__(self, jti: _Optional[str] = ..., expires_at: _Optional[int] = ...) -> None: ...
+
+class WatchTokenRequest(_message.Message):
+    __slots__ = ("token", "refresh_before_seconds")
+    TOKEN_FIELD_NUMBER: _ClassVar[int]
+    REFRESH_BEFORE_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    token: str
+    refresh_before_seconds: int
+    def __init__(self, token: _Optional[str] = ..., refresh_before_seconds: _Optional[int] = ...) -> None: ...
+
+class TokenEvent(_message.Message):
+    __slots__ = ("kind", "expires_at", "message")
+    class Kind(int, metaclass=_enum_type_wrapper.EnumTypeWrapper):
+        __slots__ = ()
+        VALID: _ClassVar[TokenEvent.Kind]
+        EXPIRING: _ClassVar[TokenEvent.Kind]
+        EXPIRED: _ClassVar[TokenEvent.Kind]
+        REVOKED: _ClassVar[TokenEvent.Kind]
+    VALID: TokenEvent.Kind
+    EXPIRING: TokenEvent.Kind
+    EXPIRED: TokenEvent.Kind
+    REVOKED: TokenEvent.Kind
+    KIND_FIELD_NUMBER: _ClassVar[int]
+    EXPIRES_AT_FIELD_NUMBER: _ClassVar[int]
+    MESSAGE_FIELD_NUMBER: _ClassVar[int]
+    kind: TokenEvent.Kind
+    expires_at: int
+    message: str
+    def __init__(self, kind: _Optional[_Union[TokenEvent.Kind, str]] = ..., expires_at: _Optional[int] = ..., message: _Optional[str] = ...) -> None: ...
+
+class GetSigningKeysRequest(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
+
+class GetSigningKeysResponse(_message.Message):
+    __slots__ = ("jwks", "max_age_seconds")
+    JWKS_FIELD_NUMBER: _ClassVar[int]
+    MAX_AGE_SECONDS_FIELD_NUMBER: _ClassVar[int]
+    jwks: str
+    max_age_seconds: int
+    def __init__(self, jwks: _Optional[str] = ..., max_age_seconds: _Optional[int] = ...) -> None: ...
 
 class GetProfileRequest(_message.Message):
     __slots__ = ()
@@ -71,3 +203,33 @@ class GetProfileResponse(_message.Message):
     success: bool
     message: str
     def __init__(self, user_id: _Optional[str] = ..., email: _Optional[str] = ..., full_name: _Optional[str] = ..., success: bool = ..., message: _Optional[str] = ...) -> None: ...
+
+class BatchGetProfilesRequest(_message.Message):
+    __slots__ = ("user_ids",)
+    USER_IDS_FIELD_NUMBER: _ClassVar[int]
+    user_ids: _containers.RepeatedScalarFieldContainer[str]
+    def __init__(self, user_ids: _Optional[_Iterable[str]] = ...) -> None: ...
+
+class BatchGetProfilesResponse(_message.Message):
+    __slots__ = ("profiles",)
+    PROFILES_FIELD_NUMBER: _ClassVar[int]
+    profiles: _containers.RepeatedCompositeFieldContainer[GetProfileResponse]
+    def __init__(self, profiles: _Optional[_Iterable[_Union[GetProfileResponse, _Mapping]]] = ...) -> None: ...
+
+class UpdateProfileRequest(_message.Message):
+    __slots__ = ("email", "full_name")
+    EMAIL_FIELD_NUMBER: _ClassVar[int]
+    FULL_NAME_FIELD_NUMBER: _ClassVar[int]
+    email: str
+    full_name: str
+    def __init__(self, email: _Optional[str] = ..., full_name: _Optional[str] = ...) -> None: ...
+
+class WatchProfileInvalidationsRequest(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
+
+class ProfileInvalidation(_message.Message):
+    __slots__ = ("user_id",)
+    USER_ID_FIELD_NUMBER: _ClassVar[int]
+    user_id: str
+    def __init__(self, user_id: _Optional[str] = ...) -> None: ...
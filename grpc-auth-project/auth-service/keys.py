@@ -0,0 +1,186 @@
+import argparse
+import json
+import logging
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+from common.jwt_config import ASYMMETRIC_ALGORITHMS, JWT_ALGORITHM
+
+# Asymmetric token signing keys.
+#
+# With JWT_ALGORITHM=RS256 or EdDSA, tokens are signed with a private key and
+# carry its id in the 'kid' header. Verifiers only need the public keys, served
+# as a JWKS by the GetSigningKeys RPC, so they never hold a signing secret.
+#
+# Keys are PEM files named <kid>.pem in JWT_KEYS_DIR. Every key in the
+# directory is published; the newest one (or JWT_ACTIVE_KID) signs. To rotate:
+# add a new key file (python keys.py generate --dir ...), which every process
+# picks up within KEY_RELOAD_INTERVAL and starts signing with, then delete the
+# old file once the tokens it signed have expired.
+
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")  # Default: the most recently created key
+JWKS_MAX_AGE = int(os.getenv("JWKS_MAX_AGE", "300"))  # Seconds verifiers may cache the key set
+KEY_RELOAD_INTERVAL = float(os.getenv("KEY_RELOAD_INTERVAL", "60"))  # Seconds between directory scans
+UNKNOWN_KID_RELOAD_INTERVAL = 5.0  # Min seconds between rescans triggered by unknown 'kid's
+
+ASYMMETRIC = JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS
+
+
+class SigningKey:
+    """One private key, its public half and JWK representation."""
+
+    def __init__(self, kid: str, private_key, created: float):
+        self.kid = kid
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.created = created
+        if isinstance(private_key, rsa.RSAPrivateKey):
+            self.algorithm = "RS256"
+            jwk = RSAAlgorithm.to_jwk(self.public_key, as_dict=True)
+        elif isinstance(private_key, ed25519.Ed25519PrivateKey):
+            self.algorithm = "EdDSA"
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            raise ValueError(f"Unsupported key type for '{kid}': {type(private_key).__name__}")
+        self.jwk = {**jwk, "kid": kid, "alg": self.algorithm, "use": "sig"}
+
+
+def generate_private_key(algorithm: str):
+    if algorithm == "EdDSA":
+        return ed25519.Ed25519PrivateKey.generate()
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def write_key(directory: str, algorithm: str) -> str:
+    """Generates a key into `directory` and returns its kid."""
+    kid = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S-") + secrets.token_hex(4)
+    pem = generate_private_key(algorithm).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    path = os.path.join(directory, f"{kid}.pem")
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        f.write(pem)
+    return kid
+
+
+def create_dev_keys_dir() -> str:
+    """Creates a temporary directory with one fresh key (local development only)."""
+    directory = tempfile.mkdtemp(prefix="jwt-keys-")
+    write_key(directory, JWT_ALGORITHM)
+    return directory
+
+
+class KeyManager:
+    """Loads signing keys from a directory and reloads them periodically."""
+
+    def __init__(self, keys_dir: str, active_kid: str = ""):
+        self.keys_dir = keys_dir
+        self.active_kid = active_kid
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._active = None
+        self._jwks = '{"keys": []}'
+        self._loaded_at = 0.0
+        self._unknown_kid_reload_at = 0.0
+
+    def _load(self):
+        keys = {}
+        for name in sorted(os.listdir(self.keys_dir)):
+            if not name.endswith(".pem"):
+                continue
+            path = os.path.join(self.keys_dir, name)
+            try:
+                with open(path, "rb") as f:
+                    private_key = serialization.load_pem_private_key(f.read(), password=None)
+                kid = name[: -len(".pem")]
+                keys[kid] = SigningKey(kid, private_key, os.path.getmtime(path))
+            except Exception as e:
+                logging.error("Skipping signing key %s: %s", path, e)
+        if not keys:
+            raise RuntimeError(f"No signing keys found in {self.keys_dir}")
+        active = keys.get(self.active_kid) or max(keys.values(), key=lambda k: (k.created, k.kid))
+        jwks = json.dumps({"keys": [key.jwk for key in keys.values()]})
+        with self._lock:
+            if active is not self._active and (self._active is None or active.kid != self._active.kid):
+                logging.info("Signing tokens with key '%s' (%s).", active.kid, active.algorithm)
+            self._keys, self._active, self._jwks = keys, active, jwks
+            self._loaded_at = time.monotonic()
+
+    def _maybe_reload(self):
+        if time.monotonic() - self._loaded_at >= KEY_RELOAD_INTERVAL:
+            try:
+                self._load()
+            except Exception as e:
+                # Keep serving the keys we have; a half-written key file must not stop logins
+                logging.error("Reloading signing keys failed: %s", e)
+                self._loaded_at = time.monotonic()
+
+    def signing_key(self) -> SigningKey:
+        self._maybe_reload()
+        return self._active
+
+    def public_key(self, kid: str) -> SigningKey | None:
+        """Returns the key for `kid`, rescanning the directory (rate-limited) if it is unknown."""
+        self._maybe_reload()
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() >= self._unknown_kid_reload_at:
+            self._unknown_kid_reload_at = time.monotonic() + UNKNOWN_KID_RELOAD_INTERVAL
+            self._loaded_at = 0.0
+            self._maybe_reload()
+            key = self._keys.get(kid)
+        return key
+
+    def jwks(self) -> str:
+        """The public keys as a JSON Web Key Set."""
+        self._maybe_reload()
+        return self._jwks
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_key_manager() -> KeyManager:
+    """Returns the process-wide KeyManager, loading the keys on first use."""
+    global _manager, JWT_KEYS_DIR
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                if not JWT_KEYS_DIR:
+                    JWT_KEYS_DIR = create_dev_keys_dir()
+                    logging.warning(
+                        "JWT_KEYS_DIR not set: using a temporary signing key in %s. "
+                        "Set JWT_KEYS_DIR in production!",
+                        JWT_KEYS_DIR,
+                    )
+                manager = KeyManager(JWT_KEYS_DIR, JWT_ACTIVE_KID)
+                manager._load()
+                _manager = manager
+    return _manager
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage JWT signing keys.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    generate = sub.add_parser("generate", help="Add a new signing key (it becomes the active one)")
+    generate.add_argument("--dir", default=JWT_KEYS_DIR, required=not JWT_KEYS_DIR)
+    generate.add_argument("--algorithm", choices=list(ASYMMETRIC_ALGORITHMS), default=JWT_ALGORITHM if ASYMMETRIC else "RS256")
+    args = parser.parse_args(argv)
+    os.makedirs(args.dir, exist_ok=True)
+    print(write_key(args.dir, args.algorithm))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
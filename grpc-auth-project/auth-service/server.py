@@ -1,5 +1,7 @@
 import grpc
 from concurrent import futures
+import queue
+import threading
 import time
 import logging
 import os
@@ -10,12 +12,83 @@ from generated import auth_pb2
 from generated import auth_pb2_grpc
 
 # Import local modules
+import bulk
 import db
+import keys
 import utils
+from common import admission, grpc_options, logutil, metrics
+from common.revocation import REVOKED
+from token_watch import TERMINAL_KINDS, TOKEN_WATCHES, TokenEvent
+from token_watch import event as token_event
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+logutil.setup_logging("auth-service")
+
+PORT = "50051"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9101"))  # Prometheus scrape endpoint; 0 disables
+
+# Worker threads handling RPCs; db.py sizes its connection pool from the same setting
+MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+# Calls held at once, running or waiting for a worker; grpcio rejects the rest
+# with RESOURCE_EXHAUSTED. The adaptive admission limit stays below it.
+MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", str(MAX_WORKERS * 5)))
+
+# Register and Login wait for their bcrypt run on a worker thread, so at most
+# half of the workers may be waiting on the hashing pool: the others stay free
+# for cheap RPCs such as VerifyToken during a login burst. Hashes beyond this
+# are rejected with RESOURCE_EXHAUSTED.
+PASSWORD_MAX_QUEUE = min(utils.PASSWORD_POOL_MAX_QUEUE, max(1, MAX_WORKERS // 2))
+
+# Shed first under overload: low, then normal; unlisted methods are normal
+ADMISSION_PRIORITIES = {
+    "auth.AuthService/VerifyToken": "high",
+    "auth.AuthService/BatchVerifyTokens": "high",
+    "auth.AuthService/GetSigningKeys": "high",
+    "auth.AuthService/RefreshToken": "high",
+    "auth.AuthService/RevokeToken": "high",
+    "auth.AuthService/Register": "low",
+}
+
+# Each long-lived stream (WatchRevocations, WatchToken, StreamVerifyTokens,
+# BulkRegister) holds a worker thread for as long as it is open, so together
+# they may use only a quarter of the pool; more are refused with
+# RESOURCE_EXHAUSTED. With the hashing queue above, this leaves workers free
+# for unary RPCs. Deployments with many followers (e.g. one WatchRevocations
+# stream per ProfileService process) should run aio_server.py, which has no
+# such limit. GRPC_MAX_WATCH_STREAMS is the setting's former name.
+MAX_STREAMS = int(
+    os.getenv("GRPC_MAX_STREAMS", os.getenv("GRPC_MAX_WATCH_STREAMS", str(max(1, MAX_WORKERS // 4))))
 )
+_stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+
+MAX_VERIFY_BATCH_SIZE = int(os.getenv("MAX_VERIFY_BATCH_SIZE", "1000"))  # Tokens per batch message
+
+
+def check_token(token: str) -> auth_pb2.VerifyTokenResponse:
+    """Verifies a single token and builds the matching VerifyTokenResponse."""
+    token_data = utils.verify_jwt(token)
+
+    if token_data and "sub" in token_data:
+        # Per-token detail only at DEBUG: batches verify hundreds of tokens per call
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug("Token verified successfully for user ID: %s", token_data["sub"])
+        return auth_pb2.VerifyTokenResponse(
+            is_valid=True,
+            user_id=str(token_data["sub"]),
+            username=str(token_data.get("username", "")),
+        )
+    elif token_data:
+        logging.warning("Token verification failed: 'sub' claim missing in token.")
+        # Decide if this is valid - depends on your requirements
+        # Let's treat it as invalid for this example
+        return auth_pb2.VerifyTokenResponse(
+            is_valid=False, message="Token invalid (missing sub claim)"
+        )
+    else:
+        # verify_jwt already logged the reason (expired or invalid)
+        logging.warning("Token verification failed.")
+        return auth_pb2.VerifyTokenResponse(
+            is_valid=False, message="Token invalid or expired"
+        )
 
 
 class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
@@ -23,13 +96,16 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
 
     def Register(self, request, context):
         """Handles user registration requests."""
-        logging.info(f"Register request received for username: {request.username}")
+        log_ok = logutil.sample("Register")
+        if log_ok:
+            logging.info("Register request received for username: %s", request.username)
 
-        # check if user already exists in the db
-        existing_user = db.get_user_by_username(request.username)
-        if existing_user:
+        # Cheap early answer for a username we know exists (cache only, no
+        # round trip); otherwise the insert below reports the conflict.
+        if db.peek_user(request.username):
             logging.warning(
-                f"Registration failed: Username '{request.username}' already exists."
+                "Registration failed: Username '%s' already exists.",
+                request.username,
             )
             context.set_code(grpc.StatusCode.ALREADY_EXISTS)
             context.set_details(f"Username '{request.username}' already exists")
@@ -38,49 +114,90 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
             )
         # Hash the password
         try:
-            hashed_password: str = utils.hash_password(request.password)
+            hashed_password: str = utils.hash_password_pooled(request.password)
+        except utils.PasswordPoolSaturated:
+            logging.warning(
+                "Registration rejected for user '%s': password pool saturated.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details("Server is busy, please retry.")
+            return auth_pb2.RegisterResponse(success=False, message="Server busy")
         except Exception as e:
-            logging.error(f"Password hashing failed for user '{request.username}': {e}")
+            logging.error(
+                "Password hashing failed for user '%s': %s",
+                request.username,
+                e,
+            )
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details("Internal server error during password hashing.")
             return auth_pb2.RegisterResponse(
                 success=False, message="Server error during registration"
             )
 
-        # Add user to database
-        if db.add_user(request.username, hashed_password):
-            logging.info(f"User '{request.username}' registered successfully.")
-            return auth_pb2.RegisterResponse(
-                success=True, message="User registered successfully"
-            )
-        else:
-            # This could be due to a race condition or other DB error handled in db.py
+        # Insert-or-conflict in one statement and round trip
+        try:
+            user_id = db.register_user(request.username, hashed_password)
+        except Exception as e:
             logging.error(
-                f"Registration failed for user '{request.username}' due to database error."
+                "Registration failed for user '%s' due to database error: %s",
+                request.username,
+                e,
             )
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details("Failed to save user to database.")
             return auth_pb2.RegisterResponse(
                 success=False, message="Database error during registration"
             )
+        if user_id is None:
+            logging.warning(
+                "Registration failed: Username '%s' already exists.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.ALREADY_EXISTS)
+            context.set_details(f"Username '{request.username}' already exists")
+            return auth_pb2.RegisterResponse(
+                success=False, message="Username already exists"
+            )
+        if log_ok:
+            logging.info("User '%s' registered successfully.", request.username)
+        return auth_pb2.RegisterResponse(
+            success=True, message="User registered successfully", user_id=str(user_id)
+        )
 
     def Login(self, request, context):
         """Handles users login requests."""
-        logging.info(f"Login request received for username: {request.username}")
+        log_ok = logutil.sample("Login")
+        if log_ok:
+            logging.info("Login request received for username: %s", request.username)
         user = db.get_user_by_username(request.username)
 
         if not user:
             logging.warning(
-                f"Login failed for username '{request.username}': User not found."
+                "Login failed for username '%s': User not found.",
+                request.username,
             )
             context.set_code(grpc.StatusCode.NOT_FOUND)
             context.set_details("User not found.")
             return auth_pb2.LoginResponse(success=False, message="User not found")
 
-        # verify password
-        if not utils.verify_password(request.password, user["hashed_password"]):
+        # verify password (in the hashing pool, so cheap RPCs keep their threads)
+        try:
+            password_ok = utils.verify_password_pooled(
+                request.password, user.hashed_password
+            )
+        except utils.PasswordPoolSaturated:
+            logging.warning(
+                "Login rejected for user '%s': password pool saturated.",
+                request.username,
+            )
+            context.set_code(grpc.StatusCode.RESOURCE_EXHAUSTED)
+            context.set_details("Server is busy, please retry.")
+            return auth_pb2.LoginResponse(success=False, message="Server busy")
+        if not password_ok:
             logging.warning(
-                f"Login failed: Invalid password for user '{request.username}'."
+                "Login failed: Invalid password for user '%s'.",
+                request.username,
             )
             context.set_code(
                 grpc.StatusCode.UNAUTHENTICATED
@@ -96,54 +213,331 @@ class AuthServiceServicer(auth_pb2_grpc.AuthServiceServicer):
             access_token_expires = timedelta(minutes=utils.ACCESS_TOKEN_EXPIRE_MINUTES)
             token = utils.create_jwt(
                 data={
-                    "sub": str(user["id"]),
-                    "username": user["username"],
+                    "sub": str(user.id),
+                    "username": user.username,
                 },  # Include username for potential use
                 expires_delta=access_token_expires,
             )
-            logging.info(
-                f"Login successful for user '{request.username}'. Token issued."
-            )
+            refresh_token, refresh_hash, refresh_expires = utils.new_refresh_token()
+            db.create_refresh_token(user.id, refresh_hash, refresh_expires)
+            if log_ok:
+                logging.info(
+                    "Login successful for user '%s'. Token issued.",
+                    request.username,
+                )
             return auth_pb2.LoginResponse(
-                success=True, token=token, message="Login successful"
+                success=True,
+                token=token,
+                refresh_token=refresh_token,
+                message="Login successful",
             )
         except Exception as e:
-            logging.error(f"JWT generation failed for user '{request.username}': {e}")
+            logging.error(
+                "Token generation failed for user '%s': %s",
+                request.username,
+                e,
+            )
             context.set_code(grpc.StatusCode.INTERNAL)
             context.set_details("Internal server error during token generation.")
             return auth_pb2.LoginResponse(
                 success=False, message="Server error during login"
             )
 
+    def RefreshToken(self, request, context):
+        """Issues a new access token for a refresh token, without a password check."""
+        log_ok = logutil.sample("RefreshToken")
+        if log_ok:
+            logging.info("RefreshToken request received.")
+        refresh_token, refresh_hash, refresh_expires = utils.new_refresh_token()
+        try:
+            user = db.rotate_refresh_token(
+                utils.refresh_token_hash(request.refresh_token), refresh_hash, refresh_expires
+            )
+        except Exception as e:
+            logging.error("Failed to rotate refresh token: %s", e)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Internal server error during token refresh.")
+            return auth_pb2.RefreshTokenResponse(
+                success=False, message="Server error during token refresh"
+            )
+        return refresh_response(user, refresh_token, context, log_ok)
+
     def VerifyToken(self, request, context):
         """Verifies a JWT token provided by another service or client."""
-        logging.info("VerifyToken request received.")
-        token_data = utils.verify_jwt(request.token)
+        log_ok = logutil.sample("VerifyToken")
+        if log_ok:
+            logging.info("VerifyToken request received.")
+        response = check_token(request.token)
+        if not response.is_valid:
+            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+            context.set_details(response.message)
+        elif log_ok:
+            logging.info("Token verified successfully for user ID: %s", response.user_id)
+        return response
 
-        if token_data and "sub" in token_data:
+    def BatchVerifyTokens(self, request, context):
+        """Verifies several tokens in one call. Per-token failures are reported in the results."""
+        if logutil.sample("BatchVerifyTokens"):
             logging.info(
-                f"Token verified successfully for user ID: {token_data['sub']}"
+                "BatchVerifyTokens request received with %s tokens.",
+                len(request.tokens),
             )
-            return auth_pb2.VerifyTokenResponse(
-                is_valid=True, user_id=str(token_data["sub"])
+        if len(request.tokens) > MAX_VERIFY_BATCH_SIZE:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(f"At most {MAX_VERIFY_BATCH_SIZE} tokens per batch.")
+            return auth_pb2.BatchVerifyTokensResponse(batch_id=request.batch_id)
+        return auth_pb2.BatchVerifyTokensResponse(
+            results=[check_token(token) for token in request.tokens],
+            batch_id=request.batch_id,
+        )
+
+    def StreamVerifyTokens(self, request_iterator, context):
+        """Streams one BatchVerifyTokensResponse back for every request message."""
+        acquire_stream_slot(context)
+        logging.info("StreamVerifyTokens stream opened.")
+        try:
+            for request in request_iterator:
+                if len(request.tokens) > MAX_VERIFY_BATCH_SIZE:
+                    context.abort(
+                        grpc.StatusCode.INVALID_ARGUMENT,
+                        f"At most {MAX_VERIFY_BATCH_SIZE} tokens per batch.",
+                    )
+                yield auth_pb2.BatchVerifyTokensResponse(
+                    results=[check_token(token) for token in request.tokens],
+                    batch_id=request.batch_id,
+                )
+        finally:
+            _stream_slots.release()
+        logging.info("StreamVerifyTokens stream closed.")
+
+    def BulkRegister(self, request_iterator, context):
+        """Registers a stream of users, streaming back one result per request in order."""
+        acquire_stream_slot(context)
+        logging.info("BulkRegister stream opened.")
+        rows = (
+            bulk.BulkRow(index, request.username, request.password, request.hashed_password)
+            for index, request in enumerate(request_iterator)
+        )
+        created = total = 0
+        try:
+            for chunk in bulk.chunked(rows):
+                for result in bulk.register_chunk(chunk):
+                    created += result["success"]
+                    total += 1
+                    yield auth_pb2.BulkRegisterResult(**result)
+        finally:
+            _stream_slots.release()
+        logging.info("BulkRegister stream closed: %s of %s users created.", created, total)
+
+    def RevokeToken(self, request, context):
+        """Revokes a token (e.g. on logout) until it expires."""
+        logging.info("RevokeToken request received.")
+        payload = utils.verify_jwt(request.token)
+        if payload is None:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details("Token invalid, expired or already revoked.")
+            return auth_pb2.RevokeTokenResponse(
+                success=False, message="Token invalid, expired or already revoked"
             )
-        elif token_data:
-            logging.warning("Token verification failed: 'sub' claim missing in token.")
-            # Decide if this is valid - depends on your requirements
-            # Let's treat it as invalid for this example
-            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
-            context.set_details("Token is missing required 'sub' claim.")
-            return auth_pb2.VerifyTokenResponse(
-                is_valid=False, message="Token invalid (missing sub claim)"
+        if "jti" not in payload or "exp" not in payload:
+            # Tokens issued before revocation support carry no 'jti'
+            context.set_code(grpc.StatusCode.FAILED_PRECONDITION)
+            context.set_details("Token has no 'jti'/'exp' claim and cannot be revoked.")
+            return auth_pb2.RevokeTokenResponse(
+                success=False, message="Token cannot be revoked"
             )
-        else:
-            # verify_jwt already logged the reason (expired or invalid)
-            logging.warning("Token verification failed.")
-            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
-            context.set_details("Invalid or expired token.")
-            return auth_pb2.VerifyTokenResponse(
-                is_valid=False, message="Token invalid or expired"
+        try:
+            db.revoke_token(payload["jti"], payload["exp"])
+        except Exception as e:
+            logging.error("Failed to persist revocation of token %s: %s", payload["jti"], e)
+            context.set_code(grpc.StatusCode.INTERNAL)
+            context.set_details("Failed to revoke token.")
+            return auth_pb2.RevokeTokenResponse(
+                success=False, message="Database error during revocation"
             )
+        REVOKED.revoke(payload["jti"], payload["exp"])
+        logging.info("Token %s revoked for user ID: %s", payload["jti"], payload.get("sub"))
+        return auth_pb2.RevokeTokenResponse(success=True, message="Token revoked")
+
+    def WatchRevocations(self, request, context):
+        """Streams all current revocations, then each new one, until the client leaves."""
+        acquire_stream_slot(context)
+        logging.info("WatchRevocations stream opened.")
+        events = queue.Queue()
+
+        def listener(jti, expires_at):
+            events.put((jti, expires_at))
+
+        REVOKED.add_listener(listener)  # Before the snapshot, so nothing is missed
+        try:
+            for jti, expires_at in REVOKED.snapshot():
+                yield auth_pb2.RevocationEvent(jti=jti, expires_at=int(expires_at))
+            while context.is_active():
+                try:
+                    jti, expires_at = events.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                yield auth_pb2.RevocationEvent(jti=jti, expires_at=int(expires_at))
+        finally:
+            REVOKED.remove_listener(listener)
+            _stream_slots.release()
+            logging.info("WatchRevocations stream closed.")
+
+    def WatchToken(self, request, context):
+        """Pushes the token's validity changes until it expires or is revoked.
+
+        Each stream holds a worker thread here; aio_server.py serves many more.
+        """
+        payload = utils.verify_jwt(request.token)
+        error = watch_token_error(payload)
+        if error:
+            context.abort(*error)
+        acquire_stream_slot(context)
+        events = queue.Queue()
+        watch = TOKEN_WATCHES.watch(payload, request.refresh_before_seconds, events.put)
+        try:
+            yield token_event(TokenEvent.VALID, watch.expires_at)
+            while context.is_active():
+                try:
+                    kind = events.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                yield token_event(kind, watch.expires_at)
+                if kind in TERMINAL_KINDS:
+                    return
+        finally:
+            watch.close()
+            _stream_slots.release()
+
+    def GetSigningKeys(self, request, context):
+        """Publishes the public keys verifiers need for RS256/EdDSA tokens."""
+        context.send_initial_metadata(SIGNING_KEYS_METADATA)
+        return signing_keys_response()
+
+
+def acquire_stream_slot(context):
+    """Takes one of the MAX_STREAMS slots for a long-lived stream, or fails the call."""
+    if not _stream_slots.acquire(blocking=False):
+        context.abort(
+            grpc.StatusCode.RESOURCE_EXHAUSTED,
+            f"At most {MAX_STREAMS} long-lived streams per server; retry later.",
+        )
+
+
+def refresh_response(
+    user: tuple[int, str] | None, refresh_token: str, context, log_ok: bool
+) -> auth_pb2.RefreshTokenResponse:
+    """Builds the RefreshToken reply once the refresh token has been rotated (or not)."""
+    if user is None:
+        logging.warning("Token refresh failed: refresh token unknown, expired or already used.")
+        context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+        context.set_details("Invalid refresh token.")
+        return auth_pb2.RefreshTokenResponse(
+            success=False, message="Refresh token invalid, expired or already used"
+        )
+    user_id, username = user
+    token = utils.create_jwt(
+        data={"sub": str(user_id), "username": username},
+        expires_delta=timedelta(minutes=utils.ACCESS_TOKEN_EXPIRE_MINUTES),
+    )
+    if log_ok:
+        logging.info("Token refreshed for user ID: %s", user_id)
+    return auth_pb2.RefreshTokenResponse(
+        success=True, token=token, refresh_token=refresh_token, message="Token refreshed"
+    )
+
+
+def watch_token_error(payload: dict | None) -> tuple | None:
+    """Returns (status code, details) if WatchToken cannot follow the token's claims."""
+    if payload is None:
+        return grpc.StatusCode.UNAUTHENTICATED, "Token invalid, expired or revoked."
+    if "jti" not in payload or "exp" not in payload:
+        return (
+            grpc.StatusCode.FAILED_PRECONDITION,
+            "Token has no 'jti'/'exp' claim and cannot be watched.",
+        )
+    return None
+
+
+# Lets HTTP caches and gateways in front of the service cache the key set too
+SIGNING_KEYS_METADATA = (("cache-control", f"public, max-age={keys.JWKS_MAX_AGE}"),)
+
+
+def signing_keys_response() -> auth_pb2.GetSigningKeysResponse:
+    """The current JWKS; empty while tokens are signed with the shared JWT_SECRET."""
+    jwks = keys.get_key_manager().jwks() if keys.ASYMMETRIC else '{"keys": []}'
+    return auth_pb2.GetSigningKeysResponse(jwks=jwks, max_age_seconds=keys.JWKS_MAX_AGE)
+
+
+def start_signing_keys():
+    """Loads the signing keys up front, so a bad JWT_KEYS_DIR or secret fails at startup."""
+    utils.check_signing_config()
+    if keys.ASYMMETRIC:
+        keys.get_key_manager()
+
+
+def register_metrics():
+    """Publishes the database pool stats next to the per-RPC metrics."""
+    metrics.REGISTRY.register_stats(
+        "auth_admission", "Adaptive concurrency limit and shed calls.", admission.stats
+    )
+    metrics.REGISTRY.register_stats(
+        "auth_db_pool", "Database connection pool utilization and waits.", db.pool_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "auth_user_cache", "User row cache hit rates and memory.", db.user_cache_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "auth_jwt_claims_cache", "Decoded-claims memo cache in verify_jwt.", utils.claims_cache_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "auth_token_watches", "Open WatchToken streams and events sent.", TOKEN_WATCHES.stats
+    )
+    metrics.REGISTRY.register_stats(
+        "auth_revocations", "Revoked token ids held in memory.", REVOKED.stats
+    )
+    metrics.REGISTRY.register_stats(
+        "auth_log_queue", "Log records waiting for the writer thread.", logutil.stats
+    )
+
+
+def start_revocations():
+    """Loads persisted revocations and follows new ones made by other processes."""
+    for jti, expires_at in db.load_revocations():
+        REVOKED.revoke(jti, expires_at)
+    db.start_revocation_listener(REVOKED.revoke)
+
+
+def create_server(extra_options=(), port: str = PORT) -> grpc.Server:
+    """Builds the AuthService gRPC server, bound to `port` but not yet started."""
+    controller = admission.create_controller(
+        ADMISSION_PRIORITIES,
+        initial_limit=MAX_WORKERS * 2,
+        max_limit=MAX_CONCURRENT_RPCS,
+        min_limit=MAX_WORKERS,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+        interceptors=[metrics.MetricsInterceptor()]
+        + admission.interceptors(controller)
+        + grpc_options.server_interceptors(),
+        maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS,
+        options=grpc_options.server_options(dict(extra_options)),
+        compression=grpc_options.server_compression(),
+    )
+    auth_pb2_grpc.add_AuthServiceServicer_to_server(AuthServiceServicer(), server)
+
+    server_address = f"[::]:{port}"
+    server.add_insecure_port(server_address)  # Use insecure for simplicity IN DEV ONLY!
+    return server
+
+
+def shutdown(server: grpc.Server, grace: float | None = None):
+    """Stops the server, letting in-flight RPCs finish within `grace` seconds, and releases resources."""
+    server.stop(grace).wait()
+    logging.info("Database pool stats at shutdown: %s", db.pool_stats())
+    db.close_pool()
+    utils.shutdown_password_pool()
 
 
 def serve():
@@ -152,17 +546,16 @@ def serve():
     try:
         db.init_db()
     except Exception as e:
-        logging.critical(f"Failed to initialize database: {e}. Exiting.")
+        logging.critical("Failed to initialize database: %s. Exiting.", e)
         return  # Exit if DB init fails
+    utils.start_password_pool(max_queue=PASSWORD_MAX_QUEUE)
+    start_signing_keys()
+    start_revocations()
+    register_metrics()
+    metrics.start_http_server(METRICS_PORT)
 
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    auth_pb2_grpc.add_AuthServiceServicer_to_server(AuthServiceServicer(), server)
-
-    port = "50051"
-    server_address = f"[::]:{port}"
-    server.add_insecure_port(server_address)  # Use insecure for simplicity IN DEV ONLY!
-
-    logging.info(f"AuthService starting on port {port}...")
+    server = create_server()
+    logging.info("AuthService starting on port %s...", PORT)
     server.start()
     logging.info("AuthService started successfully.")
 
@@ -172,7 +565,7 @@ def serve():
             time.sleep(86400)  # One day
     except KeyboardInterrupt:
         logging.info("Stopping AuthService...")
-        server.stop(0)  # Graceful shutdown
+        shutdown(server, 0)
         logging.info("AuthService stopped.")
 
 
@@ -0,0 +1,240 @@
+# Runs AuthService as several worker processes sharing one port. Each worker
+# is a full gRPC server (server.create_server) bound with SO_REUSEPORT, so the
+# kernel spreads connections across processes and JWT signing/bcrypt are no
+# longer limited by a single GIL.
+#
+#   python supervisor.py          # AUTH_WORKERS workers (default: one per core)
+#   kill -HUP <supervisor pid>    # rolling restart, one worker at a time
+#   kill -TERM <supervisor pid>   # graceful shutdown
+#
+# A worker's heartbeat is a real RPC: every HEARTBEAT_INTERVAL the worker
+# calls GetSigningKeys on its own server through a private unix socket (the
+# shared port could route the call to another worker). The heartbeat only
+# advances when that call is answered, so a worker whose gRPC threads are
+# wedged stops beating even though its process is alive.
+
+import grpc
+import logging
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+import time
+
+from generated import auth_pb2
+from generated import auth_pb2_grpc
+
+import db
+import keys
+import server
+import utils
+from common import metrics
+
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", str(os.cpu_count() or 1)))
+# Split the bcrypt processes between workers unless PASSWORD_POOL_SIZE is set
+WORKER_PASSWORD_POOL_SIZE = int(
+    os.getenv("PASSWORD_POOL_SIZE", str(max(1, (os.cpu_count() or 1) // AUTH_WORKERS)))
+)
+WORKER_READY_TIMEOUT = float(os.getenv("WORKER_READY_TIMEOUT", "30"))  # Seconds to start serving
+WORKER_HEARTBEAT_TIMEOUT = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "30"))  # Seconds without a served probe = hung
+WORKER_PROBE_TIMEOUT = float(os.getenv("WORKER_PROBE_TIMEOUT", "5"))  # Seconds for one heartbeat probe
+WORKER_STOP_GRACE = float(os.getenv("WORKER_STOP_GRACE", "10"))  # Seconds for in-flight RPCs on stop
+HEARTBEAT_INTERVAL = 1.0
+
+# spawn (fork + exec) rather than a bare fork: workers import the code fresh,
+# so a rolling restart also picks up code changes.
+_mp = multiprocessing.get_context("spawn")
+
+
+def _worker_main(index: int, ready, heartbeat):
+    """Entry point of a worker process."""
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The supervisor handles Ctrl-C
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    utils.start_password_pool(size=WORKER_PASSWORD_POOL_SIZE, max_queue=server.PASSWORD_MAX_QUEUE)
+    server.start_signing_keys()
+    server.start_revocations()
+    server.register_metrics()
+    if server.METRICS_PORT:
+        # Workers cannot share the scrape port: worker i serves METRICS_PORT + i
+        metrics.start_http_server(server.METRICS_PORT + index)
+    grpc_server = server.create_server(extra_options=[("grpc.so_reuseport", 1)])
+    probe_path = os.path.join(tempfile.gettempdir(), f"auth-worker-{os.getpid()}.sock")
+    grpc_server.add_insecure_port(f"unix:{probe_path}")
+    grpc_server.start()
+    logging.info("Worker %s (pid %s) serving on port %s.", index, os.getpid(), server.PORT)
+    ready.set()
+
+    with grpc.insecure_channel(f"unix:{probe_path}") as channel:
+        stub = auth_pb2_grpc.AuthServiceStub(channel)
+        while not stop.wait(HEARTBEAT_INTERVAL):
+            try:
+                stub.GetSigningKeys(auth_pb2.GetSigningKeysRequest(), timeout=WORKER_PROBE_TIMEOUT)
+            except grpc.RpcError as e:
+                logging.warning("Worker %s (pid %s) failed its serving probe: %s", index, os.getpid(), e.code())
+                continue
+            heartbeat.value = time.time()
+
+    logging.info("Worker %s (pid %s) stopping...", index, os.getpid())
+    server.shutdown(grpc_server, WORKER_STOP_GRACE)
+    try:
+        os.unlink(probe_path)
+    except OSError:
+        pass
+    logging.info("Worker %s (pid %s) stopped.", index, os.getpid())
+
+
+class Worker:
+    """Handle on one worker process and its readiness/heartbeat state."""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.ready = _mp.Event()
+        self.heartbeat = _mp.Value("d", time.time(), lock=False)
+        self.process = _mp.Process(
+            target=_worker_main,
+            args=(index, self.ready, self.heartbeat),
+            name=f"auth-worker-{index}",
+        )
+
+    def start(self) -> bool:
+        """Starts the process and waits until it is serving."""
+        self.process.start()
+        return self.ready.wait(WORKER_READY_TIMEOUT)
+
+    def heartbeat_age(self) -> float:
+        return time.time() - self.heartbeat.value
+
+    def is_healthy(self) -> bool:
+        """Alive, and its server answered a probe within WORKER_HEARTBEAT_TIMEOUT."""
+        return self.process.is_alive() and self.heartbeat_age() < WORKER_HEARTBEAT_TIMEOUT
+
+    def stop(self):
+        """Asks the worker to drain and exit, killing it if it does not."""
+        if self.process.is_alive():
+            self.process.terminate()  # SIGTERM -> graceful stop in _worker_main
+            self.process.join(WORKER_STOP_GRACE + 5)
+        if self.process.is_alive():
+            logging.warning("Worker %s did not stop in time; killing it.", self.index)
+            self.process.kill()
+            self.process.join()
+
+
+class Supervisor:
+    """Starts, monitors and restarts the AuthService worker processes."""
+
+    def __init__(self, num_workers: int):
+        self.workers = [None] * num_workers
+        self._stopping = False
+        self._restart_requested = False
+
+    def _replace(self, index: int):
+        """Starts a new worker for slot `index`, then retires the old one.
+
+        With SO_REUSEPORT both listen on the port during the handover, so no
+        connection is refused while a worker is being replaced.
+        """
+        old = self.workers[index]
+        new = Worker(index)
+        if not new.start():
+            logging.error("Replacement worker %s did not become ready; keeping the old one.", index)
+            new.stop()
+            return
+        self.workers[index] = new
+        if old is not None:
+            old.stop()
+
+    def rolling_restart(self):
+        """Replaces every worker, one at a time."""
+        logging.info("Rolling restart of AuthService workers...")
+        for index in range(len(self.workers)):
+            if self._stopping:
+                return
+            self._replace(index)
+        logging.info("Rolling restart complete.")
+
+    def health(self) -> list:
+        """Returns per-worker health: pid, liveness and heartbeat age."""
+        return [
+            {
+                "index": worker.index,
+                "pid": worker.process.pid,
+                "alive": worker.process.is_alive(),
+                "heartbeat_age": round(worker.heartbeat_age(), 1),
+                "healthy": worker.is_healthy(),
+            }
+            for worker in self.workers
+            if worker is not None
+        ]
+
+    def _check_workers(self):
+        for index, worker in enumerate(list(self.workers)):
+            if worker is None:
+                self._replace(index)  # Never came up; try again
+                continue
+            if worker.is_healthy():
+                continue
+            if worker.process.is_alive():
+                logging.error(
+                    "Worker %s (pid %s) missed heartbeats for %.0fs; replacing it.",
+                    worker.index,
+                    worker.process.pid,
+                    worker.heartbeat_age(),
+                )
+            else:
+                logging.error(
+                    "Worker %s (pid %s) exited with code %s; restarting it.",
+                    worker.index,
+                    worker.process.pid,
+                    worker.process.exitcode,
+                )
+            self._replace(worker.index)
+
+    def run(self):
+        # Initialize the schema once, before any worker starts
+        try:
+            db.init_db()
+        except Exception as e:
+            logging.critical("Failed to initialize database: %s. Exiting.", e)
+            return
+        try:
+            utils.check_signing_config()
+        except RuntimeError as e:
+            logging.critical("%s Exiting.", e)
+            return
+        if keys.ASYMMETRIC and not keys.JWT_KEYS_DIR:
+            # Every worker must sign with the same keys: share one dev key directory
+            os.environ["JWT_KEYS_DIR"] = keys.get_key_manager().keys_dir
+
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "_stopping", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "_stopping", True))
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "_restart_requested", True))
+
+        logging.info("Starting %s AuthService workers on port %s...", len(self.workers), server.PORT)
+        for index in range(len(self.workers)):
+            self._replace(index)
+        logging.info("AuthService workers started: %s", self.health())
+
+        while not self._stopping:
+            time.sleep(HEARTBEAT_INTERVAL)
+            if self._restart_requested:
+                self._restart_requested = False
+                self.rolling_restart()
+            else:
+                self._check_workers()
+
+        logging.info("Stopping AuthService workers...")
+        for worker in self.workers:
+            if worker is not None and worker.process.is_alive():
+                worker.process.terminate()  # Drain all workers in parallel
+        for worker in self.workers:
+            if worker is not None:
+                worker.stop()
+        logging.info("AuthService stopped.")
+
+
+if __name__ == "__main__":
+    Supervisor(AUTH_WORKERS).run()
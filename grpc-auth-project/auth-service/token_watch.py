@@ -0,0 +1,195 @@
+import asyncio
+import itertools
+import logging
+import math
+import os
+import threading
+import time
+
+from generated import auth_pb2
+from common.revocation import REVOKED
+
+# Session validity streams (WatchToken). Each open stream is one Watch: a
+# couple of timers (near expiry, expiry) in a shared timer wheel plus an entry
+# in a jti index that a single revocation listener consults. Nothing runs per
+# stream while it waits, so one process can hold tens of thousands of them;
+# the wheel is driven by one asyncio task (aio_server.py) or, in the threaded
+# server, by one background thread.
+
+TOKEN_WATCH_TICK = float(os.getenv("TOKEN_WATCH_TICK", "1"))  # Timer resolution, seconds
+TOKEN_REFRESH_WARNING = int(os.getenv("TOKEN_REFRESH_WARNING", "300"))  # Default EXPIRING lead time, seconds
+
+TokenEvent = auth_pb2.TokenEvent
+TERMINAL_KINDS = (TokenEvent.EXPIRED, TokenEvent.REVOKED)
+MESSAGES = {
+    TokenEvent.VALID: "Token is valid",
+    TokenEvent.EXPIRING: "Token expires soon; refresh it",
+    TokenEvent.EXPIRED: "Token has expired",
+    TokenEvent.REVOKED: "Token has been revoked",
+}
+
+
+class TimerWheel:
+    """Timers bucketed by tick. Adding and cancelling are O(1), and one
+    advance() per tick fires every timer that came due, however many exist."""
+
+    def __init__(self, tick: float):
+        self.tick = tick
+        self._slots = {}  # tick number -> {timer id: callback}
+        self._current = int(time.time() // tick)
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.timers = 0
+
+    def schedule(self, when: float, callback) -> tuple:
+        """Calls `callback()` on the first tick at or after `when` (Unix time)."""
+        timer_id = next(self._ids)
+        with self._lock:
+            slot = max(math.ceil(when / self.tick), self._current + 1)
+            self._slots.setdefault(slot, {})[timer_id] = callback
+            self.timers += 1
+        return slot, timer_id
+
+    def cancel(self, handle: tuple):
+        slot, timer_id = handle
+        with self._lock:
+            timers = self._slots.get(slot)
+            if timers and timers.pop(timer_id, None) is not None:
+                self.timers -= 1
+                if not timers:
+                    del self._slots[slot]
+
+    def advance(self, now: float):
+        """Fires the timers of every tick up to `now`."""
+        target = int(now // self.tick)
+        due = []
+        with self._lock:
+            while self._current < target:
+                self._current += 1
+                timers = self._slots.pop(self._current, None)
+                if timers:
+                    due.extend(timers.values())
+            self.timers -= len(due)
+        for callback in due:
+            try:
+                callback()
+            except Exception as e:
+                logging.error("Token watch timer failed: %s", e)
+
+    def next_tick_in(self) -> float:
+        """Seconds until the next tick boundary."""
+        return self.tick - time.time() % self.tick
+
+
+class Watch:
+    """One WatchToken stream. `deliver(kind)` is called for every event."""
+
+    def __init__(self, watches, jti: str, expires_at: float, deliver):
+        self.watches = watches
+        self.jti = jti
+        self.expires_at = expires_at
+        self.deliver = deliver
+        self.timers = []
+        self.done = False
+
+    def close(self):
+        self.watches._remove(self)
+
+
+class TokenWatches:
+    """Open WatchToken streams, their timers and the revocation fan-out."""
+
+    def __init__(self, tick: float = TOKEN_WATCH_TICK):
+        self.wheel = TimerWheel(tick)
+        self._by_jti = {}  # jti -> set of Watch
+        self._lock = threading.Lock()
+        self._driver = None
+        self.events_sent = {kind: 0 for kind in MESSAGES if kind != TokenEvent.VALID}
+
+    def watch(self, payload: dict, refresh_before: int, deliver) -> Watch:
+        """Starts watching a verified token's claims ('jti' and 'exp' required)."""
+        self._ensure_driver()
+        watch = Watch(self, payload["jti"], float(payload["exp"]), deliver)
+        with self._lock:
+            self._by_jti.setdefault(watch.jti, set()).add(watch)
+        refresh_at = watch.expires_at - (refresh_before or TOKEN_REFRESH_WARNING)
+        watch.timers = [
+            self.wheel.schedule(refresh_at, lambda: self._send(watch, TokenEvent.EXPIRING)),
+            self.wheel.schedule(watch.expires_at, lambda: self._send(watch, TokenEvent.EXPIRED)),
+        ]
+        if REVOKED.is_revoked(watch.jti):  # Revoked after verification, before we registered
+            self._send(watch, TokenEvent.REVOKED)
+        return watch
+
+    def _send(self, watch: Watch, kind: int):
+        with self._lock:
+            if watch.done:
+                return
+            if kind in TERMINAL_KINDS:
+                watch.done = True
+            self.events_sent[kind] += 1
+        watch.deliver(kind)
+        if kind in TERMINAL_KINDS:
+            self._remove(watch)
+
+    def _remove(self, watch: Watch):
+        with self._lock:
+            watch.done = True
+            watches = self._by_jti.get(watch.jti)
+            if watches is not None:
+                watches.discard(watch)
+                if not watches:
+                    del self._by_jti[watch.jti]
+        for handle in watch.timers:
+            self.wheel.cancel(handle)
+
+    def _on_revoke(self, jti: str, expires_at: float):
+        with self._lock:
+            watches = list(self._by_jti.get(jti, ()))
+        for watch in watches:
+            self._send(watch, TokenEvent.REVOKED)
+
+    def _ensure_driver(self):
+        if self._driver is None:
+            with self._lock:
+                if self._driver is None:
+                    # Fallback for the threaded server: one thread ticks for every stream
+                    self._driver = threading.Thread(target=self._run_thread, name="token-watch", daemon=True)
+                    REVOKED.add_listener(self._on_revoke)
+                    self._driver.start()
+
+    def _run_thread(self):
+        while True:
+            time.sleep(self.wheel.next_tick_in())
+            self.wheel.advance(time.time())
+
+    def start_async(self) -> asyncio.Task:
+        """Drives the timer wheel from the running event loop (grpc.aio server)."""
+        with self._lock:
+            if self._driver is not None:
+                raise RuntimeError("Token watch timer wheel is already running")
+            self._driver = asyncio.create_task(self._run_async())
+            REVOKED.add_listener(self._on_revoke)
+        return self._driver
+
+    async def _run_async(self):
+        while True:
+            await asyncio.sleep(self.wheel.next_tick_in())
+            self.wheel.advance(time.time())
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {
+                "streams": sum(len(watches) for watches in self._by_jti.values()),
+                "timers": self.wheel.timers,
+            }
+            for kind, count in self.events_sent.items():
+                stats[f"{TokenEvent.Kind.Name(kind).lower()}_events"] = count
+            return stats
+
+
+def event(kind: int, expires_at: float) -> auth_pb2.TokenEvent:
+    return auth_pb2.TokenEvent(kind=kind, expires_at=int(expires_at), message=MESSAGES[kind])
+
+
+TOKEN_WATCHES = TokenWatches()  # Process-wide registry used by the servicers
@@ -1,22 +1,72 @@
 import os
+import hashlib
 import jwt
+import multiprocessing
+import secrets
+import threading
+import time
+from concurrent import futures
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 import logging
 
+import keys
+from common.cache import TTLCache
+from common.jwt_config import DEFAULT_JWT_SECRET, JWT_LEGACY_HS256_UNTIL, JWT_SECRET
+from common.revocation import REVOKED
+
 # Configure password hashing
 # Use bycrypt, recommended strong
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # Get JWT secret from environment variable
 # Use a default only for local dev, raise error if not set in production
-JWT_SECRET = os.getenv("JWT_SECRET", "default-secret-for-dev")
-if JWT_SECRET == "default-secret-for-dev":
+if JWT_SECRET == DEFAULT_JWT_SECRET:
     logging.warning(
         "Using default JWT secret. Set JWT_SECRET environment variable in production!"
     )
-ALGORITHM = "HS256"
+ALGORITHM = "HS256"  # Tokens without a 'kid' header; see keys.py for RS256/EdDSA
+
+
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Token validity period
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "14"))  # Idle session lifetime
+
+# bcrypt is deliberately slow, so it runs in a dedicated pool instead of on the
+# gRPC worker threads. "process" sidesteps the GIL entirely; "thread" is enough
+# when the bcrypt backend releases the GIL (the pyca/bcrypt wheels do).
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "process")
+PASSWORD_POOL_SIZE = int(os.getenv("PASSWORD_POOL_SIZE", str(os.cpu_count() or 1)))
+# Hashes running + waiting. Beyond this, requests are rejected immediately.
+# The threaded server lowers it below its worker count (see server.py).
+PASSWORD_POOL_MAX_QUEUE = int(
+    os.getenv("PASSWORD_POOL_MAX_QUEUE", str(PASSWORD_POOL_SIZE * 4))
+)
+
+# Bulk imports hash in a pool of their own, so import batches never queue
+# ahead of an interactive Register/Login (the OS shares the cores between the
+# two pools). Several passwords go into each task to amortize the
+# inter-process round trip.
+BULK_HASH_BATCH = int(os.getenv("BULK_HASH_BATCH", "8"))
+BULK_HASH_POOL_SIZE = int(os.getenv("BULK_HASH_POOL_SIZE", "0"))  # 0: half the password pool's size
+
+# Decoded claims of recently verified tokens, keyed by token digest. A repeat
+# verification of the same token skips base64, JSON and signature work. An
+# entry never outlives the token's 'exp', and the revocation check still runs
+# on every call. Only valid tokens are memoized.
+JWT_CLAIMS_CACHE_MAX_SIZE = int(os.getenv("JWT_CLAIMS_CACHE_MAX_SIZE", "10000"))  # 0 disables
+JWT_CLAIMS_CACHE_TTL = float(os.getenv("JWT_CLAIMS_CACHE_TTL", "300"))  # Seconds; bounds key rotation lag
+_claims = TTLCache(JWT_CLAIMS_CACHE_MAX_SIZE)
+
+_password_pool = None
+_password_pool_size = PASSWORD_POOL_SIZE
+_password_pool_lock = threading.Lock()
+_password_slots = threading.BoundedSemaphore(PASSWORD_POOL_MAX_QUEUE)
+_bulk_pool = None
+_bulk_slots = None  # Bulk tasks running + queued: two per bulk worker
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the password hashing pool already has a full queue."""
 
 
 def hash_password(password: str):
@@ -24,46 +74,238 @@ def hash_password(password: str):
     return pwd_context.hash(password)
 
 
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hashes several passwords in one call (one pool task)."""
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def is_password_hash(value: str) -> bool:
+    """True if `value` is a hash verify_password understands, e.g. a migrated bcrypt hash."""
+    return pwd_context.identify(value) is not None
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies a plain password against a stored hash."""
     try:
         return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        logging.error(f"Error verifying password hash: {e}")
+        logging.error("Error verifying password hash: %s", e)
         return False
 
 
+def start_password_pool(size: int | None = None, max_queue: int | None = None):
+    """Creates the password hashing pool (done lazily on first use otherwise).
+
+    `size` overrides PASSWORD_POOL_SIZE, e.g. to split cores between server
+    processes, and `max_queue` overrides PASSWORD_POOL_MAX_QUEUE.
+    """
+    global _password_pool, _password_pool_size, _password_slots
+    size = size or PASSWORD_POOL_SIZE
+    with _password_pool_lock:
+        if _password_pool is None:
+            if max_queue:
+                # Nothing can hold a slot yet: work is only submitted to a started pool
+                _password_slots = threading.BoundedSemaphore(max_queue)
+            _password_pool = _create_pool(size, "bcrypt")
+            _password_pool_size = size
+            logging.info(
+                "Password hashing pool started (%s, %s workers, queue limit %s).",
+                PASSWORD_POOL_KIND,
+                size,
+                max_queue or PASSWORD_POOL_MAX_QUEUE,
+            )
+    return _password_pool
+
+
+def start_bulk_hash_pool(size: int | None = None):
+    """Creates the bulk hashing pool (done lazily on the first bulk import otherwise).
+
+    `size` overrides BULK_HASH_POOL_SIZE, e.g. to use every core in an offline import.
+    """
+    global _bulk_pool, _bulk_slots
+    size = size or BULK_HASH_POOL_SIZE or max(1, _password_pool_size // 2)
+    with _password_pool_lock:
+        if _bulk_pool is None:
+            _bulk_pool = _create_pool(size, "bcrypt-bulk")
+            _bulk_slots = threading.BoundedSemaphore(size * 2)
+            logging.info("Bulk hashing pool started (%s, %s workers).", PASSWORD_POOL_KIND, size)
+    return _bulk_pool
+
+
+def _create_pool(size: int, name: str) -> futures.Executor:
+    if PASSWORD_POOL_KIND == "thread":
+        return futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix=name)
+    # spawn, not fork: forking a process that runs gRPC threads is unsafe
+    return futures.ProcessPoolExecutor(
+        max_workers=size, mp_context=multiprocessing.get_context("spawn")
+    )
+
+
+def shutdown_password_pool():
+    """Shuts the password and bulk hashing pools down."""
+    global _password_pool, _bulk_pool
+    with _password_pool_lock:
+        for pool in (_password_pool, _bulk_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        _password_pool = None
+        _bulk_pool = None
+
+
+def submit_password_work(fn, *args) -> futures.Future:
+    """Runs hash_password/verify_password in the hashing pool.
+
+    Raises PasswordPoolSaturated instead of queueing when PASSWORD_POOL_MAX_QUEUE
+    calls are already pending, so callers can fail fast.
+    """
+    slots = _password_slots
+    if not slots.acquire(blocking=False):
+        raise PasswordPoolSaturated("Password hashing pool is saturated")
+    try:
+        future = (_password_pool or start_password_pool()).submit(fn, *args)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def hash_password_pooled(password: str) -> str:
+    """hash_password, executed in the hashing pool."""
+    return submit_password_work(hash_password, password).result()
+
+
+def verify_password_pooled(plain_password: str, hashed_password: str) -> bool:
+    """verify_password, executed in the hashing pool."""
+    return submit_password_work(verify_password, plain_password, hashed_password).result()
+
+
+def hash_passwords_pooled(passwords: list[str]) -> list[str]:
+    """Hashes many passwords in parallel across the bulk hashing pool, keeping their order.
+
+    Blocks while the pool is busy rather than raising PasswordPoolSaturated.
+    """
+    pool = _bulk_pool or start_bulk_hash_pool()
+    slots = _bulk_slots
+    pending = []
+    for start in range(0, len(passwords), BULK_HASH_BATCH):
+        slots.acquire()
+        try:
+            future = pool.submit(hash_passwords, passwords[start : start + BULK_HASH_BATCH])
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        pending.append(future)
+    return [hashed for future in pending for hashed in future.result()]
+
+
 def create_jwt(data: dict, expires_delta: timedelta | None = None) -> str:
     """Creates a JWT Token"""
     to_encode = data.copy()
     if expires_delta:
-        expire = datetime.w(timezone.utc) + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=ACCESS_TOKEN_EXPIRE_MINUTES
         )
     to_encode.update({"exp": expire})
+    # Unique token id, so this token can be revoked on its own
+    to_encode.setdefault("jti", secrets.token_urlsafe(16))
     # Ensure 'sub' (subject) is present, often the username or user ID
     if "sub" not in to_encode:
         logging.warning("JWT created without 'sub' field.")
 
+    if keys.ASYMMETRIC:
+        key = keys.get_key_manager().signing_key()
+        return jwt.encode(
+            to_encode, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def _decode(token: str) -> dict:
+    """Checks the signature and expiry. Raises jwt.InvalidTokenError otherwise.
+
+    Tokens with a 'kid' are checked against that public key. Tokens without one
+    are HS256 tokens signed with JWT_SECRET; with asymmetric keys they are only
+    accepted inside the JWT_LEGACY_HS256_UNTIL window.
+    """
+    kid = jwt.get_unverified_header(token).get("kid")
+    if kid is None:
+        if keys.ASYMMETRIC:
+            return _decode_legacy(token)
+        return jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+    key = keys.get_key_manager().public_key(kid) if keys.ASYMMETRIC else None
+    if key is None:
+        raise jwt.InvalidTokenError(f"Unknown signing key '{kid}'")
+    return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+
+
+def _decode_legacy(token: str) -> dict:
+    """Checks an HS256 token issued before switching to RS256/EdDSA signing."""
+    if time.time() >= JWT_LEGACY_HS256_UNTIL:
+        raise jwt.InvalidTokenError("HS256 tokens are not accepted with asymmetric signing")
+    payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM], options={"require": ["exp"]})
+    if payload["exp"] > JWT_LEGACY_HS256_UNTIL:
+        raise jwt.InvalidTokenError("HS256 token expires after JWT_LEGACY_HS256_UNTIL")
+    return payload
+
+
+def check_signing_config():
+    """Raises RuntimeError for settings that would let anyone sign valid tokens."""
+    if keys.ASYMMETRIC and JWT_SECRET == DEFAULT_JWT_SECRET:
+        raise RuntimeError(
+            f"Refusing JWT_ALGORITHM={keys.JWT_ALGORITHM} with the default JWT_SECRET, "
+            "which anyone can sign HS256 tokens with. Set JWT_SECRET."
+        )
+
+
+def refresh_token_hash(token: str) -> bytes:
+    """Digest under which a refresh token is stored.
+
+    Refresh tokens are 256 random bits, so unlike passwords they cannot be
+    guessed and a fast hash is enough; no bcrypt is needed to check them.
+    """
+    return hashlib.sha256(token.encode()).digest()
+
+
+def new_refresh_token() -> tuple[str, bytes, float]:
+    """Returns a new opaque refresh token, its stored digest and its expiry (Unix time)."""
+    token = secrets.token_urlsafe(32)
+    return token, refresh_token_hash(token), time.time() + REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def claims_cache_stats() -> dict:
+    """Returns hit/miss/eviction counters of the decoded-claims memo cache."""
+    return _claims.stats()
+
+
 def verify_jwt(token: str) -> dict | None:
-    """Verifies a JWT token and returns the payload if valid, otherwise None."""
+    """Verifies a JWT token and returns the payload if valid, otherwise None.
+
+    The returned dict may be shared with other callers; do not modify it.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    payload = _claims.get(key)
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
-        # Check if 'sub' claim exists (optional but good practice)
-        # You could add more checks here (e.g., check against a token blacklist)
+        if payload is None:
+            payload = _decode(token)
+            ttl = JWT_CLAIMS_CACHE_TTL
+            if "exp" in payload:
+                ttl = min(ttl, float(payload["exp"]) - time.time())
+            _claims.set(key, payload, ttl)
+        if REVOKED.is_revoked(payload.get("jti")):
+            logging.warning("JWT verification failed: Token has been revoked")
+            return None
         return payload
     except jwt.ExpiredSignatureError:
         logging.warning("JWT verification failed: Token has expired")
         return None
     except jwt.InvalidTokenError as e:
-        logging.error(f"JWT verification failed: Invalid token - {e}")
+        logging.error("JWT verification failed: Invalid token - %s", e)
         return None
     except Exception as e:
-        logging.error(f"An unexpected error occurred during JWT verification: {e}")
+        logging.error("An unexpected error occurred during JWT verification: %s", e)
         return None
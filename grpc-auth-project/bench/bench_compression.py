@@ -0,0 +1,143 @@
+import argparse
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from datetime import timedelta
+
+import grpc
+
+# Bandwidth and CPU of gRPC message compression on this project's larger payloads.
+#
+# Both services run in this process (fake databases). Calls go through a TCP
+# proxy that counts the bytes on the wire, so the numbers include HTTP/2
+# framing. For each algorithm:
+#
+#   BatchGetProfiles   --batch profiles per response (server compression,
+#                      as set per method by GRPC_METHOD_COMPRESSION)
+#   BatchVerifyTokens  --batch JWTs per request (client channel compression)
+#                      and their verification results (server compression)
+#
+# CPU is this process's user+system time per call, so it covers the client
+# and the server side of both compressing and decompressing.
+#
+#   python bench/bench_compression.py --batch 500 --calls 200
+
+import harness
+
+ALGORITHMS = ("none", "deflate", "gzip")
+
+
+class CountingProxy:
+    """Forwards TCP connections to `target`, counting bytes in each direction."""
+
+    def __init__(self, target: str):
+        host, port = target.rsplit(":", 1)
+        self.target = (host, int(port))
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.addr = f"127.0.0.1:{self.listener.getsockname()[1]}"
+        self.sent = 0  # Client -> server
+        self.received = 0  # Server -> client
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            client, _ = self.listener.accept()
+            upstream = socket.create_connection(self.target)
+            for source, sink, outbound in ((client, upstream, True), (upstream, client, False)):
+                threading.Thread(target=self._pipe, args=(source, sink, outbound), daemon=True).start()
+
+    def _pipe(self, source, sink, outbound: bool):
+        try:
+            while data := source.recv(65536):
+                with self._lock:
+                    if outbound:
+                        self.sent += len(data)
+                    else:
+                        self.received += len(data)
+                sink.sendall(data)
+        except OSError:
+            pass
+        finally:
+            sink.close()
+
+    def reset(self):
+        with self._lock:
+            self.sent = self.received = 0
+
+
+def measure(call, proxy: CountingProxy, calls: int) -> tuple[float, float, float, float]:
+    """Returns (bytes sent, bytes received, ms latency, ms CPU) per call."""
+    call()  # Connection setup and first-call costs are not measured
+    proxy.reset()
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    return proxy.sent / calls, proxy.received / calls, elapsed / calls * 1e3, cpu / calls * 1e3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gRPC compression.")
+    parser.add_argument("--batch", type=int, default=500, help="Profiles / tokens per call")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET", "bench-secret-0123456789abcdef0123456789")
+    os.environ.setdefault("METRICS_PORT", "0")
+    # Installs the per-method compression interceptor; each run below sets the algorithm
+    os.environ["GRPC_METHOD_COMPRESSION"] = "auth.ProfileService/BatchGetProfiles=none"
+    logging.disable(logging.WARNING)
+    services = harness.LocalServices().start()
+    from common import grpc_options
+    from generated import auth_pb2, auth_pb2_grpc
+
+    store = services.profile.profile_store
+    for i in range(args.batch):
+        store.set_profile(i, f"user{i}@example.com", f"Benchmark User {i}")
+    # Distinct tokens, as a batch of different users' calls would carry
+    tokens = [
+        services.auth.utils.create_jwt({"sub": str(i), "username": f"user{i}"}, timedelta(hours=1))
+        for i in range(args.batch)
+    ]
+    metadata = [("authorization", f"Bearer {tokens[0]}")]
+    profiles_request = auth_pb2.BatchGetProfilesRequest(user_ids=[str(i) for i in range(args.batch)])
+    verify_request = auth_pb2.BatchVerifyTokensRequest(tokens=tokens)
+    proxies = {"profile": CountingProxy(services.profile_addr), "auth": CountingProxy(services.auth_addr)}
+
+    print(f"batch={args.batch} calls={args.calls}\n")
+    print(f"{'method':<20}{'algorithm':<10}{'sent B':>10}{'recv B':>10}{'ms/call':>10}{'CPU ms':>10}")
+    try:
+        for algorithm in ALGORITHMS:
+            compression = grpc_options.compression(algorithm)
+            # Server side: what GRPC_METHOD_COMPRESSION would configure
+            grpc_options.METHOD_COMPRESSION.update({
+                "/auth.ProfileService/BatchGetProfiles": compression,
+                "/auth.AuthService/BatchVerifyTokens": compression,
+            })
+            profile = auth_pb2_grpc.ProfileServiceStub(
+                grpc.insecure_channel(proxies["profile"].addr, options=grpc_options.channel_options())
+            )
+            verify = auth_pb2_grpc.AuthServiceStub(grpc.insecure_channel(
+                proxies["auth"].addr, options=grpc_options.channel_options(), compression=compression
+            ))
+            cases = (
+                ("BatchGetProfiles", proxies["profile"],
+                 lambda: profile.BatchGetProfiles(profiles_request, metadata=metadata)),
+                ("BatchVerifyTokens", proxies["auth"],
+                 lambda: verify.BatchVerifyTokens(verify_request)),
+            )
+            for name, proxy, call in cases:
+                sent, received, latency, cpu = measure(call, proxy, args.calls)
+                print(f"{name:<20}{algorithm:<10}{sent:>10.0f}{received:>10.0f}{latency:>10.2f}{cpu:>10.2f}")
+    finally:
+        services.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
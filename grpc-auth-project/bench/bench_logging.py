@@ -0,0 +1,124 @@
+import argparse
+import logging
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+# Logging cost per RPC, before and after logutil.
+#
+# Replays the log calls one successful GetProfile makes across ProfileService
+# and AuthService (GetProfile -> VerifyToken) at INFO level, writing to a real
+# file. "before" is the old setup: f-strings, eager debug formatting and a
+# synchronous StreamHandler. "after" uses logutil: %-style arguments, the
+# queue handler and optional per-method sampling.
+#
+#   python bench/bench_logging.py --rpcs 50000 --threads 4
+#
+# "caller" is the time the RPC threads spend logging (what adds to latency);
+# "drain" is how long the listener thread needs afterwards to catch up.
+
+import harness
+
+RESPONSE = SimpleNamespace(is_valid=True, user_id="42", username="bench_user")
+
+
+def rpc_before():
+    logging.info("GetProfile request received.")
+    logging.debug(f"Token found, attempting verification via AuthService...")
+    logging.debug(f"Sending VerifyToken request to AuthService")
+    logging.info("VerifyToken request received.")
+    logging.info(f"Token verified successfully for user ID: {RESPONSE.user_id}")
+    logging.debug(
+        f"Received VerifyToken response: isValid={RESPONSE.is_valid}, userId={RESPONSE.user_id}"
+    )
+    logging.info(f"Token verified successfully for user ID: {RESPONSE.user_id}. Access granted.")
+
+
+def rpc_after(logutil):
+    log_ok = logutil.sample("GetProfile")
+    if log_ok:
+        logging.info("GetProfile request received.")
+    logging.debug("Token found, attempting verification via AuthService...")
+    logging.debug("Sending VerifyToken request to AuthService")
+    verify_log_ok = logutil.sample("VerifyToken")
+    if verify_log_ok:
+        logging.info("VerifyToken request received.")
+        logging.info("Token verified successfully for user ID: %s", RESPONSE.user_id)
+    logging.debug(
+        "Received VerifyToken response: isValid=%s, userId=%s",
+        RESPONSE.is_valid,
+        RESPONSE.user_id,
+    )
+    if log_ok:
+        logging.info("Token verified successfully for user ID: %s. Access granted.", RESPONSE.user_id)
+
+
+def run_threads(fn, rpcs: int, threads: int) -> float:
+    """Runs `rpcs` calls of fn split over `threads` threads; returns the elapsed seconds."""
+    per_thread = rpcs // threads
+
+    def worker():
+        for _ in range(per_thread):
+            fn()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def bench_before(rpcs: int, threads: int, output) -> dict:
+    root = logging.getLogger()
+    handler = logging.StreamHandler(output)
+    handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    try:
+        caller = run_threads(rpc_before, rpcs, threads)
+    finally:
+        root.removeHandler(handler)
+    return {"caller": caller, "drain": 0.0}
+
+
+def bench_after(rpcs: int, threads: int, output, sample_rates: str) -> dict:
+    from common import logutil
+
+    logutil.set_sample_rates(sample_rates)
+    logutil.setup_logging("bench", stream=output)
+    caller = run_threads(lambda: rpc_after(logutil), rpcs, threads)
+    start = time.perf_counter()
+    dropped = logutil.stats()["dropped"]
+    logutil.stop_logging()  # Blocks until every queued record is written
+    return {"caller": caller, "drain": time.perf_counter() - start, "dropped": dropped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure logging overhead per RPC.")
+    parser.add_argument("--rpcs", type=int, default=50000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--sample-rate", type=float, default=0.01, help="Rate for the sampled run")
+    args = parser.parse_args(argv)
+    harness.add_service_paths()
+
+    sampled = f"GetProfile={args.sample_rate},VerifyToken={args.sample_rate}"
+    scenarios = [
+        ("before (f-strings, sync handler)", lambda out: bench_before(args.rpcs, args.threads, out)),
+        ("after (queue, all logged)", lambda out: bench_after(args.rpcs, args.threads, out, "")),
+        (f"after (queue, sampled {args.sample_rate})", lambda out: bench_after(args.rpcs, args.threads, out, sampled)),
+    ]
+    print(f"rpcs={args.rpcs} threads={args.threads}\n")
+    print(f"{'scenario':<36}{'caller us/rpc':>15}{'drain s':>10}{'dropped':>9}")
+    for name, fn in scenarios:
+        with tempfile.TemporaryFile("w") as output:
+            result = fn(output)
+        per_rpc = result["caller"] / args.rpcs * 1e6
+        print(f"{name:<36}{per_rpc:>15.2f}{result['drain']:>10.2f}{result.get('dropped', 0):>9}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import argparse
+import logging
+import os
+import sys
+import time
+
+# Server-side cost of producing GetProfile's wire bytes, with and without the
+# serialized response cache.
+#
+# "build" is what a miss does once the profile row is known: construct the
+# GetProfileResponse and serialize it. "cached" is a hit: one cache lookup
+# returning the bytes the interceptor writes as is. The profile store is the
+# in-memory fake, so neither path includes database time.
+#
+#   python bench/bench_profile_response.py --users 1000 --calls 100000
+
+import harness
+
+
+def measure(fn, user_ids: list, calls: int) -> float:
+    """Returns the mean seconds per call of fn(user_id)."""
+    start = time.perf_counter()
+    for i in range(calls):
+        if not fn(user_ids[i % len(user_ids)]):
+            raise RuntimeError("Benchmark produced an empty response")
+    return (time.perf_counter() - start) / calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GetProfile response production.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    harness.add_service_paths()
+    import fake_profile_store
+
+    sys.modules["profile_store"] = fake_profile_store
+    os.environ.setdefault("METRICS_PORT", "0")
+    server = harness.load_module("profile_server", os.path.join(harness.PROFILE_DIR, "server.py"))
+    store = server.profile_store
+    user_ids = [str(i) for i in range(args.users)]
+    for user_id in user_ids:
+        store.set_profile(int(user_id), f"user{user_id}@example.com", f"User {user_id}")
+
+    # The serializer PreSerializedResponses installs for GetProfile
+    serialize = server.serialize_response(server.auth_pb2.GetProfileResponse.SerializeToString)
+
+    def build(user_id):
+        profiles = store.get_profiles(server.profile_keys([user_id]))
+        return serialize(server.build_profile_responses([user_id], profiles)[0])
+
+    def cached(user_id):
+        response = server.cached_profile_response(user_id)
+        if response is None:
+            profiles = store.get_profiles(server.profile_keys([user_id]))
+            response = server.build_profile_responses([user_id], profiles)[0]
+            server.remember_profile_response(user_id, response, store.generation())
+        return serialize(response)
+
+    print(f"users={args.users} calls={args.calls}\n")
+    print(f"{'path':<16}{'mean us':>10}")
+    for name, fn in (("build", build), ("cached", cached)):
+        print(f"{name:<16}{measure(fn, user_ids, args.calls) * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
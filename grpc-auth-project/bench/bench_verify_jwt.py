@@ -0,0 +1,60 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+from datetime import timedelta
+
+# Cost of utils.verify_jwt with and without the decoded-claims memo cache.
+#
+# Verifies tokens drawn from a pool of --tokens distinct tokens, as
+# VerifyToken sees them when clients repeat the same bearer token on every
+# call. With the memo, a repeat costs one SHA-256 digest and a dict lookup
+# instead of base64 + JSON decoding and the signature check.
+#
+#   python bench/bench_verify_jwt.py --tokens 1000 --verifications 50000
+#   JWT_ALGORITHM=RS256 python bench/bench_verify_jwt.py
+
+import harness
+
+
+def measure(utils, tokens: list, verifications: int, seed: int) -> float:
+    """Returns the mean seconds per verify_jwt call."""
+    rng = random.Random(seed)
+    picks = [rng.choice(tokens) for _ in range(verifications)]
+    start = time.perf_counter()
+    for token in picks:
+        if utils.verify_jwt(token) is None:
+            raise RuntimeError("Benchmark token failed verification")
+    return (time.perf_counter() - start) / verifications
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark JWT verification.")
+    parser.add_argument("--tokens", type=int, default=1000)
+    parser.add_argument("--verifications", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("JWT_SECRET", "bench-secret-0123456789abcdef0123456789")
+    logging.disable(logging.WARNING)  # Dev-key and default-secret warnings
+    harness.add_service_paths()
+    import utils
+
+    tokens = [
+        utils.create_jwt({"sub": str(i), "username": f"user{i}"}, timedelta(hours=1))
+        for i in range(args.tokens)
+    ]
+    print(f"tokens={args.tokens} verifications={args.verifications}\n")
+    print(f"{'path':<16}{'mean us':>10}{'hit rate':>10}")
+    for name, max_size in (("decode (before)", 0), ("memo", utils.JWT_CLAIMS_CACHE_MAX_SIZE)):
+        utils._claims.max_size = max_size
+        utils._claims.clear()
+        utils._claims.hits = utils._claims.misses = 0
+        mean = measure(utils, tokens, args.verifications, args.seed)
+        print(f"{name:<16}{mean * 1e6:>10.1f}{utils.claims_cache_stats()['hit_rate']:>10.2f}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
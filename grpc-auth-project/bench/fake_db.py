@@ -0,0 +1,127 @@
+import logging
+import sqlite3
+import threading
+from typing import NamedTuple
+
+# SQLite stand-in for auth-service/db.py, used by the benchmarks so they run
+# without PostgreSQL and give reproducible numbers. It mirrors the public
+# functions of db.py that the servicers call.
+
+class UserRecord(NamedTuple):
+    id: int
+    username: str
+    hashed_password: str
+
+
+MAX_USERNAME_LENGTH = 100
+
+_conn = None
+_lock = threading.Lock()  # One in-memory connection shared by all threads
+_stats = {"queries": 0}
+
+
+def init_db():
+    """Creates the users table in a fresh in-memory database."""
+    global _conn
+    with _lock:
+        _conn = sqlite3.connect(":memory:", check_same_thread=False)
+        _conn.execute(
+            """
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                hashed_password TEXT NOT NULL,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP
+            );
+            """
+        )
+        _conn.commit()
+    logging.info("Fake (SQLite) users table created.")
+
+
+def add_user(username: str, hashed_password: str) -> bool:
+    with _lock:
+        _stats["queries"] += 1
+        try:
+            _conn.execute(
+                "INSERT INTO users(username, hashed_password) VALUES(?, ?)",
+                (username, hashed_password),
+            )
+            _conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+
+def register_user(username: str, hashed_password: str) -> int | None:
+    with _lock:
+        _stats["queries"] += 1
+        row = _conn.execute(
+            "INSERT INTO users(username, hashed_password) VALUES(?, ?) "
+            "ON CONFLICT (username) DO NOTHING RETURNING id;",
+            (username, hashed_password),
+        ).fetchone()
+        _conn.commit()
+    return row[0] if row else None
+
+
+def bulk_register_users(rows: list[tuple[str, str]]) -> dict[str, int]:
+    return {
+        username: user_id
+        for username, hashed_password in rows
+        if (user_id := register_user(username, hashed_password)) is not None
+    }
+
+
+def peek_user(username: str) -> dict | None:
+    return None
+
+
+def get_user_by_username(username: str) -> dict | None:
+    with _lock:
+        _stats["queries"] += 1
+        row = _conn.execute(
+            "SELECT id, username, hashed_password FROM users WHERE username = ?;",
+            (username,),
+        ).fetchone()
+    if row is None:
+        return None
+    return UserRecord(*row)
+
+
+def invalidate_user(username: str):
+    pass
+
+
+def user_cache_stats() -> dict:
+    return {}
+
+
+def create_refresh_token(user_id: int, token_hash: bytes, expires_at: float):
+    pass
+
+
+def rotate_refresh_token(
+    token_hash: bytes, new_token_hash: bytes, new_expires_at: float
+) -> tuple[int, str] | None:
+    return None
+
+
+def revoke_token(jti: str, expires_at: float):
+    pass
+
+
+def load_revocations() -> list[tuple[str, float]]:
+    return []
+
+
+def start_revocation_listener(on_revoke):
+    pass
+
+
+def pool_stats() -> dict:
+    return dict(_stats)
+
+
+def close_pool():
+    pass
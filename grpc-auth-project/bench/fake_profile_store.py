@@ -0,0 +1,90 @@
+import logging
+import os
+from typing import NamedTuple
+
+# In-memory stand-in for profile-service/profile_store.py, used by the
+# benchmarks so ProfileService runs without PostgreSQL. It mirrors the public
+# functions the servicers call; every user has an empty profile unless one was
+# stored with set_profile.
+
+
+class Profile(NamedTuple):
+    user_id: int
+    email: str
+    full_name: str
+
+
+PROFILE_CACHE_MAX_SIZE = int(os.getenv("PROFILE_CACHE_MAX_SIZE", "10000"))  # Sizes the response cache
+PROFILE_CACHE_TTL = float(os.getenv("PROFILE_CACHE_TTL", "60"))
+MAX_FIELD_LENGTH = 255
+
+_rows = {}
+_stats = {"queries": 0}
+_listeners = []
+_generation = 0
+
+
+def init_db():
+    _rows.clear()
+    logging.info("Fake (in-memory) profiles table created.")
+
+
+def set_profile(user_id: int, email: str, full_name: str):
+    _rows[user_id] = Profile(user_id, email, full_name)
+    invalidate(user_id)
+
+
+def generation() -> int:
+    return _generation
+
+
+def cache_if_current(read_generation: int, store) -> bool:
+    if read_generation != _generation:
+        return False
+    store()
+    return True
+
+
+def add_invalidation_listener(listener):
+    _listeners.append(listener)
+
+
+def invalidate(user_id: int | None):
+    global _generation
+    for listener in _listeners:
+        listener(user_id)
+    _generation += 1
+
+
+def parse_user_id(user_id: str) -> int | None:
+    try:
+        key = int(user_id)
+    except ValueError:
+        return None
+    return key if -(2**31) <= key < 2**31 else None
+
+
+def get_profiles(user_ids: list[int]) -> dict[int, Profile]:
+    _stats["queries"] += 1
+    return {user_id: _rows.get(user_id) or Profile(user_id, "", "") for user_id in user_ids}
+
+
+def get_profile(user_id: int) -> Profile:
+    return get_profiles([user_id])[user_id]
+
+
+def update_profile(user_id: int, email: str, full_name: str) -> Profile:
+    set_profile(user_id, email, full_name)
+    return _rows[user_id]
+
+
+def pool_stats() -> dict:
+    return dict(_stats)
+
+
+def cache_stats() -> dict:
+    return {}
+
+
+def close_pool():
+    pass
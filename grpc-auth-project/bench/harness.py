@@ -0,0 +1,75 @@
+import importlib.util
+import os
+import socket
+import sys
+
+# Starts AuthService and ProfileService inside the benchmark process. Both
+# services have a top-level server.py, so they are loaded from their paths
+# under distinct module names.
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+AUTH_DIR = os.path.join(PROJECT_DIR, "auth-service")
+PROFILE_DIR = os.path.join(PROJECT_DIR, "profile-service")
+
+
+def add_service_paths():
+    """Makes the service modules, the shared `common` package and the generated code importable."""
+    for path in (PROJECT_DIR, AUTH_DIR, PROFILE_DIR, os.path.join(AUTH_DIR, "generated")):
+        if path not in sys.path:
+            sys.path.append(path)
+
+
+def free_port() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return str(sock.getsockname()[1])
+
+
+def load_module(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class LocalServices:
+    """AuthService + ProfileService running in this process on free ports."""
+
+    def __init__(self, use_fake_db: bool = True):
+        add_service_paths()
+        if use_fake_db:
+            import fake_db
+            import fake_profile_store
+
+            sys.modules["db"] = fake_db  # Must happen before server.py imports db
+            sys.modules["profile_store"] = fake_profile_store
+        self.auth = load_module("auth_server", os.path.join(AUTH_DIR, "server.py"))
+        self.auth_port = free_port()
+        self.profile_port = free_port()
+        self.auth_addr = f"127.0.0.1:{self.auth_port}"
+        self.profile_addr = f"127.0.0.1:{self.profile_port}"
+        # auth_client reads AUTH_SERVICE_URL at import time
+        os.environ["AUTH_SERVICE_URL"] = self.auth_addr
+        self.profile = load_module(
+            "profile_server", os.path.join(PROFILE_DIR, "server.py")
+        )
+        self._auth_server = None
+        self._profile_server = None
+
+    def start(self):
+        self.auth.db.init_db()
+        self.auth.utils.start_password_pool()
+        self._auth_server = self.auth.create_server(port=self.auth_port)
+        self._auth_server.start()
+        self.profile.profile_store.init_db()
+        self._profile_server = self.profile.create_server(port=self.profile_port)
+        self._profile_server.start()
+        return self
+
+    def stop(self):
+        if self._profile_server is not None:
+            self.profile.shutdown(self._profile_server, 0)
+        if self._auth_server is not None:
+            self.auth.shutdown(self._auth_server, 0)
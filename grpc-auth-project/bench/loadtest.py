@@ -0,0 +1,247 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+import grpc
+
+# Load generator for the Register/Login/VerifyToken/GetProfile flow.
+#
+# By default both services run inside this process against an SQLite fake of
+# db.py (bench/fake_db.py), so results are reproducible without Docker or
+# PostgreSQL. Pass --auth-addr/--profile-addr to drive running services.
+#
+#   python bench/loadtest.py --workload mixed --concurrency 16 --duration 10
+#   python bench/loadtest.py --workload profile-valid --set LOCAL_JWT_VERIFY=true
+#
+# CPU per request is this process's user+system time divided by completed
+# requests; in local mode that includes both servers and the client.
+
+import harness
+
+PASSWORD = "bench-password"
+
+WORKLOADS = {
+    "login": {"login": 1},
+    "verify": {"verify": 1},
+    "profile-valid": {"profile_valid": 1},
+    "profile-invalid": {"profile_invalid": 1},
+    "profile-missing": {"profile_missing": 1},
+    "mixed": {
+        "profile_valid": 70,
+        "verify": 15,
+        "login": 5,
+        "profile_invalid": 7,
+        "profile_missing": 3,
+    },
+}
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Client:
+    """The operations a benchmark worker can issue."""
+
+    def __init__(self, auth_addr: str, profile_addr: str, usernames: list, tokens: list):
+        from generated import auth_pb2, auth_pb2_grpc
+
+        self.pb = auth_pb2
+        self.auth = auth_pb2_grpc.AuthServiceStub(grpc.insecure_channel(auth_addr))
+        self.profile = auth_pb2_grpc.ProfileServiceStub(grpc.insecure_channel(profile_addr))
+        self.usernames = usernames
+        self.tokens = tokens
+        self.invalid_token = "this.is.an.invalid.token"
+
+    def login(self, rng):
+        username = rng.choice(self.usernames)
+        self.auth.Login(self.pb.LoginRequest(username=username, password=PASSWORD), timeout=30)
+
+    def verify(self, rng):
+        self.auth.VerifyToken(self.pb.VerifyTokenRequest(token=rng.choice(self.tokens)), timeout=30)
+
+    def _get_profile(self, token):
+        metadata = [("authorization", f"Bearer {token}")] if token else None
+        self.profile.GetProfile(self.pb.GetProfileRequest(), metadata=metadata, timeout=30)
+
+    def profile_valid(self, rng):
+        self._get_profile(rng.choice(self.tokens))
+
+    def profile_invalid(self, rng):
+        self._get_profile(self.invalid_token)
+
+    def profile_missing(self, rng):
+        self._get_profile(None)
+
+
+def seed(client: Client, services, num_users: int, num_tokens: int):
+    """Creates the benchmark users and logs some of them in to get tokens."""
+    if services is not None:
+        # Local mode: insert directly, sharing one bcrypt hash to keep setup fast
+        hashed = services.auth.utils.hash_password(PASSWORD)
+        for username in client.usernames:
+            services.auth.db.add_user(username, hashed)
+    else:
+        for username in client.usernames:
+            try:
+                client.auth.Register(
+                    client.pb.RegisterRequest(username=username, password=PASSWORD), timeout=30
+                )
+            except grpc.RpcError as e:
+                if e.code() != grpc.StatusCode.ALREADY_EXISTS:
+                    raise
+    for username in client.usernames[:num_tokens]:
+        response = client.auth.Login(
+            client.pb.LoginRequest(username=username, password=PASSWORD), timeout=30
+        )
+        client.tokens.append(response.token)
+
+
+def run(client: Client, mix: dict, concurrency: int, duration: float, warmup: float, seed_value: int):
+    """Runs the workload and returns per-operation latencies and status codes."""
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    latencies = defaultdict(list)
+    codes = defaultdict(Counter)
+    lock = threading.Lock()
+    start_at = time.monotonic() + warmup
+    stop_at = start_at + duration
+
+    def worker(index):
+        rng = random.Random(seed_value + index)
+        local_latencies = defaultdict(list)
+        local_codes = defaultdict(Counter)
+        while True:
+            now = time.monotonic()
+            if now >= stop_at:
+                break
+            op = rng.choices(ops, weights)[0]
+            code = "OK"
+            t0 = time.perf_counter()
+            try:
+                getattr(client, op)(rng)
+            except grpc.RpcError as e:
+                code = e.code().name
+            elapsed = time.perf_counter() - t0
+            if now >= start_at:
+                local_latencies[op].append(elapsed)
+                local_codes[op][code] += 1
+        with lock:
+            for op, values in local_latencies.items():
+                latencies[op].extend(values)
+            for op, counter in local_codes.items():
+                codes[op].update(counter)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    # Measure CPU only for the timed part of the run
+    time.sleep(max(0.0, start_at - time.monotonic()))
+    cpu_start = os.times()
+    for thread in threads:
+        thread.join()
+    cpu_end = os.times()
+    cpu_seconds = (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system)
+    return latencies, codes, cpu_seconds
+
+
+def summarize(latencies: dict, codes: dict, duration: float, cpu_seconds: float) -> dict:
+    def stats(values, counter):
+        values = sorted(values)
+        return {
+            "requests": len(values),
+            "rps": round(len(values) / duration, 1),
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "p999_ms": round(percentile(values, 99.9) * 1000, 3),
+            "codes": dict(counter),
+        }
+
+    report = {op: stats(latencies[op], codes[op]) for op in sorted(latencies)}
+    all_values = [v for values in latencies.values() for v in values]
+    all_codes = Counter()
+    for counter in codes.values():
+        all_codes.update(counter)
+    report["total"] = stats(all_values, all_codes)
+    total = report["total"]["requests"]
+    report["total"]["cpu_ms_per_request"] = round(cpu_seconds * 1000 / total, 4) if total else 0.0
+    return report
+
+
+def print_report(report: dict):
+    header = f"{'operation':<16}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'p999 ms':>10}  codes"
+    print(header)
+    print("-" * len(header))
+    for op, row in report.items():
+        codes = ", ".join(f"{code}={count}" for code, count in sorted(row["codes"].items()))
+        print(
+            f"{op:<16}{row['requests']:>10}{row['rps']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+            f"{row['p99_ms']:>10}{row['p999_ms']:>10}  {codes}"
+        )
+    print(f"\nCPU per request: {report['total']['cpu_ms_per_request']} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the auth/profile gRPC flow.")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before measuring")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=8, help="Distinct valid tokens to use")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--auth-addr", help="Use a running AuthService instead of an in-process one")
+    parser.add_argument("--profile-addr", help="Use a running ProfileService instead of an in-process one")
+    parser.add_argument(
+        "--set", action="append", default=[], metavar="KEY=VALUE",
+        help="Environment override applied before the services are loaded",
+    )
+    parser.add_argument("--log-level", default="ERROR")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    for assignment in args.set:
+        key, _, value = assignment.partition("=")
+        os.environ[key] = value
+
+    harness.add_service_paths()
+    services = None
+    if args.auth_addr and args.profile_addr:
+        auth_addr, profile_addr = args.auth_addr, args.profile_addr
+    else:
+        services = harness.LocalServices().start()
+        auth_addr, profile_addr = services.auth_addr, services.profile_addr
+    # The services configure logging on import; apply the requested level after
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    usernames = [f"bench_user_{i}" for i in range(args.users)]
+    client = Client(auth_addr, profile_addr, usernames, tokens=[])
+    try:
+        seed(client, services, args.users, min(args.tokens, args.users))
+        latencies, codes, cpu_seconds = run(
+            client, WORKLOADS[args.workload], args.concurrency, args.duration, args.warmup, args.seed
+        )
+    finally:
+        if services is not None:
+            services.stop()
+
+    report = summarize(latencies, codes, args.duration, cpu_seconds)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"workload={args.workload} concurrency={args.concurrency} duration={args.duration}s\n")
+        print_report(report)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,8 @@ sys.path.append("./profile_service")  # Adjust if your structure differs
 from generated import auth_pb2
 from generated import auth_pb2_grpc
 
+from common import grpc_options  # Same GRPC_* channel settings as the services
+
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
@@ -32,7 +34,7 @@ def run_register(stub):
         )
         response = stub.Register(request, timeout=10)
         if response.success:
-            logging.info(f"Register successful: {response.message}")
+            logging.info(f"Register successful: {response.message} (user ID {response.user_id})")
         else:
             logging.warning(f"Register failed: {response.message}")
         return response.success
@@ -42,7 +44,7 @@ def run_register(stub):
 
 
 def run_login(stub):
-    """Calls the Login RPC and returns the token."""
+    """Calls the Login RPC and returns the access and refresh tokens."""
     logging.info(f"--- Calling Login for user: {TEST_USERNAME} ---")
     try:
         request = auth_pb2.LoginRequest(username=TEST_USERNAME, password=TEST_PASSWORD)
@@ -51,12 +53,25 @@ def run_login(stub):
             logging.info(
                 f"Login successful. Token received: {response.token[:15]}..."
             )  # Log truncated token
-            return response.token
+            return response.token, response.refresh_token
         else:
             logging.warning(f"Login failed: {response.message}")
-            return None
+            return None, None
     except grpc.RpcError as e:
         logging.error(f"Login RPC failed: {e.code()} - {e.details()}")
+        return None, None
+
+
+def run_refresh(stub, refresh_token):
+    """Calls the RefreshToken RPC and returns the new access token."""
+    logging.info("--- Calling RefreshToken ---")
+    try:
+        request = auth_pb2.RefreshTokenRequest(refresh_token=refresh_token)
+        response = stub.RefreshToken(request, timeout=10)
+        logging.info(f"Refresh successful. Token received: {response.token[:15]}...")
+        return response.token
+    except grpc.RpcError as e:
+        logging.error(f"RefreshToken RPC failed: {e.code()} - {e.details()}")
         return None
 
 
@@ -98,7 +113,11 @@ def main():
 
     # --- Connect to AuthService ---
     try:
-        with grpc.insecure_channel(AUTH_SERVICE_ADDR) as channel:
+        with grpc.insecure_channel(
+            AUTH_SERVICE_ADDR,
+            options=grpc_options.channel_options(),
+            compression=grpc_options.channel_compression(),
+        ) as channel:
             logging.info(f"Connecting to AuthService at {AUTH_SERVICE_ADDR}")
             auth_stub = auth_pb2_grpc.AuthServiceStub(channel)
 
@@ -106,7 +125,11 @@ def main():
             run_register(auth_stub)
 
             # 2. Login User
-            jwt_token = run_login(auth_stub)
+            jwt_token, refresh_token = run_login(auth_stub)
+
+            # 3. Renew the access token without the password (as when it expires)
+            if refresh_token:
+                jwt_token = run_refresh(auth_stub, refresh_token) or jwt_token
 
     except Exception as e:
         logging.error(f"Failed to connect or interact with AuthService: {e}")
@@ -115,22 +138,26 @@ def main():
     # --- Connect to ProfileService ---
     if jwt_token:
         try:
-            with grpc.insecure_channel(PROFILE_SERVICE_ADDR) as channel:
+            with grpc.insecure_channel(
+                PROFILE_SERVICE_ADDR,
+                options=grpc_options.channel_options(),
+                compression=grpc_options.channel_compression(),
+            ) as channel:
                 logging.info(
                     f"\nConnecting to ProfileService at {PROFILE_SERVICE_ADDR}"
                 )
                 profile_stub = auth_pb2_grpc.ProfileServiceStub(channel)
 
-                # 3. Call GetProfile with the token
+                # 4. Call GetProfile with the token
                 run_get_profile(profile_stub, jwt_token)
 
-                # 4. Call GetProfile without token (expect failure)
+                # 5. Call GetProfile without token (expect failure)
                 logging.info(
                     "\n--- Calling GetProfile WITHOUT token (expect UNAUTHENTICATED) ---"
                 )
                 run_get_profile(profile_stub, None)
 
-                # 5. Call GetProfile with invalid token (expect failure)
+                # 6. Call GetProfile with invalid token (expect failure)
                 logging.info(
                     "\n--- Calling GetProfile WITH INVALID token (expect UNAUTHENTICATED) ---"
                 )
@@ -0,0 +1,5 @@
+# Modules shared by AuthService and ProfileService (caching, metrics, logging,
+# admission control, channel options, connection pooling, revocations, JWT
+# settings). Both services import them as `common.<module>`, so the project
+# directory must be on the path: `PYTHONPATH=..` when running a service from
+# its own directory, or the image layout set up by the Dockerfiles.
@@ -0,0 +1,290 @@
+import grpc
+import asyncio
+import math
+import os
+import threading
+import time
+
+from common import grpc_options
+
+# Adaptive admission control for unary RPCs.
+#
+# The servers admit a call only while fewer than `limit` calls are in flight;
+# the rest fail fast with RESOURCE_EXHAUSTED and a retry pushback trailer
+# instead of queueing inside grpcio. The limit follows observed latency:
+#
+#   gradient  Latency is compared with each method's long-term average. While
+#             it stays near the average the limit grows by about sqrt(limit)
+#             per sample; as queueing inflates it the limit shrinks by up to
+#             half (Netflix's Gradient2).
+#   aimd      The limit grows by one per sample while busy and is cut by 10%
+#             when a call is slower than ADMISSION_LATENCY_TIMEOUT_MS or fails
+#             with an overload status (a dependency out of capacity).
+#
+# Each method has a priority; lower priorities may only use part of the limit,
+# so they are shed first (e.g. Register before VerifyToken). Streaming RPCs are
+# long-lived and are not limited here (see GRPC_MAX_STREAMS).
+#
+# In the threaded server the interceptor runs when a call arrives, before it
+# waits for a worker thread, so queueing time is counted in the latency.
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "true").lower() in ("1", "true", "yes")
+ADMISSION_LIMITER = os.getenv("ADMISSION_LIMITER", "gradient")  # gradient or aimd
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "0"))  # 0: the server's default
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "0"))  # 0: the server's default
+ADMISSION_LATENCY_TIMEOUT_MS = float(os.getenv("ADMISSION_LATENCY_TIMEOUT_MS", "1000"))  # aimd only
+ADMISSION_RETRY_AFTER_MS = int(os.getenv("ADMISSION_RETRY_AFTER_MS", "100"))
+ADMISSION_PRIORITIES = os.getenv("ADMISSION_PRIORITIES", "")  # e.g. "auth.AuthService/Login=high"
+
+# Share of the limit each priority may fill: at least a quarter is always
+# left for high priority calls, and half for high and normal ones.
+PRIORITY_SHARES = {"high": 1.0, "normal": 0.75, "low": 0.5}
+# Trailer read by gRPC clients' retry policies (milliseconds to wait)
+RETRY_PUSHBACK_KEY = "grpc-retry-pushback-ms"
+# Statuses meaning a dependency is out of capacity. DEADLINE_EXCEEDED is left
+# out: deadlines are chosen by clients, and slow calls show up in latency.
+OVERLOAD_CODES = (grpc.StatusCode.RESOURCE_EXHAUSTED, grpc.StatusCode.UNAVAILABLE)
+
+
+class GradientLimit:
+    """Concurrency limit from the ratio of typical to current latency."""
+
+    def __init__(self, initial: float, min_limit: int, max_limit: int,
+                 tolerance: float = 1.5, smoothing: float = 0.2, long_window: int = 600):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance  # Latency may grow this much before the limit shrinks
+        self.smoothing = smoothing
+        self.long_window = long_window
+        self._baseline = {}  # method -> long-term average latency
+
+    def update(self, method: str, latency: float, in_flight: int, overloaded: bool) -> float:
+        baseline = self._baseline.get(method)
+        if baseline is None:
+            self._baseline[method] = latency
+            return self.limit
+        baseline += (latency - baseline) / self.long_window
+        if baseline > 2 * latency:  # Recover quickly once a slow period ends
+            baseline *= 0.95
+        self._baseline[method] = baseline
+        if overloaded:
+            gradient = 0.5
+        elif in_flight < self.limit / 2:
+            return self.limit  # Not busy enough for latency to say anything about the limit
+        else:
+            gradient = max(0.5, min(1.0, self.tolerance * baseline / latency))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = self.limit * (1 - self.smoothing) + target * self.smoothing
+        self.limit = max(self.min_limit, min(self.max_limit, limit))
+        return self.limit
+
+
+class AIMDLimit:
+    """Additive-increase, multiplicative-decrease concurrency limit."""
+
+    def __init__(self, initial: float, min_limit: int, max_limit: int,
+                 timeout: float = ADMISSION_LATENCY_TIMEOUT_MS / 1000, backoff: float = 0.9):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.timeout = timeout
+        self.backoff = backoff
+
+    def update(self, method: str, latency: float, in_flight: int, overloaded: bool) -> float:
+        if overloaded or latency > self.timeout:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+        elif in_flight * 2 >= self.limit:
+            self.limit = min(self.max_limit, self.limit + 1)
+        return self.limit
+
+
+LIMITERS = {"gradient": GradientLimit, "aimd": AIMDLimit}
+
+
+class Permit:
+    """One admitted call. Released when the call completes, or when it is
+    garbage collected if grpcio dropped the call before a worker ran it."""
+
+    __slots__ = ("controller", "method", "started", "released")
+
+    def __init__(self, controller, method: str):
+        self.controller = controller
+        self.method = method
+        self.started = time.perf_counter()
+        self.released = False
+
+    def release(self, overloaded: bool | None):
+        """`overloaded` is None when the call's latency should not be sampled."""
+        if not self.released:
+            self.released = True
+            self.controller._release(self, overloaded)
+
+    def __del__(self):
+        self.release(None)
+
+
+class AdmissionController:
+    """Tracks in-flight calls against an adaptive limit, by method priority."""
+
+    def __init__(self, limiter, priorities: dict):
+        self.limiter = limiter
+        self.priorities = priorities  # "/package.Service/Method" -> priority
+        self.in_flight = 0
+        self._lock = threading.RLock()  # Permit.__del__ may run during a garbage collection under it
+        self.admitted = dict.fromkeys(PRIORITY_SHARES, 0)
+        self.rejected = dict.fromkeys(PRIORITY_SHARES, 0)
+
+    def try_acquire(self, method: str) -> Permit | None:
+        priority = self.priorities.get(method, "normal")
+        with self._lock:
+            if self.in_flight >= self.limiter.limit * PRIORITY_SHARES[priority]:
+                self.rejected[priority] += 1
+                return None
+            self.in_flight += 1
+            self.admitted[priority] += 1
+        return Permit(self, method)
+
+    def _release(self, permit: Permit, overloaded: bool | None):
+        latency = time.perf_counter() - permit.started
+        with self._lock:
+            if overloaded is not None:
+                self.limiter.update(permit.method, latency, self.in_flight, overloaded)
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"limit": round(self.limiter.limit, 1), "in_flight": self.in_flight}
+            for priority in PRIORITY_SHARES:
+                stats[f"admitted_{priority}"] = self.admitted[priority]
+                stats[f"rejected_{priority}"] = self.rejected[priority]
+            return stats
+
+
+def _priority(value: str) -> str:
+    value = value.strip().lower()
+    if value not in PRIORITY_SHARES:
+        raise ValueError(f"Unknown admission priority '{value}' (use high, normal or low)")
+    return value
+
+
+_controller = None
+
+
+def create_controller(
+    default_priorities: dict, initial_limit: int, max_limit: int, min_limit: int = 4
+) -> AdmissionController | None:
+    """Builds the server's controller from the ADMISSION_* settings; None if admission control is off.
+
+    `default_priorities` maps "package.Service/Method" to a priority; methods
+    not listed there or in ADMISSION_PRIORITIES are "normal". A threaded
+    server passes its worker count as `min_limit`: fewer calls in flight would
+    leave threads idle without shortening any queue.
+    """
+    global _controller
+    if not ADMISSION_CONTROL:
+        return None
+    priorities = grpc_options.parse_method_settings(
+        ",".join(f"{method}={priority}" for method, priority in default_priorities.items()), _priority
+    )
+    priorities.update(grpc_options.parse_method_settings(ADMISSION_PRIORITIES, _priority))
+    limiter = LIMITERS[ADMISSION_LIMITER](
+        ADMISSION_INITIAL_LIMIT or initial_limit, ADMISSION_MIN_LIMIT or min_limit, max_limit
+    )
+    _controller = AdmissionController(limiter, priorities)
+    return _controller
+
+
+def stats() -> dict:
+    """Returns the limit, in-flight calls and admissions/rejections by priority (empty when off)."""
+    controller = _controller
+    return controller.stats() if controller is not None else {}
+
+
+def _status_overloaded(context) -> bool:
+    try:
+        return context.code() in OVERLOAD_CODES
+    except Exception:
+        return False
+
+
+REJECTED_DETAILS = "Server overloaded; retry later."
+
+
+def _reject(request, context):
+    context.set_trailing_metadata(((RETRY_PUSHBACK_KEY, str(ADMISSION_RETRY_AFTER_MS)),))
+    context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, REJECTED_DETAILS)
+
+
+async def _reject_async(request, context):
+    context.set_trailing_metadata(((RETRY_PUSHBACK_KEY, str(ADMISSION_RETRY_AFTER_MS)),))
+    await context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, REJECTED_DETAILS)
+
+
+def _admitted(behavior, permit: Permit):
+    def wrapper(request, context):
+        try:
+            response = behavior(request, context)
+        except Exception:
+            permit.release(_status_overloaded(context))
+            raise
+        permit.release(_status_overloaded(context))
+        return response
+
+    return wrapper
+
+
+def _admitted_async(behavior, permit: Permit):
+    async def wrapper(request, context):
+        try:
+            response = await behavior(request, context)
+        except asyncio.CancelledError:
+            permit.release(None)  # The client gave up; its latency says nothing about load
+            raise
+        except Exception:
+            permit.release(_status_overloaded(context))
+            raise
+        permit.release(_status_overloaded(context))
+        return response
+
+    return wrapper
+
+
+class AdmissionInterceptor(grpc.ServerInterceptor):
+    """Admits or sheds unary calls according to an AdmissionController."""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None or handler.unary_unary is None:
+            return handler
+        permit = self.controller.try_acquire(handler_call_details.method)
+        if permit is None:
+            return handler._replace(unary_unary=_reject)
+        return handler._replace(unary_unary=_admitted(handler.unary_unary, permit))
+
+
+class AsyncAdmissionInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio version of AdmissionInterceptor."""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None or handler.unary_unary is None:
+            return handler
+        permit = self.controller.try_acquire(handler_call_details.method)
+        if permit is None:
+            return handler._replace(unary_unary=_reject_async)
+        return handler._replace(unary_unary=_admitted_async(handler.unary_unary, permit))
+
+
+def interceptors(controller: AdmissionController | None, is_async: bool = False) -> list:
+    if controller is None:
+        return []
+    if is_async:
+        return [AsyncAdmissionInterceptor(controller)]
+    return [AdmissionInterceptor(controller)]
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """A thread-safe, size-bounded LRU cache whose entries carry their own TTL.
+
+    Expired entries are dropped lazily when they are looked up; the size bound
+    evicts the least recently used entry first. If `size_fn(key, value)` is
+    given, the approximate memory held by the entries is tracked in `bytes`.
+    """
+
+    def __init__(self, max_size: int, size_fn=None):
+        self.max_size = max_size
+        self.size_fn = size_fn
+        self._data = OrderedDict()  # key -> (value, expires_at on the monotonic clock, bytes)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0  # Dropped to respect max_size
+        self.expirations = 0  # Dropped because their TTL passed
+
+    def get(self, key, default=None):
+        """Returns the cached value, or `default` if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, nbytes = entry
+            if expires_at <= now:
+                del self._data[key]
+                self.bytes -= nbytes
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl: float):
+        """Caches `value` for `ttl` seconds. Non-positive TTLs are not cached."""
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + ttl
+        nbytes = self.size_fn(key, value) if self.size_fn else 0
+        with self._lock:
+            previous = self._data.get(key)
+            if previous is not None:
+                self.bytes -= previous[2]
+            self._data[key] = (value, expires_at, nbytes)
+            self.bytes += nbytes
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                _, (_, _, evicted_bytes) = self._data.popitem(last=False)
+                self.bytes -= evicted_bytes
+                self.evictions += 1
+
+    def delete(self, key):
+        """Removes `key` if present."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is not None:
+                self.bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Returns size and hit/miss/eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+            if self.size_fn:
+                stats["bytes"] = self.bytes
+            return stats
@@ -0,0 +1,217 @@
+import grpc
+import json
+import os
+
+# gRPC transport settings shared by the servers and client channels of both
+# services, taken from the environment.
+#
+# Compression: GRPC_COMPRESSION is the default for server responses and
+# GRPC_CHANNEL_COMPRESSION for requests sent on client channels (none, gzip or
+# deflate). GRPC_METHOD_COMPRESSION overrides the server default per method,
+# e.g. "auth.ProfileService/BatchGetProfiles=gzip,auth.AuthService/Login=none":
+# large, repetitive payloads compress well, while small messages only pay the
+# CPU. Peers that do not accept an algorithm get the response uncompressed.
+#
+# Message sizes: GRPC_MAX_RECEIVE_MESSAGE_LENGTH and
+# GRPC_MAX_SEND_MESSAGE_LENGTH apply to every call of a server or channel.
+# GRPC_METHOD_MAX_MESSAGE_BYTES sets per-method limits on client channels
+# (through the service config), e.g. "auth.ProfileService/BatchGetProfiles=16777216".
+#
+# Flow control: settings left at 0 keep gRPC's own defaults.
+
+GRPC_COMPRESSION = os.getenv("GRPC_COMPRESSION", "none")
+GRPC_CHANNEL_COMPRESSION = os.getenv("GRPC_CHANNEL_COMPRESSION", "none")
+GRPC_METHOD_COMPRESSION = os.getenv("GRPC_METHOD_COMPRESSION", "")
+
+MAX_RECEIVE_MESSAGE_LENGTH = int(os.getenv("GRPC_MAX_RECEIVE_MESSAGE_LENGTH", str(4 * 1024 * 1024)))  # Bytes
+MAX_SEND_MESSAGE_LENGTH = int(os.getenv("GRPC_MAX_SEND_MESSAGE_LENGTH", "-1"))  # Bytes; -1 is unlimited
+GRPC_METHOD_MAX_MESSAGE_BYTES = os.getenv("GRPC_METHOD_MAX_MESSAGE_BYTES", "")
+
+# HTTP/2 flow control. BDP probing grows the windows to the measured
+# bandwidth-delay product; LOOKAHEAD_BYTES fixes the initial stream window.
+HTTP2_BDP_PROBE = os.getenv("GRPC_HTTP2_BDP_PROBE", "true").lower() in ("1", "true", "yes")
+HTTP2_LOOKAHEAD_BYTES = int(os.getenv("GRPC_HTTP2_LOOKAHEAD_BYTES", "0"))  # 0 keeps the default
+HTTP2_MAX_FRAME_SIZE = int(os.getenv("GRPC_HTTP2_MAX_FRAME_SIZE", "0"))  # 0 keeps the default (16 KiB)
+HTTP2_WRITE_BUFFER_SIZE = int(os.getenv("GRPC_HTTP2_WRITE_BUFFER_SIZE", "0"))  # 0 keeps the default
+
+# Client channels ping idle connections so a dead peer is noticed before a
+# request is sent to it; servers accept those pings instead of answering
+# them with GOAWAY, and may ping their own clients (long-lived streams).
+KEEPALIVE_TIME_MS = int(os.getenv("GRPC_KEEPALIVE_TIME_MS", "30000"))
+KEEPALIVE_TIMEOUT_MS = int(os.getenv("GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+SERVER_KEEPALIVE_TIME_MS = int(os.getenv("GRPC_SERVER_KEEPALIVE_TIME_MS", "7200000"))
+MIN_PING_INTERVAL_MS = int(os.getenv("GRPC_MIN_PING_INTERVAL_MS", "10000"))  # Pings closer together are refused
+MAX_CONNECTION_IDLE_MS = int(os.getenv("GRPC_MAX_CONNECTION_IDLE_MS", "0"))  # 0: idle connections stay open
+MAX_CONNECTION_AGE_MS = int(os.getenv("GRPC_MAX_CONNECTION_AGE_MS", "0"))  # 0: no limit (set it to rebalance clients)
+
+COMPRESSION = {
+    "none": grpc.Compression.NoCompression,
+    "gzip": grpc.Compression.Gzip,
+    "deflate": grpc.Compression.Deflate,
+}
+
+
+def compression(name: str) -> grpc.Compression:
+    try:
+        return COMPRESSION[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unknown gRPC compression '{name}' (use none, gzip or deflate)") from None
+
+
+def parse_method_settings(spec: str, parse) -> dict:
+    """Parses "service/method=value,..." into {"/service/method": parse(value)}."""
+    settings = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        method, _, value = item.partition("=")
+        settings["/" + method.strip().lstrip("/")] = parse(value)
+    return settings
+
+
+METHOD_COMPRESSION = parse_method_settings(GRPC_METHOD_COMPRESSION, compression)
+METHOD_MAX_MESSAGE_BYTES = parse_method_settings(GRPC_METHOD_MAX_MESSAGE_BYTES, int)
+
+
+def _transport_options() -> dict:
+    options = {
+        "grpc.max_receive_message_length": MAX_RECEIVE_MESSAGE_LENGTH,
+        "grpc.max_send_message_length": MAX_SEND_MESSAGE_LENGTH,
+        "grpc.http2.bdp_probe": int(HTTP2_BDP_PROBE),
+    }
+    for name, value in (
+        ("grpc.http2.lookahead_bytes", HTTP2_LOOKAHEAD_BYTES),
+        ("grpc.http2.max_frame_size", HTTP2_MAX_FRAME_SIZE),
+        ("grpc.http2.write_buffer_size", HTTP2_WRITE_BUFFER_SIZE),
+    ):
+        if value:
+            options[name] = value
+    return options
+
+
+def server_options(extra: dict | None = None) -> list:
+    """Channel arguments for grpc.server / grpc.aio.server."""
+    options = _transport_options()
+    options.update({
+        "grpc.keepalive_time_ms": SERVER_KEEPALIVE_TIME_MS,
+        "grpc.keepalive_timeout_ms": KEEPALIVE_TIMEOUT_MS,
+        "grpc.keepalive_permit_without_calls": 1,
+        "grpc.http2.min_ping_interval_without_data_ms": MIN_PING_INTERVAL_MS,
+        "grpc.http2.max_ping_strikes": 0,
+    })
+    if MAX_CONNECTION_IDLE_MS:
+        options["grpc.max_connection_idle_ms"] = MAX_CONNECTION_IDLE_MS
+    if MAX_CONNECTION_AGE_MS:
+        options["grpc.max_connection_age_ms"] = MAX_CONNECTION_AGE_MS
+    options.update(extra or {})
+    return list(options.items())
+
+
+def _service_config() -> str | None:
+    if not METHOD_MAX_MESSAGE_BYTES:
+        return None
+    method_config = []
+    for method, max_bytes in METHOD_MAX_MESSAGE_BYTES.items():
+        service, _, name = method.lstrip("/").partition("/")
+        method_config.append({
+            "name": [{"service": service, "method": name}],
+            "maxRequestMessageBytes": max_bytes,
+            "maxResponseMessageBytes": max_bytes,
+        })
+    return json.dumps({"methodConfig": method_config})
+
+
+def channel_options(extra: dict | None = None) -> list:
+    """Channel arguments for client channels (grpc.insecure_channel and its aio twin)."""
+    options = _transport_options()
+    options.update({
+        "grpc.keepalive_time_ms": KEEPALIVE_TIME_MS,
+        "grpc.keepalive_timeout_ms": KEEPALIVE_TIMEOUT_MS,
+        "grpc.keepalive_permit_without_calls": 1,
+        "grpc.http2.max_pings_without_data": 0,
+    })
+    service_config = _service_config()
+    if service_config:
+        options["grpc.service_config"] = service_config
+    options.update(extra or {})
+    return list(options.items())
+
+
+def server_compression() -> grpc.Compression:
+    """Default compression of server responses."""
+    return compression(GRPC_COMPRESSION)
+
+
+def channel_compression() -> grpc.Compression:
+    """Default compression of requests sent on client channels."""
+    return compression(GRPC_CHANNEL_COMPRESSION)
+
+
+def _compressed(behavior, algorithm: grpc.Compression):
+    def wrapper(request, context):
+        context.set_compression(algorithm)
+        return behavior(request, context)
+
+    return wrapper
+
+
+def _compressed_async(behavior, algorithm: grpc.Compression, stream_response: bool):
+    if stream_response:
+        async def stream_wrapper(request, context):
+            context.set_compression(algorithm)
+            async for response in behavior(request, context):
+                yield response
+
+        return stream_wrapper
+
+    async def wrapper(request, context):
+        context.set_compression(algorithm)
+        return await behavior(request, context)
+
+    return wrapper
+
+
+BEHAVIORS = ("unary_unary", "unary_stream", "stream_unary", "stream_stream")
+
+
+def with_compression(handler, algorithm: grpc.Compression, is_async: bool = False):
+    """Returns `handler` with its responses compressed with `algorithm`."""
+    for kind in BEHAVIORS:
+        behavior = getattr(handler, kind)
+        if behavior is not None:
+            if is_async:
+                behavior = _compressed_async(behavior, algorithm, kind.endswith("_stream"))
+            else:
+                behavior = _compressed(behavior, algorithm)
+            return handler._replace(**{kind: behavior})
+    return handler
+
+
+class MethodCompressionInterceptor(grpc.ServerInterceptor):
+    """Applies GRPC_METHOD_COMPRESSION to the matching methods."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        algorithm = METHOD_COMPRESSION.get(handler_call_details.method)
+        if handler is None or algorithm is None:
+            return handler
+        return with_compression(handler, algorithm)
+
+
+class AsyncMethodCompressionInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio version of MethodCompressionInterceptor."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        algorithm = METHOD_COMPRESSION.get(handler_call_details.method)
+        if handler is None or algorithm is None:
+            return handler
+        return with_compression(handler, algorithm, is_async=True)
+
+
+def server_interceptors(is_async: bool = False) -> list:
+    """The interceptors these settings need (none unless per-method compression is configured)."""
+    if not METHOD_COMPRESSION:
+        return []
+    if is_async:
+        return [AsyncMethodCompressionInterceptor()]
+    return [MethodCompressionInterceptor()]
+
@@ -0,0 +1,31 @@
+import os
+from datetime import datetime, timezone
+
+# JWT settings both services must agree on: AuthService signs and verifies
+# with them, ProfileService uses them for local verification (LOCAL_JWT_VERIFY).
+
+DEFAULT_JWT_SECRET = "default-secret-for-dev"  # Local development only
+JWT_SECRET = os.getenv("JWT_SECRET", DEFAULT_JWT_SECRET)
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")  # HS256 (shared JWT_SECRET), RS256 or EdDSA
+ASYMMETRIC_ALGORITHMS = ("RS256", "EdDSA")
+
+
+def parse_time(value: str) -> float:
+    """Unix time from seconds or an ISO 8601 date/time (UTC unless it has an offset); 0 if empty."""
+    value = value.strip()
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+# With RS256/EdDSA signing, HS256 tokens (no 'kid', signed with JWT_SECRET) are
+# refused: anyone holding the shared secret could mint them. While switching
+# over, JWT_LEGACY_HS256_UNTIL keeps accepting those that expire by that time,
+# until that time.
+JWT_LEGACY_HS256_UNTIL = parse_time(os.getenv("JWT_LEGACY_HS256_UNTIL", ""))  # Unset: never
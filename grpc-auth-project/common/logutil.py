@@ -0,0 +1,153 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+# Logging setup shared by the service entry points.
+#
+# RPC threads only put records on a queue; a single listener thread formats
+# them and writes to stderr, so slow log I/O never blocks a request. Messages
+# use %-style arguments, which are only rendered (on the listener thread) for
+# records that pass the level check. Success-path INFO logs of hot methods can
+# be sampled per method with LOG_SAMPLE_RATES.
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()  # "text" or "json"
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # Records dropped beyond this; 0 = unbounded
+# Fraction of successful RPCs to log per method, e.g. "VerifyToken=0.01,GetProfile=0.1".
+# "*" sets the default for unlisted methods. Warnings and errors are never sampled.
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener = None
+_handler = None
+_sample_every = {}
+_default_every = 1
+_counters = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats each record as one JSON object per line."""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and never blocks."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # The stock prepare() renders the message here, on the RPC thread.
+        # Log arguments are immutable values (strings, ids, exceptions), so
+        # rendering them later on the listener thread gives the same text.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def set_sample_rates(spec: str):
+    """Parses a LOG_SAMPLE_RATES string ("Method=rate,...") into per-method intervals."""
+    global _default_every
+    _sample_every.clear()
+    _counters.clear()
+    _default_every = 1
+    for item in spec.split(","):
+        method, _, rate = item.strip().partition("=")
+        if not method or not rate:
+            continue
+        rate = float(rate)
+        # Log one request in every `every`; 0 disables success logs for the method
+        every = 0 if rate <= 0 else max(1, round(1 / rate))
+        if method == "*":
+            _default_every = every
+        else:
+            _sample_every[method] = every
+
+
+def sample(method: str) -> bool:
+    """Returns True if this request's success-path INFO logs should be written.
+
+    Call once per RPC and reuse the result, so a request is logged completely
+    or not at all.
+    """
+    if not logging.root.isEnabledFor(logging.INFO):
+        return False
+    every = _sample_every.get(method, _default_every)
+    if every == 1:
+        return True
+    if every == 0:
+        return False
+    counter = _counters.get(method)
+    if counter is None:
+        counter = _counters.setdefault(method, itertools.count())
+    return next(counter) % every == 0
+
+
+def setup_logging(service: str, stream=None):
+    """Routes the root logger through a queue to a listener thread writing to `stream`."""
+    global _listener, _handler
+    if _listener is not None:
+        return
+    output = logging.StreamHandler(stream)
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter(service))
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    _handler = _DeferredQueueHandler(log_queue)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:  # e.g. the default one added by an early logging call
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(log_queue, output)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    logging.getLogger().removeHandler(_handler)
+    _listener = None
+
+
+def stats() -> dict:
+    """Queue depth and records dropped because the queue was full."""
+    if _handler is None:
+        return {}
+    return {"queued": _handler.queue.qsize(), "dropped": _handler.dropped}
+
+
+set_sample_rates(LOG_SAMPLE_RATES)
@@ -0,0 +1,442 @@
+import grpc
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus-style metrics for the gRPC servers, without extra dependencies.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def collect(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, labels: tuple, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> list:
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in self._values.items()]
+        lines = self.header()
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class StatsCollector:
+    """Exposes a `stats()`-style dict of numbers as one gauge labelled by key."""
+
+    def __init__(self, name: str, documentation: str, stats_fn):
+        self.name = name
+        self.documentation = documentation
+        self.stats_fn = stats_fn
+
+    def collect(self) -> list:
+        try:
+            stats = self.stats_fn()
+        except Exception as e:
+            logging.debug("Metrics collector %s failed: %s", self.name, e)
+            return []
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for key, value in _flatten(stats):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                lines.append(f'{self.name}{{stat="{key}"}} {value}')
+        return lines
+
+
+def _flatten(stats: dict, prefix: str = ""):
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}_")
+        else:
+            yield f"{prefix}{key}", value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def register_stats(self, name: str, documentation: str, stats_fn):
+        """Publishes a stats() function (e.g. db.pool_stats) as gauges."""
+        return self.register(StatsCollector(name, documentation, stats_fn))
+
+    def exposition(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RPC_LABELS = ("method",)
+rpc_started = REGISTRY.register(Counter("grpc_server_started_total", "RPCs started.", RPC_LABELS))
+rpc_handled = REGISTRY.register(
+    Counter("grpc_server_handled_total", "RPCs completed, by status code.", ("method", "code"))
+)
+rpc_in_flight = REGISTRY.register(Gauge("grpc_server_in_flight", "RPCs currently being handled.", RPC_LABELS))
+rpc_latency = REGISTRY.register(
+    Histogram("grpc_server_handling_seconds", "Handler time, from start of handler to completion.", RPC_LABELS)
+)
+rpc_queue_time = REGISTRY.register(
+    Histogram("grpc_server_queue_seconds", "Time between the call arriving and a worker thread picking it up.", RPC_LABELS)
+)
+rpc_request_bytes = REGISTRY.register(
+    Histogram("grpc_server_request_bytes", "Serialized request message sizes.", RPC_LABELS, SIZE_BUCKETS)
+)
+rpc_response_bytes = REGISTRY.register(
+    Histogram("grpc_server_response_bytes", "Serialized response message sizes.", RPC_LABELS, SIZE_BUCKETS)
+)
+
+
+def _message_size(message) -> int:
+    try:
+        return message.ByteSize()
+    except AttributeError:
+        return len(message) if isinstance(message, bytes) else 0
+
+
+def _cancelled(context) -> bool:
+    try:
+        if isinstance(context, grpc.aio.ServicerContext):
+            return context.cancelled()
+        return not context.is_active()
+    except Exception:
+        return False
+
+
+def _status_code(context, error: BaseException | None) -> str:
+    if isinstance(error, (GeneratorExit, asyncio.CancelledError)):
+        return "CANCELLED"  # The client went away (or the server is stopping)
+    code = None
+    try:
+        code = context.code()
+    except Exception:
+        pass
+    if code is None:
+        if error is not None:
+            return "UNKNOWN"
+        # A handler that polls context.is_active() returns normally once its client is gone
+        return "CANCELLED" if _cancelled(context) else "OK"
+    return code.name if isinstance(code, grpc.StatusCode) else str(code)
+
+
+class _CallRecorder:
+    """Tracks one RPC from arrival to completion."""
+
+    __slots__ = ("labels", "arrived", "started")
+
+    def __init__(self, method: str, arrived: float):
+        self.labels = (method,)
+        self.arrived = arrived
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        rpc_started.inc(self.labels)
+        rpc_in_flight.inc(self.labels)
+        if self.arrived is not None:
+            rpc_queue_time.observe(self.labels, self.started - self.arrived)
+
+    def request(self, message):
+        rpc_request_bytes.observe(self.labels, _message_size(message))
+        return message
+
+    def response(self, message):
+        rpc_response_bytes.observe(self.labels, _message_size(message))
+        return message
+
+    def finish(self, context, error: BaseException | None = None):
+        rpc_in_flight.dec(self.labels)
+        rpc_latency.observe(self.labels, time.perf_counter() - self.started)
+        rpc_handled.inc((self.labels[0], _status_code(context, error)))
+
+
+def _short_method(full_method: str) -> str:
+    # "/auth.AuthService/Login" -> "AuthService/Login"
+    return full_method.rsplit(".", 1)[-1]
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Records per-method counts, status codes, latency, queue time, in-flight RPCs and message sizes.
+
+    intercept_service runs on the server's polling thread before the call is
+    handed to the executor, so the gap until the wrapped handler starts is the
+    executor queue time.
+    """
+
+    def intercept_service(self, continuation, handler_call_details):
+        arrived = time.perf_counter()
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _short_method(handler_call_details.method)
+
+        def unary_request(behavior, stream_response):
+            def wrapper(request, context):
+                call = _CallRecorder(method, arrived)
+                call.request(request)
+                if stream_response:
+                    return _record_stream(call, behavior(request, context), context)
+                call.start()
+                error = None
+                try:
+                    return call.response(behavior(request, context))
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(context, error)
+
+            return wrapper
+
+        def stream_request(behavior, stream_response):
+            def wrapper(request_iterator, context):
+                call = _CallRecorder(method, arrived)
+                requests = (call.request(message) for message in request_iterator)
+                if stream_response:
+                    return _record_stream(call, behavior(requests, context), context)
+                call.start()
+                error = None
+                try:
+                    return call.response(behavior(requests, context))
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(context, error)
+
+            return wrapper
+
+        return _wrap_handler(handler, unary_request, stream_request)
+
+
+def _record_stream(call: _CallRecorder, responses, context):
+    """Yields the responses, recording the call until the stream ends.
+
+    A stream the client cancels is closed with GeneratorExit; it is recorded
+    as CANCELLED. The call only counts as started once the first response is
+    requested, so a stream closed before that leaves no trace.
+    """
+    call.start()
+    error = None
+    try:
+        for response in responses:
+            yield call.response(response)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        call.finish(context, error)
+
+
+def _wrap_handler(handler, unary_request, stream_request):
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(
+            unary_request(handler.unary_unary, False),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(
+            unary_request(handler.unary_stream, True),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(
+            stream_request(handler.stream_unary, False),
+            request_deserializer=handler.request_deserializer,
+            response_serializer=handler.response_serializer,
+        )
+    return grpc.stream_stream_rpc_method_handler(
+        stream_request(handler.stream_stream, True),
+        request_deserializer=handler.request_deserializer,
+        response_serializer=handler.response_serializer,
+    )
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """grpc.aio version of MetricsInterceptor (no executor, so no queue time)."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _short_method(handler_call_details.method)
+
+        def unary_request(behavior, stream_response):
+            if stream_response:
+                async def stream_wrapper(request, context):
+                    call = _CallRecorder(method, None)
+                    call.start()
+                    call.request(request)
+                    error = None
+                    try:
+                        async for response in behavior(request, context):
+                            yield call.response(response)
+                    except BaseException as e:
+                        error = e
+                        raise
+                    finally:
+                        call.finish(context, error)
+
+                return stream_wrapper
+
+            async def wrapper(request, context):
+                call = _CallRecorder(method, None)
+                call.start()
+                call.request(request)
+                error = None
+                try:
+                    return call.response(await behavior(request, context))
+                except BaseException as e:  # asyncio.CancelledError when the client cancels
+                    error = e
+                    raise
+                finally:
+                    call.finish(context, error)
+
+            return wrapper
+
+        def stream_request(behavior, stream_response):
+            async def counted(call, request_iterator):
+                async for message in request_iterator:
+                    yield call.request(message)
+
+            if stream_response:
+                async def stream_wrapper(request_iterator, context):
+                    call = _CallRecorder(method, None)
+                    call.start()
+                    error = None
+                    try:
+                        async for response in behavior(counted(call, request_iterator), context):
+                            yield call.response(response)
+                    except BaseException as e:
+                        error = e
+                        raise
+                    finally:
+                        call.finish(context, error)
+
+                return stream_wrapper
+
+            async def wrapper(request_iterator, context):
+                call = _CallRecorder(method, None)
+                call.start()
+                error = None
+                try:
+                    return call.response(await behavior(counted(call, request_iterator), context))
+                except BaseException as e:
+                    error = e
+                    raise
+                finally:
+                    call.finish(context, error)
+
+            return wrapper
+
+        return _wrap_handler(handler, unary_request, stream_request)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = REGISTRY.exposition().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes are frequent; keep them out of the service log
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0"):
+    """Serves REGISTRY on http://addr:port/metrics from a daemon thread. Port 0 disables it."""
+    if not port:
+        return None
+    httpd = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="metrics-http", daemon=True).start()
+    logging.info("Metrics available on http://%s:%s/metrics", addr, port)
+    return httpd
@@ -0,0 +1,248 @@
+import psycopg2
+import psycopg2.extensions
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free before the checkout timeout."""
+
+
+class PreparedStatementConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has PREPAREd.
+
+    Prepared statements live as long as the database session (a rollback does
+    not drop them), so a pooled connection prepares each statement once and
+    afterwards sends only EXECUTE, letting PostgreSQL skip parsing and planning.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = {}  # statement name -> EXECUTE command
+
+    def execute_prepared(self, cur, name: str, sql: str, params: tuple):
+        """Runs `sql` (with %s placeholders) as the prepared statement `name`."""
+        execute = self.prepared.get(name)
+        if execute is None:
+            numbers = itertools.count(1)
+            positional = re.sub("%s", lambda _: f"${next(numbers)}", sql)  # $1, $2, ...
+            cur.execute(f"PREPARE {name} AS {positional}")
+            placeholders = ", ".join(["%s"] * len(params))
+            execute = f"EXECUTE {name} ({placeholders})" if params else f"EXECUTE {name}"
+            self.prepared[name] = execute
+        cur.execute(execute, params)
+
+
+class ConnectionPool:
+    """A bounded, thread-safe pool of psycopg2 connections.
+
+    Connections are opened lazily up to ``max_size``. Callers that find the
+    pool exhausted wait (up to ``timeout`` seconds) for a connection to be
+    returned instead of opening a new one, so the database never sees more
+    than ``max_size`` connections from this process.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        max_size: int,
+        min_size: int = 0,
+        timeout: float = 5.0,
+        max_idle: float = 300.0,
+        health_check_after: float = 30.0,
+        connection_factory=None,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.dsn = dsn
+        self.max_size = max_size
+        self.min_size = min(min_size, max_size)
+        self.timeout = timeout
+        self.max_idle = max_idle  # Idle connections older than this get closed
+        self.health_check_after = health_check_after  # Ping connections idle this long
+        self.connection_factory = connection_factory  # e.g. PreparedStatementConnection
+
+        self._cond = threading.Condition()
+        self._idle = deque()  # (conn, last_used) - oldest on the left
+        self._size = 0  # Open connections, idle + checked out
+        self._in_use = 0
+        self._closed = False
+
+        # Counters exposed through stats()
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._health_check_failures = 0
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=self.connection_factory)
+        with self._cond:
+            self._created += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception as e:
+            logging.debug("Error closing pooled connection: %s", e)
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        """Cheap liveness check; only pings connections that sat idle a while."""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _evict_idle_locked(self, now: float) -> list:
+        """Pops connections idle for longer than max_idle. Caller holds the lock."""
+        evicted = []
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0][1] > self.max_idle
+        ):
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._discarded += 1
+            evicted.append(conn)
+        return evicted
+
+    def acquire(self):
+        """Checks out a connection, waiting up to `timeout` if the pool is exhausted."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+        conn = None
+        last_used = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                evicted = self._evict_idle_locked(time.monotonic())
+                if self._idle:
+                    # LIFO: reuse the most recently returned (warmest) connection
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1  # Reserve the slot before connecting
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.max_size})"
+                    )
+                waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        for stale in evicted:
+            self._close_quietly(stale)
+
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                logging.warning("Discarding unhealthy pooled database connection.")
+                with self._cond:
+                    self._health_check_failures += 1
+                    self._discarded += 1
+                self._close_quietly(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        wait_seconds = time.monotonic() - start
+        with self._cond:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+            self._wait_seconds_total += wait_seconds
+            self._wait_seconds_max = max(self._wait_seconds_max, wait_seconds)
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, discarding it if it is broken."""
+        healthy = not conn.closed
+        if (
+            healthy
+            and conn.info.transaction_status
+            != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        ):
+            # Never hand out a connection with a dangling transaction
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                healthy = False
+
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._closed:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            else:
+                self._size -= 1
+                self._discarded += 1
+            self._cond.notify()
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and always returns it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Closes idle connections and stops handing out new ones."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of pool utilization and wait metrics."""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "utilization": self._in_use / self.max_size,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds_total": self._wait_seconds_total,
+                "wait_seconds_max": self._wait_seconds_max,
+                "timeouts": self._timeouts,
+                "connections_created": self._created,
+                "connections_discarded": self._discarded,
+                "health_check_failures": self._health_check_failures,
+            }
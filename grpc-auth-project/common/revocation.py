@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+
+# Revoked token ids ('jti' claims), kept in memory by every token verifier.
+#
+# A lookup is a clock read and a dict membership test, so checking it on every
+# verification costs well under a microsecond. Entries are only needed until
+# the token's own 'exp' (after that the token fails verification anyway). They
+# are purged at most every PURGE_INTERVAL by whichever of revoke, is_revoked or
+# stats runs first once it has elapsed, and on every snapshot. AuthService
+# persists revocations in the database and pushes them to ProfileService
+# instances over the WatchRevocations stream.
+
+PURGE_INTERVAL = 60.0  # Seconds between sweeps for expired entries
+
+
+class RevocationList:
+    """Thread-safe map of revoked jti -> expiry (Unix time)."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._next_purge = time.monotonic() + PURGE_INTERVAL
+        self.revoked_total = 0
+        self.purged_total = 0
+
+    def is_revoked(self, jti) -> bool:
+        """True if the token id has been revoked.
+
+        Reads a dict only; once every PURGE_INTERVAL, a caller that finds the
+        lock free also sweeps out expired entries, so the list shrinks even
+        when no new revocations arrive.
+        """
+        if time.monotonic() >= self._next_purge:
+            self._purge_if_due()
+        return jti in self._entries
+
+    def revoke(self, jti: str, expires_at: float) -> bool:
+        """Records a revocation. Returns False if `jti` was already revoked or has expired."""
+        now = time.time()
+        if expires_at <= now:
+            return False
+        with self._lock:
+            if jti in self._entries:
+                return False
+            self._entries[jti] = expires_at
+            self.revoked_total += 1
+            listeners = list(self._listeners)
+            if time.monotonic() >= self._next_purge:
+                self._purge_locked(now)
+        for listener in listeners:
+            try:
+                listener(jti, expires_at)
+            except Exception as e:
+                logging.error("Revocation listener failed: %s", e)
+        return True
+
+    def _purge_if_due(self):
+        if not self._lock.acquire(blocking=False):
+            return  # Another thread is revoking or purging
+        try:
+            if time.monotonic() >= self._next_purge:
+                self._purge_locked(time.time())
+        finally:
+            self._lock.release()
+
+    def _purge_locked(self, now: float):
+        expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+        for jti in expired:
+            del self._entries[jti]
+        self.purged_total += len(expired)
+        self._next_purge = time.monotonic() + PURGE_INTERVAL
+
+    def purge(self):
+        """Drops entries whose tokens have expired."""
+        with self._lock:
+            self._purge_locked(time.time())
+
+    def snapshot(self) -> list[tuple[str, float]]:
+        """Returns the current (jti, expires_at) entries, dropping expired ones first."""
+        with self._lock:
+            self._purge_locked(time.time())
+            return list(self._entries.items())
+
+    def add_listener(self, listener):
+        """Calls `listener(jti, expires_at)` for every new revocation."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def stats(self) -> dict:
+        with self._lock:
+            if time.monotonic() >= self._next_purge:
+                self._purge_locked(time.time())
+            return {
+                "entries": len(self._entries),
+                "listeners": len(self._listeners),
+                "revoked_total": self.revoked_total,
+                "purged_total": self.purged_total,
+            }
+
+
+REVOKED = RevocationList()  # Process-wide list used by the verifiers
@@ -0,0 +1,204 @@
+import grpc
+import asyncio
+import logging
+import os
+
+# Import generated code
+from generated import auth_pb2
+from generated import auth_pb2_grpc
+
+import auth_client
+import invalidation
+import profile_store
+from common import admission, grpc_options, logutil, metrics
+from invalidation import FEED
+from server import (
+    ADMISSION_PRIORITIES,
+    METRICS_PORT,
+    PORT,
+    AsyncPreSerializedResponses,
+    build_profile_response,
+    build_profile_responses,
+    cached_profile_response,
+    check_verification,
+    deadline_expired,
+    get_token_from_context,
+    profile_keys,
+    register_metrics,
+    reject_batch_size,
+    reject_expired_deadline,
+    reject_missing_token,
+    reject_profile_fields,
+    reject_store_error,
+    remember_profile_response,
+    updated_profile_response,
+)
+
+# asyncio server: a GetProfile waiting on VerifyToken no longer pins a worker
+# thread, so in-flight RPCs are bounded by this setting instead.
+MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", "1000"))
+
+
+class AsyncProfileServiceServicer(auth_pb2_grpc.ProfileServiceServicer):
+    """grpc.aio implementation of the ProfileService methods."""
+
+    async def _authenticate(self, method: str, context) -> tuple[str | None, str]:
+        """Verifies the caller's token. Returns (user_id, "") or (None, failure message)."""
+        if deadline_expired(context):
+            return None, reject_expired_deadline(method, context)
+        token = get_token_from_context(context)
+        if not token:
+            return None, reject_missing_token(method, context)
+        try:
+            verification_response = await auth_client.verify_token_async(token, context)
+        except auth_client.DeadlineExpired:
+            return None, reject_expired_deadline(method, context)
+        return check_verification(method, verification_response, context)
+
+    async def GetProfile(self, request, context):
+        """Handles GetProfile requests, requiring authentication."""
+        log_ok = logutil.sample("GetProfile")
+        if log_ok:
+            logging.info("GetProfile request received.")
+
+        user_id, failure = await self._authenticate("GetProfile", context)
+        if user_id is None:
+            return auth_pb2.GetProfileResponse(success=False, message=failure)
+        if log_ok:
+            logging.info(
+                "Token verified successfully for user ID: %s. Access granted.",
+                user_id,
+            )
+        cached = cached_profile_response(user_id)
+        if cached is not None:
+            return cached
+        read_generation = profile_store.generation()
+        try:
+            profiles = await profile_store.get_profiles_async(profile_keys([user_id]))
+        except Exception as e:
+            return auth_pb2.GetProfileResponse(
+                success=False, message=reject_store_error("GetProfile", e, context)
+            )
+        response = build_profile_responses([user_id], profiles)[0]
+        remember_profile_response(user_id, response, read_generation)
+        return response
+
+    async def BatchGetProfiles(self, request, context):
+        """Returns many users' profiles, read with one query. Requires authentication."""
+        if logutil.sample("BatchGetProfiles"):
+            logging.info(
+                "BatchGetProfiles request received with %s user ids.", len(request.user_ids)
+            )
+        if reject_batch_size(len(request.user_ids), context):
+            return auth_pb2.BatchGetProfilesResponse()
+        user_id, _ = await self._authenticate("BatchGetProfiles", context)
+        if user_id is None:
+            return auth_pb2.BatchGetProfilesResponse()
+        try:
+            profiles = await profile_store.get_profiles_async(profile_keys(request.user_ids))
+        except Exception as e:
+            reject_store_error("BatchGetProfiles", e, context)
+            return auth_pb2.BatchGetProfilesResponse()
+        return auth_pb2.BatchGetProfilesResponse(
+            profiles=build_profile_responses(request.user_ids, profiles, viewer=user_id)
+        )
+
+    async def UpdateProfile(self, request, context):
+        """Stores the caller's profile and tells the other replicas to drop their copies."""
+        if reject_profile_fields(request, context):
+            return auth_pb2.GetProfileResponse()
+        user_id, failure = await self._authenticate("UpdateProfile", context)
+        if user_id is None:
+            return auth_pb2.GetProfileResponse(success=False, message=failure)
+        key = profile_store.parse_user_id(user_id)
+        if key is None:
+            return build_profile_response(user_id, None)
+        try:
+            profile = await profile_store.update_profile_async(
+                key, request.email, request.full_name
+            )
+        except Exception as e:
+            return auth_pb2.GetProfileResponse(
+                success=False, message=reject_store_error("UpdateProfile", e, context)
+            )
+        logging.info("Profile of user ID %s updated.", user_id)
+        return updated_profile_response(user_id, profile)
+
+    async def WatchProfileInvalidations(self, request, context):
+        """Streams the ids of profiles updated through this server until the peer leaves."""
+        if not invalidation.is_peer(context.invocation_metadata()):
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, "Peer credential required.")
+        logging.info("WatchProfileInvalidations stream opened.")
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def subscriber(user_id):
+            loop.call_soon_threadsafe(events.put_nowait, user_id)
+
+        FEED.subscribe(subscriber)
+        try:
+            await context.send_initial_metadata(())  # Tells the follower it is subscribed
+            while True:
+                user_id = await events.get()
+                yield auth_pb2.ProfileInvalidation(user_id=str(user_id))
+        finally:
+            FEED.unsubscribe(subscriber)
+            logging.info("WatchProfileInvalidations stream closed.")
+
+
+async def serve():
+    """Starts the ProfileService on a grpc.aio server."""
+    try:
+        profile_store.init_db()
+        await profile_store.init_async_pool()
+    except Exception as e:
+        logging.critical("Failed to initialize the profile store: %s. Exiting.", e)
+        return
+    register_metrics()
+    metrics.start_http_server(METRICS_PORT)
+    auth_client.start_revocation_watch()  # Runs on its own thread with a sync stub
+    invalidation.start_peer_watches(profile_store.invalidate)  # Likewise, one thread per peer
+
+    controller = admission.create_controller(
+        ADMISSION_PRIORITIES, initial_limit=min(100, MAX_CONCURRENT_RPCS), max_limit=MAX_CONCURRENT_RPCS
+    )
+    server = grpc.aio.server(
+        interceptors=[metrics.AsyncMetricsInterceptor()]
+        + admission.interceptors(controller, is_async=True)
+        + [AsyncPreSerializedResponses()]
+        + grpc_options.server_interceptors(is_async=True),
+        maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS,
+        options=grpc_options.server_options(),
+        compression=grpc_options.server_compression(),
+    )
+    auth_pb2_grpc.add_ProfileServiceServicer_to_server(
+        AsyncProfileServiceServicer(), server
+    )
+
+    server.add_insecure_port(f"[::]:{PORT}")  # DEV ONLY!
+
+    logging.info(
+        "ProfileService (asyncio, max %s concurrent RPCs) starting on port %s...",
+        MAX_CONCURRENT_RPCS,
+        PORT,
+    )
+    await server.start()
+    logging.info("ProfileService started successfully.")
+    try:
+        await server.wait_for_termination()
+    finally:
+        logging.info("Stopping ProfileService...")
+        await server.stop(5)
+        invalidation.close()
+        await auth_client.close_async()
+        auth_client.close()
+        await profile_store.close_async_pool()
+        profile_store.close_pool()
+        logging.info("ProfileService stopped.")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
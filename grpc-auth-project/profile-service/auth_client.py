@@ -1,41 +1,393 @@
 import grpc
+import hashlib
+import itertools
+import jwt
 import os
 import logging
+import threading
+import time
+from concurrent import futures
 from generated import auth_pb2
 from generated import auth_pb2_grpc
 
+import jwt_verifier
+from batcher import MicroBatcher
+from common import grpc_options
+from common.cache import TTLCache
+from common.revocation import REVOKED
+
 AUTH_SERVICE_URL = os.getenv(
     "AUTH_SERVICE_URL", "localhost:50051"
-)  # Default for local dev
+)  # Default for local dev. May be a comma-separated list of AuthService addresses.
+AUTH_RPC_TIMEOUT = float(os.getenv("AUTH_RPC_TIMEOUT", "10"))  # Seconds
 
+# Deadline propagation: a verification made while serving an RPC with a
+# deadline gets what is left of that deadline (at most AUTH_RPC_TIMEOUT), less
+# this margin kept for the rest of the handler. Once the caller's time is up,
+# or the caller cancels, the call to AuthService is skipped or cancelled.
+AUTH_DEADLINE_MARGIN_MS = float(os.getenv("AUTH_DEADLINE_MARGIN_MS", "5"))
 
-def verify_token(token: str) -> auth_pb2.VerifyTokenResponse | None:
-    """Calls the AuthService to verify a token."""
-    logging.debug(f"Connecting to AuthService at {AUTH_SERVICE_URL} to verify token")
-    try:
-        # Use insecure channel for simplicity IN DEV ONLY!
-        with grpc.insecure_channel(AUTH_SERVICE_URL) as channel:
-            # Test connectivity - optional but good practice for debugging
+# Options shared by every channel to AuthService, on top of the transport
+# settings in grpc_options.py. Keepalive pings detect dead connections (e.g. an
+# AuthService restart behind NAT) before a request does, and the backoff
+# settings bound how aggressively we reconnect.
+CHANNEL_OPTIONS = grpc_options.channel_options({
+    "grpc.keepalive_time_ms": int(os.getenv("AUTH_KEEPALIVE_TIME_MS", str(grpc_options.KEEPALIVE_TIME_MS))),
+    "grpc.keepalive_timeout_ms": int(os.getenv("AUTH_KEEPALIVE_TIMEOUT_MS", str(grpc_options.KEEPALIVE_TIMEOUT_MS))),
+    "grpc.initial_reconnect_backoff_ms": int(os.getenv("AUTH_RECONNECT_INITIAL_MS", "1000")),
+    "grpc.min_reconnect_backoff_ms": int(os.getenv("AUTH_RECONNECT_MIN_MS", "1000")),
+    "grpc.max_reconnect_backoff_ms": int(os.getenv("AUTH_RECONNECT_MAX_MS", "10000")),
+    # Spread calls over every address a DNS name resolves to (e.g. scaled replicas)
+    "grpc.lb_policy_name": "round_robin",
+})
+
+# Verified-token cache. Valid results are kept for at most AUTH_CACHE_TTL
+# seconds and never past the token's own 'exp'; invalid results live in a
+# separate, short-lived cache so a flood of bad tokens cannot evict good ones.
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))  # Seconds
+AUTH_NEGATIVE_CACHE_MAX_SIZE = int(os.getenv("AUTH_NEGATIVE_CACHE_MAX_SIZE", "10000"))
+AUTH_NEGATIVE_CACHE_TTL = float(os.getenv("AUTH_NEGATIVE_CACHE_TTL", "5"))  # Seconds
+
+_valid_tokens = TTLCache(AUTH_CACHE_MAX_SIZE)  # key -> (response, jti)
+_invalid_tokens = TTLCache(AUTH_NEGATIVE_CACHE_MAX_SIZE)
+
+# Request coalescing: concurrent verifications from servicer threads are sent
+# to AuthService together as one BatchVerifyTokens call.
+AUTH_BATCH_ENABLED = os.getenv("AUTH_BATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+AUTH_BATCH_MAX_SIZE = int(os.getenv("AUTH_BATCH_MAX_SIZE", "128"))
+AUTH_BATCH_MAX_WAIT_MS = float(os.getenv("AUTH_BATCH_MAX_WAIT_MS", "2"))
+
+# Revocations pushed by AuthService (WatchRevocations). Cached and locally
+# verified tokens are checked against them, so a revoked token stops working
+# here as soon as the event arrives instead of when its cache entry expires.
+REVOCATION_WATCH = os.getenv("REVOCATION_WATCH", "true").lower() in ("1", "true", "yes")
+_watch_stop = threading.Event()
+_watch_thread = None
+_watch_call = None
+
+# Channels are created once, on first use, and shared by all servicer threads
+# (grpc channels and stubs are thread-safe).
+_channels = None
+_stubs = None
+_next_stub = itertools.count()
+_lock = threading.Lock()
+
+# grpc.aio channels for the asyncio server (aio_server.py). They belong to the
+# event loop that created them, which is the single loop running that server.
+_aio_channels = None
+_aio_stubs = None
+
+
+def _get_stub() -> auth_pb2_grpc.AuthServiceStub:
+    """Returns a stub over the shared channels, round-robin across addresses."""
+    global _channels, _stubs
+    if _stubs is None:
+        with _lock:
+            if _stubs is None:
+                targets = [t.strip() for t in AUTH_SERVICE_URL.split(",") if t.strip()]
+                # Use insecure channel for simplicity IN DEV ONLY!
+                _channels = [
+                    grpc.insecure_channel(
+                        target, options=CHANNEL_OPTIONS, compression=grpc_options.channel_compression()
+                    )
+                    for target in targets
+                ]
+                _stubs = [auth_pb2_grpc.AuthServiceStub(ch) for ch in _channels]
+                logging.info("Created AuthService channel(s) to %s", ", ".join(targets))
+    return _stubs[next(_next_stub) % len(_stubs)]
+
+
+def _get_aio_stub() -> auth_pb2_grpc.AuthServiceStub:
+    """Returns an asyncio stub over the shared grpc.aio channels, round-robin across addresses."""
+    global _aio_channels, _aio_stubs
+    if _aio_stubs is None:
+        targets = [t.strip() for t in AUTH_SERVICE_URL.split(",") if t.strip()]
+        _aio_channels = [
+            grpc.aio.insecure_channel(
+                target, options=CHANNEL_OPTIONS, compression=grpc_options.channel_compression()
+            )
+            for target in targets
+        ]
+        _aio_stubs = [auth_pb2_grpc.AuthServiceStub(ch) for ch in _aio_channels]
+        logging.info("Created asyncio AuthService channel(s) to %s", ", ".join(targets))
+    return _aio_stubs[next(_next_stub) % len(_aio_stubs)]
+
+
+def _send_verify_batch(tokens: list, timeout: float | None) -> futures.Future:
+    """Sends one BatchVerifyTokens call; resolves to the per-token responses.
+
+    Cancelling the returned Future cancels the call.
+    """
+    result = futures.Future()
+    if timeout is None:
+        timeout = AUTH_RPC_TIMEOUT
+    call = _get_stub().BatchVerifyTokens.future(
+        auth_pb2.BatchVerifyTokensRequest(tokens=tokens), timeout=min(timeout, AUTH_RPC_TIMEOUT)
+    )
+
+    def done(call):
+        try:
             try:
-                grpc.channel_ready_future(channel).result(timeout=5)  # Wait 5 seconds
-                logging.debug("Channel connection to AuthService successful.")
-            except grpc.FutureTimeoutError:
-                logging.error(
-                    f"Timeout connecting to AuthService at {AUTH_SERVICE_URL}"
-                )
-                return None
-
-            stub = auth_pb2_grpc.AuthServiceStub(channel)
-            request = auth_pb2.VerifyTokenRequest(token=token)
+                result.set_result(list(call.result().results))
+            except Exception as e:
+                result.set_exception(e)
+        except futures.InvalidStateError:
+            pass  # Cancelled meanwhile
+
+    call.add_done_callback(done)
+    result.add_done_callback(lambda result: result.cancelled() and call.cancel())
+    return result
+
+
+_batcher = MicroBatcher(
+    _send_verify_batch,
+    max_batch_size=AUTH_BATCH_MAX_SIZE,
+    max_wait=AUTH_BATCH_MAX_WAIT_MS / 1000,
+)
+
+
+def _fetch_signing_keys() -> tuple[str, float]:
+    """Fetches AuthService's public key set for local verification of RS256/EdDSA tokens."""
+    response = _get_stub().GetSigningKeys(
+        auth_pb2.GetSigningKeysRequest(), timeout=AUTH_RPC_TIMEOUT
+    )
+    return response.jwks, response.max_age_seconds
+
+
+jwt_verifier.SIGNING_KEYS.set_fetcher(_fetch_signing_keys)
+
+
+def start_revocation_watch():
+    """Follows AuthService's WatchRevocations stream in a background thread."""
+    global _watch_thread
+    if REVOCATION_WATCH and _watch_thread is None:
+        _watch_stop.clear()
+        _watch_thread = threading.Thread(
+            target=_watch_revocations, name="revocation-watch", daemon=True
+        )
+        _watch_thread.start()
+
+
+def _watch_revocations():
+    global _watch_call
+    backoff = 1.0
+    while not _watch_stop.is_set():
+        try:
+            _watch_call = _get_stub().WatchRevocations(auth_pb2.WatchRevocationsRequest())
+            for event in _watch_call:
+                backoff = 1.0
+                REVOKED.revoke(event.jti, event.expires_at)
+        except grpc.RpcError as e:
+            if _watch_stop.is_set():
+                break
+            logging.warning(
+                "Revocation stream failed: %s. Resubscribing in %.0f seconds.", e.code(), backoff
+            )
+        # A cleanly ended stream (AuthService restart) is resubscribed too
+        _watch_stop.wait(backoff)
+        backoff = min(backoff * 2, 30.0)
+
+
+def close():
+    """Closes the shared AuthService channels (called on shutdown)."""
+    global _channels, _stubs, _watch_thread
+    _batcher.stop()
+    _watch_stop.set()
+    if _watch_call is not None:
+        _watch_call.cancel()
+    _watch_thread = None
+    with _lock:
+        if _channels:
+            for channel in _channels:
+                channel.close()
+        _channels = None
+        _stubs = None
+
+
+async def close_async():
+    """Closes the grpc.aio channels (called on asyncio server shutdown)."""
+    global _aio_channels, _aio_stubs
+    if _aio_channels:
+        for channel in _aio_channels:
+            await channel.close()
+    _aio_channels = None
+    _aio_stubs = None
+
+
+def cache_stats() -> dict:
+    """Returns hit/miss/eviction counters of the verified-token caches."""
+    return {"valid": _valid_tokens.stats(), "invalid": _invalid_tokens.stats()}
+
+
+def signing_key_stats() -> dict:
+    """Returns how many public keys are cached and how often they were fetched."""
+    return jwt_verifier.SIGNING_KEYS.stats()
+
+
+def batch_stats() -> dict:
+    """Returns how many verifications were coalesced into how many RPCs."""
+    return _batcher.stats()
+
+
+# What waiting on a call or batch Future raises when it was cancelled or timed out
+_NO_RESULT = (
+    futures.CancelledError, futures.TimeoutError, grpc.FutureCancelledError, grpc.FutureTimeoutError
+)
+
+
+class DeadlineExpired(Exception):
+    """The RPC a verification is made for has run out of time or was cancelled."""
+
+
+def call_timeout(context) -> float:
+    """Returns the timeout for a call to AuthService made while serving `context`.
+
+    Raises DeadlineExpired if the caller's deadline leaves no time for it.
+    """
+    remaining = context.time_remaining() if context is not None else None
+    if remaining is None:
+        return AUTH_RPC_TIMEOUT
+    timeout = min(AUTH_RPC_TIMEOUT, remaining - AUTH_DEADLINE_MARGIN_MS / 1000)
+    if timeout <= 0:
+        raise DeadlineExpired()
+    return timeout
+
+
+def _token_key(token: str) -> bytes:
+    # Key by digest so the cache never holds bearer tokens themselves
+    return hashlib.sha256(token.encode()).digest()
+
+
+def _remember(key: bytes, token: str, response: auth_pb2.VerifyTokenResponse):
+    """Caches a definitive verification result."""
+    if not response.is_valid:
+        _invalid_tokens.set(key, response, AUTH_NEGATIVE_CACHE_TTL)
+        return
+    ttl = AUTH_CACHE_TTL
+    try:
+        # Signature was already checked; we only need 'exp' to bound the TTL
+        # and 'jti' to honour revocations on cache hits
+        claims = jwt.decode(token, options={"verify_signature": False})
+        if "exp" in claims:
+            ttl = min(ttl, float(claims["exp"]) - time.time())
+    except jwt.InvalidTokenError:
+        return
+    _valid_tokens.set(key, (response, claims.get("jti")), ttl)
+
+
+def _verify_remote(token: str, context=None) -> auth_pb2.VerifyTokenResponse | None:
+    """Calls the AuthService to verify a token, within `context`'s deadline."""
+    timeout = call_timeout(context)
+    try:
+        if AUTH_BATCH_ENABLED:
+            logging.debug("Queueing token for the next BatchVerifyTokens call")
+            # The batch is sent with the longest timeout among its callers;
+            # each caller waits only for its own
+            call = _batcher.submit(token, timeout)
+            wait = timeout + AUTH_BATCH_MAX_WAIT_MS / 1000
+        else:
             logging.debug("Sending VerifyToken request to AuthService")
-            response = stub.VerifyToken(request, timeout=10)  # Add a timeout
-            logging.debug(
-                f"Received VerifyToken response: isValid={response.is_valid}, userId={response.user_id}"
+            call = _get_stub().VerifyToken.future(
+                auth_pb2.VerifyTokenRequest(token=token), timeout=timeout
             )
-            return response
+            wait = None  # The RPC's own timeout ends it
+        if context is not None and not context.add_callback(call.cancel):
+            call.cancel()  # The caller is already gone
+        try:
+            response = call.result(timeout=wait)
+        except _NO_RESULT:
+            call.cancel()
+            if context is None:
+                raise
+            raise DeadlineExpired() from None
+        logging.debug(
+            "Received VerifyToken response: isValid=%s, userId=%s",
+            response.is_valid,
+            response.user_id,
+        )
+        return response
     except grpc.RpcError as e:
-        logging.error(f"gRPC error calling VerifyToken: {e.status()} - {e.details()}")
+        if e.code() == grpc.StatusCode.UNAUTHENTICATED:
+            # AuthService answered: the token itself is invalid or expired
+            return auth_pb2.VerifyTokenResponse(is_valid=False, message=e.details())
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED and timeout < AUTH_RPC_TIMEOUT:
+            raise DeadlineExpired() from None  # The caller's deadline, not AuthService, cut it short
+        logging.error("gRPC error calling VerifyToken: %s - %s", e.code(), e.details())
         return None  # Indicate failure
+    except DeadlineExpired:
+        raise
+    except _NO_RESULT:
+        logging.error("Timed out waiting for a batched VerifyToken result")
+        return None
+    except Exception as e:
+        logging.error("Unexpected error calling VerifyToken: %s", e)
+        return None
+
+
+async def _verify_remote_async(token: str, context=None) -> auth_pb2.VerifyTokenResponse | None:
+    """Async version of _verify_remote (no batching: calls are cheap to keep in flight).
+
+    A cancelled caller cancels the handler's task, which cancels this call.
+    """
+    timeout = call_timeout(context)
+    try:
+        request = auth_pb2.VerifyTokenRequest(token=token)
+        logging.debug("Sending VerifyToken request to AuthService")
+        return await _get_aio_stub().VerifyToken(request, timeout=timeout)
+    except grpc.RpcError as e:
+        if e.code() == grpc.StatusCode.UNAUTHENTICATED:
+            return auth_pb2.VerifyTokenResponse(is_valid=False, message=e.details())
+        if e.code() == grpc.StatusCode.DEADLINE_EXCEEDED and timeout < AUTH_RPC_TIMEOUT:
+            raise DeadlineExpired() from None
+        logging.error("gRPC error calling VerifyToken: %s - %s", e.code(), e.details())
+        return None
     except Exception as e:
-        logging.error(f"Unexpected error calling VerifyToken: {e}")
+        logging.error("Unexpected error calling VerifyToken: %s", e)
         return None
+
+
+def _lookup(key: bytes, token: str) -> auth_pb2.VerifyTokenResponse | None:
+    """Answers from the caches or local verification, without any network call."""
+    entry = _valid_tokens.get(key)
+    if entry is not None:
+        response, jti = entry
+        if not REVOKED.is_revoked(jti):
+            return response
+        _valid_tokens.delete(key)
+        return auth_pb2.VerifyTokenResponse(is_valid=False, message="Token has been revoked")
+    response = _invalid_tokens.get(key)
+    if response is not None:
+        return response
+    if jwt_verifier.LOCAL_JWT_VERIFY:
+        response = jwt_verifier.verify_locally(token)
+        if response is not None:
+            _remember(key, token, response)
+    return response
+
+
+def verify_token(token: str, context=None) -> auth_pb2.VerifyTokenResponse | None:
+    """Verifies a token, from cache or locally when possible, otherwise via AuthService.
+
+    `context` is the RPC being served: its deadline and cancellation carry over
+    to the call to AuthService. Returns None only when AuthService could not be
+    reached; raises DeadlineExpired when the caller's time ran out first.
+    """
+    key = _token_key(token)
+    response = _lookup(key, token)
+    if response is None:
+        response = _verify_remote(token, context)
+        if response is not None:
+            _remember(key, token, response)
+    return response
+
+
+async def verify_token_async(token: str, context=None) -> auth_pb2.VerifyTokenResponse | None:
+    """Async version of verify_token for the grpc.aio ProfileService."""
+    key = _token_key(token)
+    response = _lookup(key, token)
+    if response is None:
+        response = await _verify_remote_async(token, context)
+        if response is not None:
+            _remember(key, token, response)
+    return response
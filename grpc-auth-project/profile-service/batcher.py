@@ -0,0 +1,164 @@
+import logging
+import queue
+import threading
+import time
+from concurrent import futures
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into batched calls.
+
+    Callers `submit()` an item and get a Future back. A background thread
+    collects items until `max_batch_size` is reached or the first item has
+    waited `max_wait` seconds, then hands the unique items to `send_batch`.
+    `send_batch(items, timeout)` must return a Future resolving to a list of
+    results in the same order as `items`; it should not block, so the next
+    batch can be collected while the previous one is in flight. `timeout` is
+    how long the longest-waiting caller still waits (None if one has no
+    timeout).
+
+    A caller that gives up cancels its Future: items whose callers all left
+    are not sent, and a batch is cancelled once nobody waits for it.
+    """
+
+    def __init__(self, send_batch, max_batch_size: int, max_wait: float):
+        self._send_batch = send_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches_sent = 0
+        self.items_submitted = 0
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name="micro-batcher", daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, item, timeout: float | None = None) -> futures.Future:
+        """Queues `item` for the next batch and returns a Future for its result.
+
+        `timeout` is how many seconds the caller will wait for the result.
+        """
+        future = futures.Future()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self._ensure_started()
+        self._queue.put((item, future, deadline))
+        return future
+
+    def stop(self):
+        """Stops the collector thread after it flushes what is already queued."""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(_STOP)
+                self._thread.join()
+                self._thread = None
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch = [entry]
+            stopping = False
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._dispatch(batch)
+            if stopping:
+                return
+
+    def _dispatch(self, batch):
+        now = time.monotonic()
+        live = []
+        for item, future, deadline in batch:
+            if deadline is not None and deadline <= now:
+                future.cancel()  # Its caller stops waiting now
+            if not future.cancelled():
+                live.append((item, future, deadline))
+        batch = live
+        if not batch:
+            return
+        # Identical items submitted concurrently share one slot in the batch
+        waiters = {}
+        for item, future, _ in batch:
+            waiters.setdefault(item, []).append(future)
+        items = list(waiters)
+        deadlines = [deadline for _, _, deadline in batch]
+        timeout = None if None in deadlines else max(deadlines) - now
+        self.batches_sent += 1
+        self.items_submitted += len(batch)
+
+        def resolve(done):
+            try:
+                results = done.result()
+                if len(results) != len(items):
+                    raise ValueError(
+                        f"Batch returned {len(results)} results for {len(items)} items"
+                    )
+                for item, result in zip(items, results):
+                    for future in waiters[item]:
+                        _settle(future, result=result)
+            except Exception as e:
+                for pending in waiters.values():
+                    for future in pending:
+                        _settle(future, error=e)
+
+        try:
+            sent = self._send_batch(items, timeout)
+        except Exception as e:
+            logging.error("Failed to send batch of %s items: %s", len(items), e)
+            for pending in waiters.values():
+                for future in pending:
+                    _settle(future, error=e)
+            return
+        sent.add_done_callback(resolve)
+
+        waiting = [len(batch)]
+        lock = threading.Lock()
+
+        def abandon(future):
+            if future.cancelled():
+                with lock:
+                    waiting[0] -= 1
+                    if waiting[0] == 0:
+                        sent.cancel()  # Every caller left; stop the call
+
+        for pending in waiters.values():
+            for future in pending:
+                future.add_done_callback(abandon)
+
+    def stats(self) -> dict:
+        """Returns how many items were submitted and in how many batches."""
+        return {
+            "batches_sent": self.batches_sent,
+            "items_submitted": self.items_submitted,
+        }
+
+
+def _settle(future: futures.Future, result=None, error: Exception | None = None):
+    """Completes `future` unless its caller has cancelled it meanwhile."""
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except futures.InvalidStateError:
+        pass
@@ -46,11 +46,51 @@ class AuthServiceStub(object):
                 request_serializer=auth__pb2.LoginRequest.SerializeToString,
                 response_deserializer=auth__pb2.LoginResponse.FromString,
                 _registered_method=True)
+        self.RefreshToken = channel.unary_unary(
+                '/auth.AuthService/RefreshToken',
+                request_serializer=auth__pb2.RefreshTokenRequest.SerializeToString,
+                response_deserializer=auth__pb2.RefreshTokenResponse.FromString,
+                _registered_method=True)
         self.VerifyToken = channel.unary_unary(
                 '/auth.AuthService/VerifyToken',
                 request_serializer=auth__pb2.VerifyTokenRequest.SerializeToString,
                 response_deserializer=auth__pb2.VerifyTokenResponse.FromString,
                 _registered_method=True)
+        self.BatchVerifyTokens = channel.unary_unary(
+                '/auth.AuthService/BatchVerifyTokens',
+                request_serializer=auth__pb2.BatchVerifyTokensRequest.SerializeToString,
+                response_deserializer=auth__pb2.BatchVerifyTokensResponse.FromString,
+                _registered_method=True)
+        self.StreamVerifyTokens = channel.stream_stream(
+                '/auth.AuthService/StreamVerifyTokens',
+                request_serializer=auth__pb2.BatchVerifyTokensRequest.SerializeToString,
+                response_deserializer=auth__pb2.BatchVerifyTokensResponse.FromString,
+                _registered_method=True)
+        self.BulkRegister = channel.stream_stream(
+                '/auth.AuthService/BulkRegister',
+                request_serializer=auth__pb2.BulkRegisterRequest.SerializeToString,
+                response_deserializer=auth__pb2.BulkRegisterResult.FromString,
+                _registered_method=True)
+        self.RevokeToken = channel.unary_unary(
+                '/auth.AuthService/RevokeToken',
+                request_serializer=auth__pb2.RevokeTokenRequest.SerializeToString,
+                response_deserializer=auth__pb2.RevokeTokenResponse.FromString,
+                _registered_method=True)
+        self.WatchRevocations = channel.unary_stream(
+                '/auth.AuthService/WatchRevocations',
+                request_serializer=auth__pb2.WatchRevocationsRequest.SerializeToString,
+                response_deserializer=auth__pb2.RevocationEvent.FromString,
+                _registered_method=True)
+        self.WatchToken = channel.unary_stream(
+                '/auth.AuthService/WatchToken',
+                request_serializer=auth__pb2.WatchTokenRequest.SerializeToString,
+                response_deserializer=auth__pb2.TokenEvent.FromString,
+                _registered_method=True)
+        self.GetSigningKeys = channel.unary_unary(
+                '/auth.AuthService/GetSigningKeys',
+                request_serializer=auth__pb2.GetSigningKeysRequest.SerializeToString,
+                response_deserializer=auth__pb2.GetSigningKeysResponse.FromString,
+                _registered_method=True)
 
 
 class AuthServiceServicer(object):
@@ -70,6 +110,13 @@ class AuthServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def RefreshToken(self, request, context):
+        """Exchanges a refresh token for a new access token (and a new refresh token)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def VerifyToken(self, request, context):
         """Used by other services to verify the token
         """
@@ -77,6 +124,55 @@ class AuthServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchVerifyTokens(self, request, context):
+        """Verifies many tokens in one call; results are returned in request order
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamVerifyTokens(self, request_iterator, context):
+        """Streaming variant: one response per request message over a long-lived stream
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def BulkRegister(self, request_iterator, context):
+        """Registers a stream of users; one result per request is streamed back in order
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def RevokeToken(self, request, context):
+        """Revokes a token (e.g. on logout) for the rest of its lifetime
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchRevocations(self, request, context):
+        """Streams every currently revoked token id, then new revocations as they happen
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchToken(self, request, context):
+        """Streams the validity of one token: VALID, then EXPIRING, then EXPIRED or REVOKED
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetSigningKeys(self, request, context):
+        """Public keys for verifying RS256/EdDSA tokens, as a JSON Web Key Set
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_AuthServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -90,11 +186,51 @@ def add_AuthServiceServicer_to_server(servicer, server):
                     request_deserializer=auth__pb2.LoginRequest.FromString,
                     response_serializer=auth__pb2.LoginResponse.SerializeToString,
             ),
+            'RefreshToken': grpc.unary_unary_rpc_method_handler(
+                    servicer.RefreshToken,
+                    request_deserializer=auth__pb2.RefreshTokenRequest.FromString,
+                    response_serializer=auth__pb2.RefreshTokenResponse.SerializeToString,
+            ),
             'VerifyToken': grpc.unary_unary_rpc_method_handler(
                     servicer.VerifyToken,
                     request_deserializer=auth__pb2.VerifyTokenRequest.FromString,
                     response_serializer=auth__pb2.VerifyTokenResponse.SerializeToString,
             ),
+            'BatchVerifyTokens': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchVerifyTokens,
+                    request_deserializer=auth__pb2.BatchVerifyTokensRequest.FromString,
+                    response_serializer=auth__pb2.BatchVerifyTokensResponse.SerializeToString,
+            ),
+            'StreamVerifyTokens': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamVerifyTokens,
+                    request_deserializer=auth__pb2.BatchVerifyTokensRequest.FromString,
+                    response_serializer=auth__pb2.BatchVerifyTokensResponse.SerializeToString,
+            ),
+            'BulkRegister': grpc.stream_stream_rpc_method_handler(
+                    servicer.BulkRegister,
+                    request_deserializer=auth__pb2.BulkRegisterRequest.FromString,
+                    response_serializer=auth__pb2.BulkRegisterResult.SerializeToString,
+            ),
+            'RevokeToken': grpc.unary_unary_rpc_method_handler(
+                    servicer.RevokeToken,
+                    request_deserializer=auth__pb2.RevokeTokenRequest.FromString,
+                    response_serializer=auth__pb2.RevokeTokenResponse.SerializeToString,
+            ),
+            'WatchRevocations': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchRevocations,
+                    request_deserializer=auth__pb2.WatchRevocationsRequest.FromString,
+                    response_serializer=auth__pb2.RevocationEvent.SerializeToString,
+            ),
+            'WatchToken': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchToken,
+                    request_deserializer=auth__pb2.WatchTokenRequest.FromString,
+                    response_serializer=auth__pb2.TokenEvent.SerializeToString,
+            ),
+            'GetSigningKeys': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetSigningKeys,
+                    request_deserializer=auth__pb2.GetSigningKeysRequest.FromString,
+                    response_serializer=auth__pb2.GetSigningKeysResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'auth.AuthService', rpc_method_handlers)
@@ -162,6 +298,33 @@ class AuthService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def RefreshToken(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.AuthService/RefreshToken',
+            auth__pb2.RefreshTokenRequest.SerializeToString,
+            auth__pb2.RefreshTokenResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def VerifyToken(request,
             target,
@@ -189,6 +352,195 @@ class AuthService(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def BatchVerifyTokens(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.AuthService/BatchVerifyTokens',
+            auth__pb2.BatchVerifyTokensRequest.SerializeToString,
+            auth__pb2.BatchVerifyTokensResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamVerifyTokens(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/auth.AuthService/StreamVerifyTokens',
+            auth__pb2.BatchVerifyTokensRequest.SerializeToString,
+            auth__pb2.BatchVerifyTokensResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def BulkRegister(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/auth.AuthService/BulkRegister',
+            auth__pb2.BulkRegisterRequest.SerializeToString,
+            auth__pb2.BulkRegisterResult.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def RevokeToken(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.AuthService/RevokeToken',
+            auth__pb2.RevokeTokenRequest.SerializeToString,
+            auth__pb2.RevokeTokenResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchRevocations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/auth.AuthService/WatchRevocations',
+            auth__pb2.WatchRevocationsRequest.SerializeToString,
+            auth__pb2.RevocationEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchToken(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/auth.AuthService/WatchToken',
+            auth__pb2.WatchTokenRequest.SerializeToString,
+            auth__pb2.TokenEvent.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetSigningKeys(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.AuthService/GetSigningKeys',
+            auth__pb2.GetSigningKeysRequest.SerializeToString,
+            auth__pb2.GetSigningKeysResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
 
 class ProfileServiceStub(object):
     """----- Profile Service Definition -----
@@ -207,6 +559,21 @@ class ProfileServiceStub(object):
                 request_serializer=auth__pb2.GetProfileRequest.SerializeToString,
                 response_deserializer=auth__pb2.GetProfileResponse.FromString,
                 _registered_method=True)
+        self.BatchGetProfiles = channel.unary_unary(
+                '/auth.ProfileService/BatchGetProfiles',
+                request_serializer=auth__pb2.BatchGetProfilesRequest.SerializeToString,
+                response_deserializer=auth__pb2.BatchGetProfilesResponse.FromString,
+                _registered_method=True)
+        self.UpdateProfile = channel.unary_unary(
+                '/auth.ProfileService/UpdateProfile',
+                request_serializer=auth__pb2.UpdateProfileRequest.SerializeToString,
+                response_deserializer=auth__pb2.GetProfileResponse.FromString,
+                _registered_method=True)
+        self.WatchProfileInvalidations = channel.unary_stream(
+                '/auth.ProfileService/WatchProfileInvalidations',
+                request_serializer=auth__pb2.WatchProfileInvalidationsRequest.SerializeToString,
+                response_deserializer=auth__pb2.ProfileInvalidation.FromString,
+                _registered_method=True)
 
 
 class ProfileServiceServicer(object):
@@ -222,6 +589,28 @@ class ProfileServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchGetProfiles(self, request, context):
+        """Returns many users' profiles in one call (and one database query)
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def UpdateProfile(self, request, context):
+        """Updates the caller's own profile and returns it
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def WatchProfileInvalidations(self, request, context):
+        """Streams the ids of profiles updated through this server, so other
+        replicas can drop them from their caches
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ProfileServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -230,6 +619,21 @@ def add_ProfileServiceServicer_to_server(servicer, server):
                     request_deserializer=auth__pb2.GetProfileRequest.FromString,
                     response_serializer=auth__pb2.GetProfileResponse.SerializeToString,
             ),
+            'BatchGetProfiles': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchGetProfiles,
+                    request_deserializer=auth__pb2.BatchGetProfilesRequest.FromString,
+                    response_serializer=auth__pb2.BatchGetProfilesResponse.SerializeToString,
+            ),
+            'UpdateProfile': grpc.unary_unary_rpc_method_handler(
+                    servicer.UpdateProfile,
+                    request_deserializer=auth__pb2.UpdateProfileRequest.FromString,
+                    response_serializer=auth__pb2.GetProfileResponse.SerializeToString,
+            ),
+            'WatchProfileInvalidations': grpc.unary_stream_rpc_method_handler(
+                    servicer.WatchProfileInvalidations,
+                    request_deserializer=auth__pb2.WatchProfileInvalidationsRequest.FromString,
+                    response_serializer=auth__pb2.ProfileInvalidation.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'auth.ProfileService', rpc_method_handlers)
@@ -270,3 +674,84 @@ class ProfileService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def BatchGetProfiles(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.ProfileService/BatchGetProfiles',
+            auth__pb2.BatchGetProfilesRequest.SerializeToString,
+            auth__pb2.BatchGetProfilesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def UpdateProfile(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/auth.ProfileService/UpdateProfile',
+            auth__pb2.UpdateProfileRequest.SerializeToString,
+            auth__pb2.GetProfileResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def WatchProfileInvalidations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/auth.ProfileService/WatchProfileInvalidations',
+            auth__pb2.WatchProfileInvalidationsRequest.SerializeToString,
+            auth__pb2.ProfileInvalidation.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,159 @@
+import grpc
+import hmac
+import logging
+import os
+import threading
+
+from generated import auth_pb2
+from generated import auth_pb2_grpc
+
+from common import grpc_options
+
+# Profile cache coherence between ProfileService replicas.
+#
+# Each replica caches profiles (and GetProfile responses) in process. An
+# UpdateProfile handled by one replica is published on its
+# WatchProfileInvalidations stream; every other replica listed in
+# PROFILE_PEERS follows that stream and drops the user's cached entries as
+# soon as the event arrives. Whenever a peer stream is (re)established the
+# follower clears its whole cache, since updates may have been missed while it
+# was down. PROFILE_CACHE_TTL still bounds staleness if a peer is unreachable.
+#
+# The stream reveals which users are updating their profiles, so only peers
+# presenting PROFILE_PEER_SECRET (as "authorization: Bearer <secret>") may
+# follow it. Without a secret every WatchProfileInvalidations call is refused.
+
+PROFILE_PEERS = [
+    peer.strip() for peer in os.getenv("PROFILE_PEERS", "").split(",") if peer.strip()
+]  # host:port of the other ProfileService replicas
+PROFILE_PEER_SECRET = os.getenv("PROFILE_PEER_SECRET", "")  # Shared by all replicas
+RESUBSCRIBE_MAX_BACKOFF = 30.0  # Seconds
+
+
+def is_peer(metadata) -> bool:
+    """Whether call metadata carries the peer credential."""
+    if not PROFILE_PEER_SECRET:
+        return False
+    presented = dict(metadata or ()).get("authorization", "")
+    return hmac.compare_digest(presented.encode(), f"Bearer {PROFILE_PEER_SECRET}".encode())
+
+
+class InvalidationFeed:
+    """Fan-out of this replica's profile updates to WatchProfileInvalidations streams."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.published_total = 0
+        self.received_total = 0  # Invalidations from peers
+        self.resyncs_total = 0  # Full cache clears after (re)subscribing to a peer
+
+    def subscribe(self, subscriber):
+        """Calls `subscriber(user_id)` for every update made through this replica."""
+        with self._lock:
+            self._subscribers.append(subscriber)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def publish(self, user_id: int):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published_total += 1
+        for subscriber in subscribers:
+            try:
+                subscriber(user_id)
+            except Exception as e:
+                logging.error("Profile invalidation subscriber failed: %s", e)
+
+    def record_received(self):
+        """Counts one invalidation received from a peer."""
+        with self._lock:
+            self.received_total += 1
+
+    def record_resync(self):
+        """Counts one full cache clear after (re)subscribing to a peer."""
+        with self._lock:
+            self.resyncs_total += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "streams": len(self._subscribers),
+                "peers": len(PROFILE_PEERS),
+                "published_total": self.published_total,
+                "received_total": self.received_total,
+                "resyncs_total": self.resyncs_total,
+            }
+
+
+FEED = InvalidationFeed()  # Process-wide feed used by the servicers
+
+_stop = threading.Event()
+_threads = []
+_calls = {}  # peer -> active stream, so close() can cancel it
+
+
+def start_peer_watches(on_invalidate):
+    """Follows every peer's WatchProfileInvalidations stream, each in a background thread.
+
+    `on_invalidate(user_id)` is called for each update made through a peer, and
+    `on_invalidate(None)` (drop everything) each time a stream is established.
+    """
+    if PROFILE_PEERS and not PROFILE_PEER_SECRET:
+        logging.error("PROFILE_PEERS is set without PROFILE_PEER_SECRET; not following peer invalidations.")
+        return
+    _stop.clear()
+    for peer in PROFILE_PEERS:
+        thread = threading.Thread(
+            target=_watch_peer, args=(peer, on_invalidate), name=f"invalidation-watch-{peer}", daemon=True
+        )
+        thread.start()
+        _threads.append(thread)
+
+
+def _watch_peer(peer: str, on_invalidate):
+    backoff = 1.0
+    with grpc.insecure_channel(
+        peer, options=grpc_options.channel_options(), compression=grpc_options.channel_compression()
+    ) as channel:
+        stub = auth_pb2_grpc.ProfileServiceStub(channel)
+        while not _stop.is_set():
+            try:
+                call = stub.WatchProfileInvalidations(
+                    auth_pb2.WatchProfileInvalidationsRequest(),
+                    metadata=(("authorization", f"Bearer {PROFILE_PEER_SECRET}"),),
+                    wait_for_ready=True,
+                )
+                _calls[peer] = call
+                call.initial_metadata()  # Sent once the peer has subscribed us
+                if not call.is_active():
+                    raise call  # Failed before subscribing; the call is its own RpcError
+                logging.info("Following profile invalidations from %s.", peer)
+                FEED.record_resync()
+                on_invalidate(None)
+                backoff = 1.0
+                for event in call:
+                    FEED.record_received()
+                    on_invalidate(int(event.user_id))
+            except grpc.RpcError as e:
+                if _stop.is_set():
+                    break
+                logging.warning(
+                    "Invalidation stream from %s failed: %s. Resubscribing in %.0f seconds.",
+                    peer, e.code(), backoff,
+                )
+            # A cleanly ended stream (peer restart) is resubscribed too
+            _stop.wait(backoff)
+            backoff = min(backoff * 2, RESUBSCRIBE_MAX_BACKOFF)
+
+
+def close():
+    """Stops following the peers (called on shutdown)."""
+    _stop.set()
+    for call in list(_calls.values()):
+        call.cancel()
+    _calls.clear()
+    _threads.clear()
@@ -0,0 +1,175 @@
+import os
+import json
+import jwt
+import logging
+import threading
+import time
+from generated import auth_pb2
+from common.jwt_config import (
+    ASYMMETRIC_ALGORITHMS,
+    DEFAULT_JWT_SECRET,
+    JWT_ALGORITHM,
+    JWT_LEGACY_HS256_UNTIL,
+    JWT_SECRET,
+)
+from common.revocation import REVOKED
+
+# Local (in-process) token verification. Mirrors auth-service/utils.verify_jwt
+# so ProfileService can skip the VerifyToken round trip for tokens it can
+# decide on its own. Opt-in. HS256 tokens need the same JWT_SECRET as
+# AuthService; RS256/EdDSA tokens only need AuthService's public keys, which
+# are fetched with GetSigningKeys and cached.
+LOCAL_JWT_VERIFY = os.getenv("LOCAL_JWT_VERIFY", "false").lower() in ("1", "true", "yes")
+# When set, every token is sent to AuthService (e.g. it must consult revocation state)
+REQUIRE_REMOTE_CHECK = os.getenv("REQUIRE_REMOTE_CHECK", "false").lower() in ("1", "true", "yes")
+
+ALGORITHM = "HS256"
+# Key ids signed with JWT_SECRET. Tokens carrying any other 'kid' are left to AuthService.
+KNOWN_KEY_IDS = {kid.strip() for kid in os.getenv("JWT_KEY_IDS", "").split(",") if kid.strip()}
+
+KEY_REFRESH_MIN_INTERVAL = 5.0  # Min seconds between key set fetches (unknown 'kid' floods)
+
+
+class SigningKeyCache:
+    """AuthService's public keys by 'kid', refreshed in the background.
+
+    Lookups never wait for the network: while the key set is being fetched (the
+    first time, after it has expired, or when a token names a 'kid' we have not
+    seen, e.g. right after a key rotation) tokens are left to AuthService or
+    checked against the keys we already have.
+    """
+
+    def __init__(self):
+        self._keys = {}  # kid -> jwt.PyJWK
+        self._expires_at = 0.0
+        self._next_fetch = 0.0
+        self._fetching = False
+        self._fetcher = None
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.fetch_errors = 0
+
+    def set_fetcher(self, fetcher):
+        """`fetcher()` returns (jwks_json, max_age_seconds), e.g. via GetSigningKeys."""
+        self._fetcher = fetcher
+
+    def get(self, kid: str) -> jwt.PyJWK | None:
+        key = self._keys.get(kid)
+        if key is None or time.monotonic() >= self._expires_at:
+            self._refresh_in_background()
+        return key
+
+    def _refresh_in_background(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._fetching or self._fetcher is None or now < self._next_fetch:
+                return
+            self._fetching = True
+            self._next_fetch = now + KEY_REFRESH_MIN_INTERVAL
+        threading.Thread(target=self._refresh, name="signing-keys", daemon=True).start()
+
+    def _refresh(self):
+        try:
+            jwks, max_age = self._fetcher()
+            keys = {}
+            for data in json.loads(jwks).get("keys", []):
+                try:
+                    key = jwt.PyJWK.from_dict(data)
+                except jwt.PyJWKError as e:
+                    logging.warning("Ignoring signing key '%s': %s", data.get("kid"), e)
+                    continue
+                keys[key.key_id] = key
+            self._keys = keys
+            self._expires_at = time.monotonic() + max_age
+            self.fetches += 1
+            logging.debug("Fetched %s signing key(s) from AuthService.", len(keys))
+        except Exception as e:
+            self.fetch_errors += 1
+            logging.warning("Fetching signing keys failed: %s", e)
+        finally:
+            self._fetching = False
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._keys),
+            "fetches": self.fetches,
+            "fetch_errors": self.fetch_errors,
+        }
+
+
+SIGNING_KEYS = SigningKeyCache()
+
+
+# With RS256/EdDSA signing, HS256 tokens are only accepted inside the
+# JWT_LEGACY_HS256_UNTIL window, and never with the default secret.
+ASYMMETRIC = JWT_ALGORITHM in ASYMMETRIC_ALGORITHMS
+
+
+def _legacy_hs256_accepted(payload: dict) -> bool:
+    return (
+        JWT_SECRET != DEFAULT_JWT_SECRET
+        and time.time() < JWT_LEGACY_HS256_UNTIL
+        and "exp" in payload
+        and payload["exp"] <= JWT_LEGACY_HS256_UNTIL
+    )
+
+
+def _invalid(message: str) -> auth_pb2.VerifyTokenResponse:
+    return auth_pb2.VerifyTokenResponse(is_valid=False, message=message)
+
+
+def verify_locally(token: str) -> auth_pb2.VerifyTokenResponse | None:
+    """Verifies a token in-process.
+
+    Returns a VerifyTokenResponse when the token can be decided locally (valid
+    or invalid), or None when only AuthService can decide.
+    """
+    if REQUIRE_REMOTE_CHECK:
+        return None
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.InvalidTokenError as e:
+        logging.warning("Local JWT verification failed: Malformed token - %s", e)
+        return _invalid("Token invalid or expired")
+
+    algorithm = header.get("alg")
+    kid = header.get("kid")
+    if algorithm in ASYMMETRIC_ALGORITHMS:
+        jwk = SIGNING_KEYS.get(kid) if kid is not None else None
+        if jwk is None or jwk.algorithm_name != algorithm:
+            logging.debug("Token has unknown key id '%s'; deferring to AuthService.", kid)
+            return None
+        key = jwk.key
+    elif algorithm == ALGORITHM:
+        if kid is not None and kid not in KNOWN_KEY_IDS:
+            logging.debug("Token has unknown key id '%s'; deferring to AuthService.", kid)
+            return None
+        key = JWT_SECRET
+    else:
+        logging.debug("Token uses algorithm %s; deferring to AuthService.", algorithm)
+        return None
+
+    try:
+        payload = jwt.decode(token, key, algorithms=[algorithm])
+    except jwt.ExpiredSignatureError:
+        logging.warning("Local JWT verification failed: Token has expired")
+        return _invalid("Token invalid or expired")
+    except jwt.InvalidTokenError as e:
+        logging.warning("Local JWT verification failed: Invalid token - %s", e)
+        return _invalid("Token invalid or expired")
+
+    if ASYMMETRIC and algorithm == ALGORITHM and not _legacy_hs256_accepted(payload):
+        logging.warning("Local JWT verification failed: HS256 token outside the legacy window")
+        return _invalid("Token invalid or expired")
+    if "sub" not in payload:
+        logging.warning("Local JWT verification failed: 'sub' claim missing in token.")
+        return _invalid("Token invalid (missing sub claim)")
+    if REVOKED.is_revoked(payload.get("jti")):
+        logging.warning("Local JWT verification failed: Token has been revoked")
+        return _invalid("Token has been revoked")
+
+    return auth_pb2.VerifyTokenResponse(
+        is_valid=True,
+        user_id=str(payload["sub"]),
+        username=str(payload.get("username", "")),
+    )
@@ -3,6 +3,8 @@ from concurrent import futures
 import time
 import logging
 import os
+import queue
+import threading
 
 # Import generated code (needs auth_pb2 and auth_pb2_grpc for ProfileService itself)
 from generated import auth_pb2
@@ -10,10 +12,79 @@ from generated import auth_pb2_grpc
 
 # Import the helper client for calling AuthService
 import auth_client
+import invalidation
+import profile_store
+from common import admission, grpc_options, logutil, metrics
+from common.cache import TTLCache
+from common.revocation import REVOKED
+from invalidation import FEED
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+logutil.setup_logging("profile-service")
+
+PORT = "50052"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9102"))  # Prometheus scrape endpoint; 0 disables
+MAX_WORKERS = int(os.getenv("GRPC_MAX_WORKERS", "10"))
+# Calls held at once, running or waiting for a worker; grpcio rejects the rest
+# with RESOURCE_EXHAUSTED. The adaptive admission limit stays below it.
+MAX_CONCURRENT_RPCS = int(os.getenv("GRPC_MAX_CONCURRENT_RPCS", str(MAX_WORKERS * 5)))
+# Each WatchProfileInvalidations stream (one per peer replica) holds a worker
+# thread while open, so they may use only a quarter of the pool; more are
+# refused with RESOURCE_EXHAUSTED. Large replica sets should run aio_server.py,
+# which has no such limit.
+MAX_STREAMS = int(os.getenv("GRPC_MAX_STREAMS", str(max(1, MAX_WORKERS // 4))))
+_stream_slots = threading.BoundedSemaphore(MAX_STREAMS)
+MAX_PROFILE_BATCH_SIZE = int(os.getenv("MAX_PROFILE_BATCH_SIZE", "1000"))  # User ids per BatchGetProfiles
+
+# Shed first under overload: normal (unlisted methods) before high
+ADMISSION_PRIORITIES = {"auth.ProfileService/GetProfile": "high"}
+
+# GetProfile responses are cached serialized, keyed by user id: a hit is
+# returned as bytes and written to the wire as is (see PreSerializedResponses),
+# skipping both message construction and serialization. Entries are dropped
+# with the cached profile they were built from (profile_store.invalidate).
+_responses = TTLCache(profile_store.PROFILE_CACHE_MAX_SIZE, size_fn=lambda key, value: len(value))
+
+
+def _drop_responses(user_id: int | None):
+    if user_id is None:
+        _responses.clear()
+    else:
+        _responses.delete(str(user_id))
+
+
+profile_store.add_invalidation_listener(_drop_responses)
+
+
+def serialize_response(serializer):
+    """Wraps a response serializer so pre-serialized bytes pass through unchanged."""
+
+    def serialize(response):
+        if isinstance(response, bytes):
+            return response
+        return serializer(response)
+
+    return serialize
+
+
+def pre_serialized(handler):
+    """Returns `handler` with a response serializer that accepts bytes."""
+    if handler is None or handler.response_serializer is None:
+        return handler
+    return handler._replace(response_serializer=serialize_response(handler.response_serializer))
+
+
+class PreSerializedResponses(grpc.ServerInterceptor):
+    """Lets handlers return already serialized responses (cache hits) as bytes."""
+
+    def intercept_service(self, continuation, handler_call_details):
+        return pre_serialized(continuation(handler_call_details))
+
+
+class AsyncPreSerializedResponses(grpc.aio.ServerInterceptor):
+    """grpc.aio version of PreSerializedResponses."""
+
+    async def intercept_service(self, continuation, handler_call_details):
+        return pre_serialized(await continuation(handler_call_details))
 
 
 # --- Helper function to extract token ---
@@ -33,74 +104,348 @@ def get_token_from_context(context):
     return None
 
 
+def build_profile_response(
+    user_id: str, profile: profile_store.Profile | None, include_email: bool = True
+) -> auth_pb2.GetProfileResponse:
+    """Builds the GetProfile response for a user's stored profile."""
+    if profile is None:  # Not an AuthService user id, so there is nothing stored
+        return auth_pb2.GetProfileResponse(
+            success=False, user_id=user_id, message="Profile not found."
+        )
+    return auth_pb2.GetProfileResponse(
+        success=True,
+        user_id=user_id,
+        email=profile.email if include_email else "",
+        full_name=profile.full_name,
+        message="Profile retrieved successfully.",
+    )
+
+
+def build_profile_responses(
+    user_ids: list[str], profiles: dict[int, profile_store.Profile], viewer: str | None = None
+) -> list[auth_pb2.GetProfileResponse]:
+    """One response per requested id, in request order.
+
+    With a `viewer` (the caller's user id), only the viewer's own profile
+    includes the email address; other users' profiles carry just their name.
+    """
+    viewer_key = profile_store.parse_user_id(viewer) if viewer is not None else None
+    responses = []
+    for user_id in user_ids:
+        key = profile_store.parse_user_id(user_id)
+        responses.append(build_profile_response(
+            user_id, profiles.get(key), include_email=viewer is None or key == viewer_key
+        ))
+    return responses
+
+
+def cached_profile_response(user_id: str) -> bytes | None:
+    """Returns the serialized GetProfile response cached for `user_id`, if any."""
+    return _responses.get(user_id)
+
+
+def remember_profile_response(
+    user_id: str, response: auth_pb2.GetProfileResponse, read_generation: int
+):
+    """Caches a GetProfile response unless its profile was invalidated since the read began."""
+    if response.success:
+        data = response.SerializeToString()
+        profile_store.cache_if_current(
+            read_generation, lambda: _responses.set(user_id, data, profile_store.PROFILE_CACHE_TTL)
+        )
+
+
+def response_cache_stats() -> dict:
+    """Returns size, bytes and hit/miss counters of the GetProfile response cache."""
+    return _responses.stats()
+
+
+def profile_keys(user_ids: list[str]) -> list[int]:
+    """The ids that can have a stored profile."""
+    return [key for key in map(profile_store.parse_user_id, user_ids) if key is not None]
+
+
+def reject_missing_token(method: str, context) -> str:
+    """Fails the call for a request without a token; returns the response message."""
+    logging.warning("%s failed: No authorization token found in metadata.", method)
+    context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+    context.set_details("Authentication token is required.")
+    return "Authentication required."
+
+
+def deadline_expired(context) -> bool:
+    """True once the caller's deadline has passed: any work for it would be thrown away."""
+    remaining = context.time_remaining()
+    return remaining is not None and remaining <= 0
+
+
+def reject_expired_deadline(method: str, context) -> str:
+    """Fails a call whose deadline passed before it could be served; returns the response message."""
+    logging.warning("%s abandoned: The caller's deadline expired.", method)
+    context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+    context.set_details("Deadline expired before the request could be served.")
+    return "Request deadline expired."
+
+
+def check_verification(
+    method: str, verification_response, context
+) -> tuple[str | None, str]:
+    """Returns (user_id, "") for a valid token, else fails the call and returns (None, message)."""
+    if verification_response and verification_response.is_valid:
+        return verification_response.user_id, ""
+    # Verification failed (token invalid, expired, or AuthService unavailable)
+    logging.warning(
+        "%s failed: Token verification failed. Reason: %s",
+        method,
+        (
+            verification_response.message
+            if verification_response
+            else "AuthService unreachable or error"
+        ),
+    )
+    context.set_code(grpc.StatusCode.UNAUTHENTICATED)
+    context.set_details("Invalid or expired token.")
+    return None, "Authentication failed: Invalid token."
+
+
+def reject_store_error(method: str, error: Exception, context) -> str:
+    """Fails the call after a profile store error; returns the response message."""
+    logging.error("%s failed: Profile store error: %s", method, error)
+    context.set_code(grpc.StatusCode.INTERNAL)
+    context.set_details("Failed to load profile data.")
+    return "Server error while loading profiles."
+
+
+def reject_profile_fields(request, context) -> bool:
+    """Fails the call if an UpdateProfile value does not fit its column."""
+    for field in ("email", "full_name"):
+        if len(getattr(request, field)) > profile_store.MAX_FIELD_LENGTH:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(
+                f"{field} must be at most {profile_store.MAX_FIELD_LENGTH} characters."
+            )
+            return True
+    return False
+
+
+def updated_profile_response(
+    user_id: str, profile: profile_store.Profile
+) -> auth_pb2.GetProfileResponse:
+    """Publishes an update to the peers and builds the UpdateProfile response."""
+    FEED.publish(profile.user_id)
+    response = build_profile_response(user_id, profile)
+    response.message = "Profile updated successfully."
+    return response
+
+
+def reject_batch_size(count: int, context) -> bool:
+    """Fails the call if a BatchGetProfiles request asks for too many ids."""
+    if count <= MAX_PROFILE_BATCH_SIZE:
+        return False
+    context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+    context.set_details(f"At most {MAX_PROFILE_BATCH_SIZE} user ids per batch.")
+    return True
+
+
 class ProfileServiceServicer(auth_pb2_grpc.ProfileServiceServicer):
     """Implements the ProfileService gRPC methods."""
 
+    def _authenticate(self, method: str, context) -> tuple[str | None, str]:
+        """Verifies the caller's token. Returns (user_id, "") or (None, failure message)."""
+        if deadline_expired(context):
+            return None, reject_expired_deadline(method, context)
+        token = get_token_from_context(context)
+        if not token:
+            return None, reject_missing_token(method, context)
+        logging.debug("Token found, attempting verification via AuthService...")
+        # Call AuthService to verify the token, passing on our caller's deadline
+        try:
+            verification_response = auth_client.verify_token(token, context)
+        except auth_client.DeadlineExpired:
+            return None, reject_expired_deadline(method, context)
+        return check_verification(method, verification_response, context)
+
     def GetProfile(self, request, context):
         """Handles GetProfile requests, requiring authentication."""
-        logging.info("GetProfile request received.")
+        log_ok = logutil.sample("GetProfile")
+        if log_ok:
+            logging.info("GetProfile request received.")
 
-        token = get_token_from_context(context)
-        if not token:
-            logging.warning(
-                "GetProfile failed: No authorization token found in metadata."
+        user_id, failure = self._authenticate("GetProfile", context)
+        if user_id is None:
+            return auth_pb2.GetProfileResponse(success=False, message=failure)
+        if log_ok:
+            logging.info(
+                "Token verified successfully for user ID: %s. Access granted.",
+                user_id,
             )
-            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
-            context.set_details("Authentication token is required.")
+        cached = cached_profile_response(user_id)
+        if cached is not None:
+            return cached
+        read_generation = profile_store.generation()
+        try:
+            profiles = profile_store.get_profiles(profile_keys([user_id]))
+        except Exception as e:
             return auth_pb2.GetProfileResponse(
-                success=False, message="Authentication required."
+                success=False, message=reject_store_error("GetProfile", e, context)
             )
+        response = build_profile_responses([user_id], profiles)[0]
+        remember_profile_response(user_id, response, read_generation)
+        return response
 
-        logging.debug("Token found, attempting verification via AuthService...")
-        # Call AuthService to verify the token
-        verification_response = auth_client.verify_token(token)
-
-        # Check the verification result
-        if verification_response and verification_response.is_valid:
-            user_id = verification_response.user_id
+    def BatchGetProfiles(self, request, context):
+        """Returns many users' profiles, read with one query. Requires authentication."""
+        if logutil.sample("BatchGetProfiles"):
             logging.info(
-                f"Token verified successfully for user ID: {user_id}. Access granted."
+                "BatchGetProfiles request received with %s user ids.", len(request.user_ids)
             )
+        if reject_batch_size(len(request.user_ids), context):
+            return auth_pb2.BatchGetProfilesResponse()
+        user_id, _ = self._authenticate("BatchGetProfiles", context)
+        if user_id is None:
+            return auth_pb2.BatchGetProfilesResponse()
+        try:
+            profiles = profile_store.get_profiles(profile_keys(request.user_ids))
+        except Exception as e:
+            reject_store_error("BatchGetProfiles", e, context)
+            return auth_pb2.BatchGetProfilesResponse()
+        return auth_pb2.BatchGetProfilesResponse(
+            profiles=build_profile_responses(request.user_ids, profiles, viewer=user_id)
+        )
 
-            # --- Fetch Profile Data (Dummy Implementation) ---
-            # In a real application, you would fetch data from a database
-            # using the validated user_id.
-            profile_data = {
-                "user_id": user_id,
-                "email": f"user_{user_id}@example.com",
-                "full_name": f"User {user_id} Name",
-            }
-            # --- End Dummy Data ---
-
-            return auth_pb2.GetProfileResponse(
-                success=True,
-                user_id=profile_data["user_id"],
-                email=profile_data["email"],
-                full_name=profile_data["full_name"],
-                message="Profile retrieved successfully.",
-            )
-        else:
-            # Verification failed (token invalid, expired, or AuthService unavailable)
-            logging.warning(
-                f"GetProfile failed: Token verification failed. Reason: {verification_response.message if verification_response else 'AuthService unreachable or error'}"
-            )
-            context.set_code(grpc.StatusCode.UNAUTHENTICATED)
-            context.set_details("Invalid or expired token.")
+    def UpdateProfile(self, request, context):
+        """Stores the caller's profile and tells the other replicas to drop their copies."""
+        if reject_profile_fields(request, context):
+            return auth_pb2.GetProfileResponse()
+        user_id, failure = self._authenticate("UpdateProfile", context)
+        if user_id is None:
+            return auth_pb2.GetProfileResponse(success=False, message=failure)
+        key = profile_store.parse_user_id(user_id)
+        if key is None:
+            return build_profile_response(user_id, None)
+        try:
+            profile = profile_store.update_profile(key, request.email, request.full_name)
+        except Exception as e:
             return auth_pb2.GetProfileResponse(
-                success=False, message="Authentication failed: Invalid token."
+                success=False, message=reject_store_error("UpdateProfile", e, context)
             )
+        logging.info("Profile of user ID %s updated.", user_id)
+        return updated_profile_response(user_id, profile)
 
+    def WatchProfileInvalidations(self, request, context):
+        """Streams the ids of profiles updated through this server until the peer leaves."""
+        if not invalidation.is_peer(context.invocation_metadata()):
+            context.abort(grpc.StatusCode.UNAUTHENTICATED, "Peer credential required.")
+        acquire_stream_slot(context)
+        logging.info("WatchProfileInvalidations stream opened.")
+        events = queue.Queue()
+        FEED.subscribe(events.put)
+        try:
+            context.send_initial_metadata(())  # Tells the follower it is subscribed
+            while context.is_active():
+                try:
+                    user_id = events.get(timeout=1.0)
+                except queue.Empty:
+                    continue
+                yield auth_pb2.ProfileInvalidation(user_id=str(user_id))
+        finally:
+            FEED.unsubscribe(events.put)
+            _stream_slots.release()
+            logging.info("WatchProfileInvalidations stream closed.")
 
-def serve():
-    """Starts the ProfileService gRPC server."""
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+
+def acquire_stream_slot(context):
+    """Takes one of the MAX_STREAMS slots for a long-lived stream, or fails the call."""
+    if not _stream_slots.acquire(blocking=False):
+        context.abort(
+            grpc.StatusCode.RESOURCE_EXHAUSTED,
+            f"At most {MAX_STREAMS} long-lived streams per server; retry later.",
+        )
+
+
+def register_metrics():
+    """Publishes the token cache and batching stats next to the per-RPC metrics."""
+    metrics.REGISTRY.register_stats(
+        "profile_admission", "Adaptive concurrency limit and shed calls.", admission.stats
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_db_pool", "Profile store connection pool utilization and waits.",
+        profile_store.pool_stats,
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_cache", "Profile cache hit rates.", profile_store.cache_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_response_cache", "Serialized GetProfile response cache.", response_cache_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_invalidations", "Profile cache invalidations exchanged with peer replicas.",
+        FEED.stats,
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_token_cache", "Verified-token cache counters.", auth_client.cache_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_verify_batches", "VerifyToken request coalescing.", auth_client.batch_stats
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_signing_keys", "AuthService public keys cached for local verification.",
+        auth_client.signing_key_stats,
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_revocations", "Revoked token ids received from AuthService.", REVOKED.stats
+    )
+    metrics.REGISTRY.register_stats(
+        "profile_log_queue", "Log records waiting for the writer thread.", logutil.stats
+    )
+
+
+def create_server(port: str = PORT) -> grpc.Server:
+    """Builds the ProfileService gRPC server, bound to `port` but not yet started."""
+    controller = admission.create_controller(
+        ADMISSION_PRIORITIES,
+        initial_limit=MAX_WORKERS * 2,
+        max_limit=MAX_CONCURRENT_RPCS,
+        min_limit=MAX_WORKERS,
+    )
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=MAX_WORKERS),
+        interceptors=[metrics.MetricsInterceptor()]
+        + admission.interceptors(controller)
+        + [PreSerializedResponses()]
+        + grpc_options.server_interceptors(),
+        maximum_concurrent_rpcs=MAX_CONCURRENT_RPCS,
+        options=grpc_options.server_options(),
+        compression=grpc_options.server_compression(),
+    )
     auth_pb2_grpc.add_ProfileServiceServicer_to_server(ProfileServiceServicer(), server)
 
-    port = "50052"
     server_address = f"[::]:{port}"
     server.add_insecure_port(server_address)  # DEV ONLY!
+    return server
+
+
+def shutdown(server: grpc.Server, grace: float | None = None):
+    """Stops the server and closes the channels to AuthService, the peers and the profile store."""
+    server.stop(grace).wait()
+    invalidation.close()
+    auth_client.close()
+    profile_store.close_pool()
 
-    logging.info(f"ProfileService starting on port {port}...")
+
+def serve():
+    """Starts the ProfileService gRPC server."""
+    try:
+        profile_store.init_db()
+    except Exception as e:
+        logging.critical("Failed to initialize the profile store: %s. Exiting.", e)
+        return
+    register_metrics()
+    metrics.start_http_server(METRICS_PORT)
+    auth_client.start_revocation_watch()
+    invalidation.start_peer_watches(profile_store.invalidate)
+    server = create_server()
+    logging.info("ProfileService starting on port %s...", PORT)
     server.start()
     logging.info("ProfileService started successfully.")
 
@@ -110,7 +455,7 @@ def serve():
             time.sleep(86400)
     except KeyboardInterrupt:
         logging.info("Stopping ProfileService...")
-        server.stop(0)
+        shutdown(server, 0)
         logging.info("ProfileService stopped.")
 
 
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+# Tests run in-process against the service modules, the way bench/harness.py
+# loads them: the project directory (for `common`), both service directories
+# and the generated code go on the path. Neither service's server.py is
+# imported by name; tests that need one load it with harness.load_module.
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "bench"))
+
+import harness  # noqa: E402
+
+harness.add_service_paths()
+
+
+@pytest.fixture(scope="session")
+def auth_server():
+    """auth-service/server.py, loaded once."""
+    return harness.load_module("auth_server", os.path.join(harness.AUTH_DIR, "server.py"))
+
+
+@pytest.fixture(scope="session")
+def profile_server():
+    """profile-service/server.py (with the real profile_store), loaded once."""
+    import profile_store
+
+    assert profile_store.__file__.startswith(harness.PROFILE_DIR)
+    return harness.load_module("profile_server", os.path.join(harness.PROFILE_DIR, "server.py"))
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+from common import admission
+
+
+def _controller(limit: int, priorities: dict = None) -> admission.AdmissionController:
+    return admission.AdmissionController(admission.AIMDLimit(limit, limit, limit), priorities or {})
+
+
+def test_lower_priorities_are_shed_first():
+    controller = _controller(8, {"/S/Register": "low", "/S/Verify": "high"})
+    low = [controller.try_acquire("/S/Register") for _ in range(5)]
+    assert sum(permit is not None for permit in low) == 4  # Half of the limit
+    normal = [controller.try_acquire("/S/Other") for _ in range(3)]
+    assert sum(permit is not None for permit in normal) == 2  # Up to three quarters
+    high = [controller.try_acquire("/S/Verify") for _ in range(3)]
+    assert sum(permit is not None for permit in high) == 2  # The whole limit
+    stats = controller.stats()
+    assert stats["in_flight"] == 8
+    assert (stats["rejected_low"], stats["rejected_normal"], stats["rejected_high"]) == (1, 1, 1)
+
+    for permit in low + normal + high:
+        if permit is not None:
+            permit.release(False)
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_gradient_limit_shrinks_when_latency_inflates_and_recovers():
+    limiter = admission.GradientLimit(100, 10, 1000)
+    for _ in range(50):
+        limiter.update("m", 0.010, 100, False)
+    steady = limiter.limit
+    assert steady > 100
+    for _ in range(20):
+        limiter.update("m", 0.100, int(limiter.limit), False)  # Ten times slower: queueing
+    assert limiter.limit < steady / 2
+    shrunk = limiter.limit
+    for _ in range(50):
+        limiter.update("m", 0.010, int(limiter.limit), False)
+    assert limiter.limit > shrunk
+
+
+def test_aimd_limit_backs_off_on_overload():
+    limiter = admission.AIMDLimit(10, 2, 20)
+    limiter.update("m", 0.001, 10, True)
+    assert limiter.limit == 9
+    limiter.update("m", 0.001, 9, False)
+    assert limiter.limit == 10
+
+
+def test_server_rejects_calls_over_the_limit_with_pushback():
+    controller = _controller(2)
+    release = threading.Event()
+    entered = threading.Semaphore(0)
+
+    def slow(request, context):
+        entered.release()
+        release.wait(5)
+        return b"ok"
+
+    server = grpc.server(futures.ThreadPoolExecutor(4), interceptors=admission.interceptors(controller))
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("test.S", {
+        "Slow": grpc.unary_unary_rpc_method_handler(slow),
+    }),))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            call = channel.unary_unary("/test.S/Slow")
+            running = [call.future(b"") for _ in range(2)]
+            assert entered.acquire(timeout=5) and entered.acquire(timeout=5)
+            try:
+                call(b"")
+                raise AssertionError("the third call was admitted")
+            except grpc.RpcError as e:
+                assert e.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+                assert (admission.RETRY_PUSHBACK_KEY, str(admission.ADMISSION_RETRY_AFTER_MS)) in e.trailing_metadata()
+            release.set()
+            assert [future.result(5) for future in running] == [b"ok", b"ok"]
+            assert call(b"") == b"ok"  # Capacity is back
+        assert controller.stats()["in_flight"] == 0
+    finally:
+        release.set()
+        server.stop(0)
+
+
+def test_aio_cancelled_call_releases_its_permit():
+    controller = _controller(4)
+
+    async def slow(request, context):
+        await asyncio.sleep(30)
+        return b"late"
+
+    async def scenario():
+        server = grpc.aio.server(interceptors=admission.interceptors(controller, is_async=True))
+        server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("test.A", {
+            "Slow": grpc.unary_unary_rpc_method_handler(slow),
+        }),))
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                call = channel.unary_unary("/test.A/Slow")(b"")
+                while controller.stats()["in_flight"] == 0:
+                    await asyncio.sleep(0.01)
+                call.cancel()
+                deadline = time.monotonic() + 5
+                while controller.stats()["in_flight"] and time.monotonic() < deadline:
+                    await asyncio.sleep(0.01)
+                return controller.stats()["in_flight"]
+        finally:
+            await server.stop(0)
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,147 @@
+import queue
+import time
+import uuid
+from concurrent import futures
+
+import grpc
+import jwt
+import pytest
+from generated import auth_pb2
+from generated import auth_pb2_grpc
+
+import auth_client
+import jwt_verifier
+from common.cache import TTLCache
+from common.revocation import REVOKED
+
+
+GOOD_KEY = "stub-auth-service-signing-key-0123456789"
+
+
+class StubAuthService(auth_pb2_grpc.AuthServiceServicer):
+    """Accepts tokens signed with GOOD_KEY; pushes whatever is put on `revocations`."""
+
+    def __init__(self):
+        self.verify_calls = 0
+        self.time_remaining = []
+        self.revocations = queue.Queue()
+
+    def VerifyToken(self, request, context):
+        self.verify_calls += 1
+        self.time_remaining.append(context.time_remaining())
+        try:
+            claims = jwt.decode(request.token, GOOD_KEY, algorithms=["HS256"])
+        except jwt.InvalidTokenError:
+            context.abort(grpc.StatusCode.UNAUTHENTICATED, "Invalid token")
+        return auth_pb2.VerifyTokenResponse(is_valid=True, user_id=claims["sub"])
+
+    def WatchRevocations(self, request, context):
+        while context.is_active():
+            try:
+                yield self.revocations.get(timeout=0.05)
+            except queue.Empty:
+                pass
+
+
+class CallerContext:
+    """The servicer context of the RPC a verification is made for."""
+
+    def __init__(self, time_remaining: float | None):
+        self._time_remaining = time_remaining
+
+    def time_remaining(self) -> float | None:
+        return self._time_remaining
+
+    def add_callback(self, callback) -> bool:
+        return True
+
+
+def _token(key: str = GOOD_KEY, **claims) -> tuple[str, str]:
+    jti = uuid.uuid4().hex
+    claims = {"sub": "42", "jti": jti, "exp": int(time.time()) + 600, **claims}
+    return jwt.encode(claims, key, algorithm="HS256"), jti
+
+
+@pytest.fixture
+def auth_service(monkeypatch):
+    service = StubAuthService()
+    server = grpc.server(futures.ThreadPoolExecutor(4))
+    auth_pb2_grpc.add_AuthServiceServicer_to_server(service, server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    monkeypatch.setattr(auth_client, "AUTH_SERVICE_URL", f"127.0.0.1:{port}")
+    monkeypatch.setattr(auth_client, "AUTH_BATCH_ENABLED", False)
+    monkeypatch.setattr(auth_client, "REVOCATION_WATCH", True)
+    monkeypatch.setattr(jwt_verifier, "LOCAL_JWT_VERIFY", False)
+    monkeypatch.setattr(auth_client, "_valid_tokens", TTLCache(100))
+    monkeypatch.setattr(auth_client, "_invalid_tokens", TTLCache(100))
+    yield service
+    auth_client.close()
+    server.stop(0)
+
+
+def test_verifications_are_cached_per_token(auth_service):
+    token, _ = _token()
+    for _ in range(3):
+        assert auth_client.verify_token(token).user_id == "42"
+    bad, _ = _token(key="forged-" + GOOD_KEY)
+    for _ in range(3):
+        assert not auth_client.verify_token(bad).is_valid
+    assert auth_service.verify_calls == 2
+    stats = auth_client.cache_stats()
+    assert stats["valid"]["hits"] == 2 and stats["invalid"]["hits"] == 2
+
+
+def test_cache_entries_do_not_outlive_the_token(auth_service):
+    token, _ = _token(exp=int(time.time()) + 1)
+    assert auth_client.verify_token(token).is_valid
+    time.sleep(1.1)
+    auth_client.verify_token(token)
+    assert auth_service.verify_calls == 2
+
+
+def test_pushed_revocation_invalidates_a_cached_token(auth_service):
+    token, jti = _token()
+    assert auth_client.verify_token(token).is_valid
+    auth_client.start_revocation_watch()
+    auth_service.revocations.put(auth_pb2.RevocationEvent(jti=jti, expires_at=int(time.time()) + 600))
+
+    deadline = time.monotonic() + 5
+    while not REVOKED.is_revoked(jti) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    response = auth_client.verify_token(token)
+    assert not response.is_valid and response.message == "Token has been revoked"
+    assert auth_service.verify_calls == 1  # Answered without asking AuthService again
+
+
+def test_verification_inherits_the_callers_deadline(auth_service):
+    token, _ = _token()
+    assert auth_client.verify_token(token, CallerContext(0.5)).is_valid
+    assert auth_service.time_remaining[0] < 0.5  # Not the default AUTH_RPC_TIMEOUT
+    with pytest.raises(auth_client.DeadlineExpired):
+        auth_client.verify_token(_token()[0], CallerContext(auth_client.AUTH_DEADLINE_MARGIN_MS / 2000))
+    assert auth_service.verify_calls == 1  # No time left: AuthService is not called
+
+
+def test_stubs_share_one_channel_per_address(monkeypatch):
+    monkeypatch.setattr(auth_client, "AUTH_SERVICE_URL", "127.0.0.1:1, 127.0.0.1:2")
+    monkeypatch.setattr(auth_client, "_channels", None)
+    monkeypatch.setattr(auth_client, "_stubs", None)
+    try:
+        stubs = [auth_client._get_stub() for _ in range(6)]
+        assert len(auth_client._channels) == 2
+        assert len({id(stub) for stub in stubs}) == 2  # Round-robin over the same two stubs
+        assert stubs[0] is not stubs[1] and stubs[0] is stubs[2]
+    finally:
+        auth_client.close()
+
+
+def test_local_verification_answers_without_auth_service(auth_service, monkeypatch):
+    monkeypatch.setattr(jwt_verifier, "LOCAL_JWT_VERIFY", True)
+    monkeypatch.setattr(jwt_verifier, "ASYMMETRIC", False)
+    monkeypatch.setattr(jwt_verifier, "JWT_SECRET", GOOD_KEY)
+    token, _ = _token()
+    assert auth_client.verify_token(token).user_id == "42"
+    assert not auth_client.verify_token(_token(key="forged-" + GOOD_KEY)[0]).is_valid
+    assert not auth_client.verify_token(_token(exp=int(time.time()) - 5)[0]).is_valid
+    assert auth_service.verify_calls == 0
@@ -0,0 +1,140 @@
+import asyncio
+import time
+
+import grpc
+import pytest
+from generated import auth_pb2
+from generated import auth_pb2_grpc
+
+import db
+import harness
+import utils
+from token_watch import TokenEvent
+
+
+class MemoryDB:
+    """The users and refresh_tokens statements of db.py, kept in dicts."""
+
+    def __init__(self):
+        self.users = {}  # username -> UserRecord
+        self.refresh_tokens = {}  # token hash -> (user_id, expires_at)
+
+    def register_user(self, username: str, hashed_password: str):
+        if username in self.users:
+            return None
+        self.users[username] = db.UserRecord(len(self.users) + 1, username, hashed_password)
+        return self.users[username].id
+
+    def peek_user(self, username: str):
+        return None  # Nothing cached: conflicts come from register_user
+
+    def get_user_by_username(self, username: str):
+        return self.users.get(username)
+
+    def create_refresh_token(self, user_id: int, token_hash: bytes, expires_at: float):
+        self.refresh_tokens[token_hash] = (user_id, expires_at)
+
+    def rotate_refresh_token(self, token_hash: bytes, new_token_hash: bytes, new_expires_at: float):
+        user_id, expires_at = self.refresh_tokens.pop(token_hash, (None, 0))
+        if user_id is None or expires_at <= time.time():
+            return None
+        self.refresh_tokens[new_token_hash] = (user_id, new_expires_at)
+        username = next(user.username for user in self.users.values() if user.id == user_id)
+        return user_id, username
+
+    def revoke_token(self, jti: str, expires_at: float):
+        pass
+
+
+DB_FUNCTIONS = ("register_user", "peek_user", "get_user_by_username",
+                "create_refresh_token", "rotate_refresh_token", "revoke_token")
+
+
+def _as_coroutine(fn):
+    async def call(*args):
+        return fn(*args)
+
+    return call
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    """A MemoryDB behind db.py's functions (and their _async twins), with HS256 and a thread hashing pool."""
+    memory = MemoryDB()
+    for name in DB_FUNCTIONS:
+        monkeypatch.setattr(db, name, getattr(memory, name))
+        if name != "peek_user":
+            monkeypatch.setattr(db, f"{name}_async", _as_coroutine(getattr(memory, name)))
+    monkeypatch.setattr(utils.keys, "ASYMMETRIC", False)
+    monkeypatch.setattr(utils, "JWT_SECRET", "auth-server-test-secret-0123456789abcdef")
+    monkeypatch.setattr(utils, "PASSWORD_POOL_KIND", "thread")
+    utils.start_password_pool(size=2)
+    yield memory
+    utils.shutdown_password_pool()
+
+
+@pytest.fixture
+def stub(auth_server, memory):
+    port = harness.free_port()
+    server = auth_server.create_server(port=port)
+    server.start()
+    with grpc.insecure_channel(f"localhost:{port}") as channel:
+        yield auth_pb2_grpc.AuthServiceStub(channel)
+    server.stop(0)
+
+
+def _login(stub, username: str = "alice") -> auth_pb2.LoginResponse:
+    stub.Register(auth_pb2.RegisterRequest(username=username, password="pw"))
+    return stub.Login(auth_pb2.LoginRequest(username=username, password="pw"))
+
+
+def test_register_reports_a_taken_username(stub):
+    response = stub.Register(auth_pb2.RegisterRequest(username="alice", password="pw"))
+    assert response.success and response.user_id == "1"
+    with pytest.raises(grpc.RpcError) as error:
+        stub.Register(auth_pb2.RegisterRequest(username="alice", password="other"))
+    assert error.value.code() == grpc.StatusCode.ALREADY_EXISTS
+
+
+def test_refresh_token_rotates_and_cannot_be_reused(stub):
+    login = _login(stub)
+    refreshed = stub.RefreshToken(auth_pb2.RefreshTokenRequest(refresh_token=login.refresh_token))
+    assert refreshed.success and refreshed.refresh_token != login.refresh_token
+    assert stub.VerifyToken(auth_pb2.VerifyTokenRequest(token=refreshed.token)).user_id == "1"
+    with pytest.raises(grpc.RpcError) as error:
+        stub.RefreshToken(auth_pb2.RefreshTokenRequest(refresh_token=login.refresh_token))
+    assert error.value.code() == grpc.StatusCode.UNAUTHENTICATED
+
+
+def test_watch_token_ends_with_revoked(stub):
+    token = _login(stub).token
+    events = stub.WatchToken(auth_pb2.WatchTokenRequest(token=token), timeout=10)
+    assert next(events).kind == TokenEvent.VALID
+    assert stub.RevokeToken(auth_pb2.RevokeTokenRequest(token=token)).success
+    assert [event.kind for event in events] == [TokenEvent.REVOKED]
+
+
+def test_aio_server_serves_the_same_flow(memory):
+    import aio_server
+
+    async def scenario():
+        server = grpc.aio.server()
+        auth_pb2_grpc.add_AuthServiceServicer_to_server(aio_server.AsyncAuthServiceServicer(), server)
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stub = auth_pb2_grpc.AuthServiceStub(channel)
+                await stub.Register(auth_pb2.RegisterRequest(username="carol", password="pw"))
+                login = await stub.Login(auth_pb2.LoginRequest(username="carol", password="pw"))
+                verified = await asyncio.gather(*(
+                    stub.VerifyToken(auth_pb2.VerifyTokenRequest(token=login.token)) for _ in range(20)
+                ))
+                refreshed = await stub.RefreshToken(
+                    auth_pb2.RefreshTokenRequest(refresh_token=login.refresh_token)
+                )
+                return {response.user_id for response in verified}, refreshed.success
+        finally:
+            await server.stop(0)
+
+    assert asyncio.run(scenario()) == ({"1"}, True)
@@ -0,0 +1,52 @@
+import threading
+from concurrent import futures
+
+from batcher import MicroBatcher
+
+
+def test_concurrent_submissions_share_batches_and_slots():
+    sent = []
+
+    def send_batch(items, timeout):
+        sent.append(list(items))
+        done = futures.Future()
+        done.set_result([item.upper() for item in items])
+        return done
+
+    batcher = MicroBatcher(send_batch, max_batch_size=64, max_wait=0.05)
+    items = [f"token-{i % 10}" for i in range(40)]
+    start = threading.Barrier(len(items))
+    results = [None] * len(items)
+
+    def call(index):
+        start.wait()
+        results[index] = batcher.submit(items[index], timeout=5).result(5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(items))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.stop()
+
+    assert results == [item.upper() for item in items]
+    assert len(sent) < len(items)
+    assert all(len(batch) == len(set(batch)) for batch in sent)  # Duplicates share a slot
+    assert batcher.stats() == {"batches_sent": len(sent), "items_submitted": len(items)}
+
+
+def test_batch_is_cancelled_once_every_caller_leaves():
+    in_flight = []
+
+    def send_batch(items, timeout):
+        in_flight.append(futures.Future())
+        return in_flight[-1]
+
+    batcher = MicroBatcher(send_batch, max_batch_size=2, max_wait=1)
+    first, second = batcher.submit("a"), batcher.submit("b")
+    batcher.stop()  # Flushes the batch
+    assert len(in_flight) == 1
+    first.cancel()
+    assert not in_flight[0].cancelled()
+    second.cancel()
+    assert in_flight[0].cancelled()
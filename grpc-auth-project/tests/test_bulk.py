@@ -0,0 +1,70 @@
+import asyncio
+
+import bulk
+import utils
+
+
+class StrictDB:
+    """Stands in for db with PostgreSQL's behaviour: one bad row fails the whole INSERT."""
+
+    MAX_USERNAME_LENGTH = 100
+
+    def __init__(self):
+        self.taken = {"existing": 1}
+
+    def bulk_register_users(self, rows):
+        for username, _ in rows:
+            if len(username) > self.MAX_USERNAME_LENGTH or "\x00" in username:
+                raise ValueError("value too long for type character varying(100)")
+        inserted = {}
+        for username, _ in rows:
+            if username not in self.taken:
+                self.taken[username] = inserted[username] = len(self.taken) + 1
+        return inserted
+
+    async def bulk_register_users_async(self, rows):
+        return self.bulk_register_users(rows)
+
+
+def _rows():
+    hash_ = utils.pwd_context.hash("migrated")
+    return [
+        bulk.BulkRow(0, "alice", "pw"),
+        bulk.BulkRow(1, "x" * 101, hashed_password=hash_),
+        bulk.BulkRow(2, "nul\x00name", hashed_password=hash_),
+        bulk.BulkRow(3, "bob", "nul\x00password"),
+        bulk.BulkRow(4, "existing", hashed_password=hash_),
+        bulk.BulkRow(5, "carol", hashed_password=hash_),
+        bulk.BulkRow(6, "x" * 100, hashed_password=hash_),
+    ]
+
+
+def _check(results):
+    by_index = {result["index"]: result for result in results}
+    assert [result["index"] for result in results] == list(range(7))
+    assert by_index[0]["success"] and by_index[5]["success"] and by_index[6]["success"]
+    assert by_index[1]["message"] == "Username must be at most 100 characters"
+    assert by_index[2]["message"] == "Username must not contain NUL characters"
+    assert by_index[3]["message"] == "Password must not contain NUL characters"
+    assert by_index[4]["message"] == "Username already exists"
+
+
+def _hash_inline(passwords):
+    return [utils.hash_password(password) for password in passwords]  # Raises on NUL, like the pool
+
+
+def test_invalid_rows_fail_alone(monkeypatch):
+    monkeypatch.setattr(bulk, "db", StrictDB())
+    monkeypatch.setattr(utils, "hash_passwords_pooled", _hash_inline)
+    _check(bulk.register_chunk(_rows()))
+
+
+def test_invalid_rows_fail_alone_async(monkeypatch):
+    monkeypatch.setattr(bulk, "db", StrictDB())
+    monkeypatch.setattr(utils, "hash_passwords_pooled", _hash_inline)
+    _check(asyncio.run(bulk.register_chunk_async(_rows())))
+
+
+def test_chunked_keeps_order():
+    chunks = list(bulk.chunked(range(7), 3))
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6]]
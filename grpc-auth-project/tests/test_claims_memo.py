@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+
+import pytest
+
+import utils
+from common.cache import TTLCache
+from common.revocation import REVOKED
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Counts the tokens utils.verify_jwt actually decodes, with HS256 signing."""
+    calls = []
+    decode = utils._decode
+
+    def counting(token):
+        calls.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(utils.keys, "ASYMMETRIC", False)
+    monkeypatch.setattr(utils, "JWT_SECRET", "claims-memo-test-secret-0123456789abcdef")
+    monkeypatch.setattr(utils, "_claims", TTLCache(100))
+    monkeypatch.setattr(utils, "_decode", counting)
+    return calls
+
+
+def test_repeat_verification_skips_decoding(decodes):
+    token = utils.create_jwt({"sub": "1"})
+    first = utils.verify_jwt(token)
+    assert utils.verify_jwt(token) is first
+    assert len(decodes) == 1
+    assert utils.verify_jwt("not-a-token") is None
+    assert utils.verify_jwt("not-a-token") is None
+    assert len(decodes) == 3  # Invalid tokens are not memoized
+
+
+def test_memoized_claims_still_honour_revocation(decodes):
+    token = utils.create_jwt({"sub": "1"})
+    jti = utils.verify_jwt(token)["jti"]
+    REVOKED.revoke(jti, time.time() + 600)
+    assert utils.verify_jwt(token) is None
+    assert len(decodes) == 1
+
+
+def test_memo_never_outlives_the_token(decodes):
+    token = utils.create_jwt({"sub": "1"}, expires_delta=timedelta(seconds=1))
+    assert utils.verify_jwt(token) is not None
+    time.sleep(1.1)
+    assert utils.verify_jwt(token) is None  # Decoded again, and now expired
+    assert len(decodes) == 2
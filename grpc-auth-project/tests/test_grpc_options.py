@@ -0,0 +1,49 @@
+from concurrent import futures
+from types import SimpleNamespace
+
+import grpc
+import pytest
+
+from common import grpc_options
+
+
+def test_method_settings_are_keyed_by_full_method_name():
+    settings = grpc_options.parse_method_settings(
+        "auth.ProfileService/BatchGetProfiles=gzip, /auth.AuthService/Login=none", grpc_options.compression
+    )
+    assert settings == {
+        "/auth.ProfileService/BatchGetProfiles": grpc.Compression.Gzip,
+        "/auth.AuthService/Login": grpc.Compression.NoCompression,
+    }
+
+
+def test_per_method_compression_applies_only_to_configured_methods(monkeypatch):
+    monkeypatch.setattr(grpc_options, "METHOD_COMPRESSION", {"/test.S/Big": grpc.Compression.Gzip})
+    interceptor, = grpc_options.server_interceptors()
+    handler = grpc.unary_unary_rpc_method_handler(lambda request, context: request)
+    chosen = []
+    context = SimpleNamespace(set_compression=chosen.append)
+
+    for method in ("/test.S/Big", "/test.S/Small"):
+        wrapped = interceptor.intercept_service(lambda details: handler, SimpleNamespace(method=method))
+        assert wrapped.unary_unary(b"x", context) == b"x"
+    assert chosen == [grpc.Compression.Gzip]
+
+
+def test_per_method_message_limit_is_enforced_by_client_channels(monkeypatch):
+    monkeypatch.setattr(grpc_options, "METHOD_MAX_MESSAGE_BYTES", {"/test.S/Limited": 100})
+    echo = grpc.unary_unary_rpc_method_handler(lambda request, context: request * 10)
+    server = grpc.server(futures.ThreadPoolExecutor(2), options=grpc_options.server_options())
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("test.S", {
+        "Limited": echo, "Open": echo,
+    }),))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}", options=grpc_options.channel_options()) as channel:
+            assert len(channel.unary_unary("/test.S/Open")(b"x" * 50)) == 500
+            with pytest.raises(grpc.RpcError) as error:
+                channel.unary_unary("/test.S/Limited")(b"x" * 50)
+            assert error.value.code() == grpc.StatusCode.RESOURCE_EXHAUSTED
+    finally:
+        server.stop(0)
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent import futures
+
+import grpc
+from generated import auth_pb2
+
+import invalidation
+
+
+def test_feed_counters_are_exact_under_concurrent_peers():
+    feed = invalidation.InvalidationFeed()
+
+    def follow():
+        for _ in range(2000):
+            feed.record_received()
+        feed.record_resync()
+
+    threads = [threading.Thread(target=follow) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = feed.stats()
+    assert stats["received_total"] == 16000
+    assert stats["resyncs_total"] == 8
+
+
+def test_peer_watch_presents_the_secret_and_counts_events(monkeypatch):
+    presented = []
+
+    def watch(request, context):
+        presented.append(dict(context.invocation_metadata()).get("authorization"))
+        if not invalidation.is_peer(context.invocation_metadata()):
+            context.abort(grpc.StatusCode.UNAUTHENTICATED, "Peer credential required.")
+        context.send_initial_metadata(())
+        for user_id in ("5", "6"):
+            yield auth_pb2.ProfileInvalidation(user_id=user_id)
+        while context.is_active():
+            time.sleep(0.02)
+
+    server = grpc.server(futures.ThreadPoolExecutor(2))
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("auth.ProfileService", {
+        "WatchProfileInvalidations": grpc.unary_stream_rpc_method_handler(
+            watch,
+            request_deserializer=auth_pb2.WatchProfileInvalidationsRequest.FromString,
+            response_serializer=auth_pb2.ProfileInvalidation.SerializeToString,
+        ),
+    }),))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+
+    monkeypatch.setattr(invalidation, "PROFILE_PEERS", [f"127.0.0.1:{port}"])
+    monkeypatch.setattr(invalidation, "PROFILE_PEER_SECRET", "s3cret")
+    before = invalidation.FEED.stats()
+    received = []
+    done = threading.Event()
+
+    def on_invalidate(user_id):
+        received.append(user_id)
+        if len(received) == 3:
+            done.set()
+
+    invalidation.start_peer_watches(on_invalidate)
+    try:
+        assert done.wait(5)
+    finally:
+        invalidation.close()
+        server.stop(0)
+
+    assert presented == ["Bearer s3cret"]
+    assert received == [None, 5, 6]  # Resync (drop everything), then the peer's updates
+    after = invalidation.FEED.stats()
+    assert after["resyncs_total"] == before["resyncs_total"] + 1
+    assert after["received_total"] == before["received_total"] + 2
+
+
+def test_peer_credential_is_required(monkeypatch):
+    monkeypatch.setattr(invalidation, "PROFILE_PEER_SECRET", "")
+    assert not invalidation.is_peer([("authorization", "Bearer ")])  # No secret: nobody is a peer
+    monkeypatch.setattr(invalidation, "PROFILE_PEER_SECRET", "s3cret")
+    assert not invalidation.is_peer([])
+    assert not invalidation.is_peer([("authorization", "Bearer wrong")])
+    assert invalidation.is_peer([("authorization", "Bearer s3cret")])
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+
+import jwt
+import pytest
+
+import jwt_verifier
+import keys
+import utils
+
+
+@pytest.fixture
+def key_dir(tmp_path, monkeypatch):
+    """Asymmetric signing with one EdDSA key in a fresh directory, rescanned on every use."""
+    keys.write_key(str(tmp_path), "EdDSA")
+    manager = keys.KeyManager(str(tmp_path))
+    manager._load()
+    monkeypatch.setattr(keys, "_manager", manager)
+    monkeypatch.setattr(keys, "ASYMMETRIC", True)
+    monkeypatch.setattr(keys, "KEY_RELOAD_INTERVAL", 0.0)
+    monkeypatch.setattr(keys, "UNKNOWN_KID_RELOAD_INTERVAL", 0.0)
+    utils._claims.clear()
+    yield tmp_path
+    utils._claims.clear()
+
+
+def _kid(token: str) -> str:
+    return jwt.get_unverified_header(token)["kid"]
+
+
+def _add_key(directory) -> str:
+    kid = keys.write_key(str(directory), "EdDSA")
+    path = os.path.join(directory, f"{kid}.pem")
+    os.utime(path, (time.time() + 1, time.time() + 1))  # Strictly the newest key
+    return kid
+
+
+def test_rotation_signs_with_the_new_key_and_honours_old_tokens(key_dir):
+    old_token = utils.create_jwt({"sub": "1"})
+    old_kid = _kid(old_token)
+
+    new_kid = _add_key(key_dir)
+    new_token = utils.create_jwt({"sub": "1"})
+    assert _kid(new_token) == new_kid != old_kid
+    assert utils._decode(old_token)["sub"] == "1"  # Still published until its file is removed
+    assert utils._decode(new_token)["sub"] == "1"
+    published = json.loads(keys.get_key_manager().jwks())["keys"]
+    assert {key["kid"] for key in published} == {old_kid, new_kid}
+
+    os.remove(os.path.join(key_dir, f"{old_kid}.pem"))
+    with pytest.raises(jwt.InvalidTokenError):
+        utils._decode(old_token)
+    assert utils._decode(new_token)["sub"] == "1"
+
+
+def test_profile_service_verifies_rotated_keys_from_the_key_set(key_dir, monkeypatch):
+    cache = jwt_verifier.SigningKeyCache()
+    cache.set_fetcher(lambda: (keys.get_key_manager().jwks(), 300))
+    monkeypatch.setattr(jwt_verifier, "SIGNING_KEYS", cache)
+    monkeypatch.setattr(jwt_verifier, "KEY_REFRESH_MIN_INTERVAL", 0.0)
+
+    def verify_when_keys_arrive(token):
+        deadline = time.monotonic() + 5
+        while (result := jwt_verifier.verify_locally(token)) is None and time.monotonic() < deadline:
+            time.sleep(0.01)  # Unknown kid: deferred to AuthService while the key set is fetched
+        return result
+
+    assert verify_when_keys_arrive(utils.create_jwt({"sub": "7"})).user_id == "7"
+    _add_key(key_dir)
+    rotated = verify_when_keys_arrive(utils.create_jwt({"sub": "8"}))
+    assert rotated.is_valid and rotated.user_id == "8"
+
+
+def test_hs256_tokens_refused_with_asymmetric_signing(key_dir, monkeypatch):
+    monkeypatch.setattr(utils, "JWT_SECRET", "test-secret-0123456789abcdef0123456789")
+
+    def hs256(expires_in: float) -> str:
+        claims = {"sub": "1", "exp": int(time.time() + expires_in)}
+        return jwt.encode(claims, utils.JWT_SECRET, algorithm="HS256")
+
+    with pytest.raises(jwt.InvalidTokenError):
+        utils._decode(hs256(60))
+
+    monkeypatch.setattr(utils, "JWT_LEGACY_HS256_UNTIL", time.time() + 600)
+    assert utils._decode(hs256(60))["sub"] == "1"  # Inside the migration window
+    with pytest.raises(jwt.InvalidTokenError):
+        utils._decode(hs256(3600))  # Outlives the window
+
+
+def test_asymmetric_signing_refuses_the_default_secret(key_dir, monkeypatch):
+    monkeypatch.setattr(utils, "JWT_SECRET", utils.DEFAULT_JWT_SECRET)
+    with pytest.raises(RuntimeError):
+        utils.check_signing_config()
@@ -0,0 +1,16 @@
+from collections import Counter
+
+import loadtest
+
+
+def test_report_percentiles_and_totals():
+    latencies = {"login": [i / 1000 for i in range(1, 101)], "verify": [0.001] * 100}
+    codes = {"login": Counter({"OK": 99, "UNAUTHENTICATED": 1}), "verify": Counter({"OK": 100})}
+    report = loadtest.summarize(latencies, codes, duration=2.0, cpu_seconds=0.5)
+
+    assert report["login"]["p50_ms"] == 51.0 and report["login"]["p99_ms"] == 99.0
+    assert report["login"]["rps"] == 50.0
+    assert report["total"]["requests"] == 200
+    assert report["total"]["codes"] == {"OK": 199, "UNAUTHENTICATED": 1}
+    assert report["total"]["cpu_ms_per_request"] == 2.5
+    assert loadtest.percentile([], 99) == 0.0
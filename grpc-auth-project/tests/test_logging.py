@@ -0,0 +1,50 @@
+import ast
+import logging
+import os
+
+import harness
+from common import logutil
+
+SERVICE_DIRS = (harness.AUTH_DIR, harness.PROFILE_DIR, os.path.join(harness.PROJECT_DIR, "common"))
+LOG_METHODS = {"debug", "info", "warning", "error", "critical", "exception"}
+
+
+def _eager_log_calls(path: str) -> list:
+    with open(path) as f:
+        tree = ast.parse(f.read(), path)
+    found = []
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr in LOG_METHODS
+            and isinstance(node.func.value, ast.Name)
+            and node.func.value.id == "logging"
+            and node.args
+            and isinstance(node.args[0], (ast.JoinedStr, ast.BinOp))
+        ):
+            found.append(f"{os.path.relpath(path, harness.PROJECT_DIR)}:{node.lineno}")
+    return found
+
+
+def test_service_logging_is_lazy():
+    """Log messages use %-style arguments, so records below the level cost no formatting."""
+    eager = []
+    for directory in SERVICE_DIRS:
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".py"):
+                eager.extend(_eager_log_calls(os.path.join(directory, name)))
+    assert eager == []
+
+
+def test_sample_rates():
+    level = logging.root.level
+    logging.root.setLevel(logging.INFO)  # Sampling only applies while INFO is enabled
+    try:
+        logutil.set_sample_rates("Hot=0.25,Off=0,*=0.5")
+        assert [logutil.sample("Hot") for _ in range(8)] == [True, False, False, False] * 2
+        assert not any(logutil.sample("Off") for _ in range(4))
+        assert [logutil.sample("Other") for _ in range(4)] == [True, False] * 2
+    finally:
+        logutil.set_sample_rates(logutil.LOG_SAMPLE_RATES)
+        logging.root.setLevel(level)
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+from common import metrics
+
+def _sample(metric, labels) -> float:
+    # Methods are recorded without the package: "/test.S/Watch" -> "S/Watch"
+    return metric._values.get(labels, 0.0)
+
+
+def _wait_until(predicate, timeout=5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+def _watch(request, context):
+    while True:
+        yield b"tick"
+        time.sleep(0.02)
+
+
+def _poll_until_inactive(request, context):
+    yield b"tick"
+    while context.is_active():
+        time.sleep(0.02)
+
+
+def _start_server(handlers):
+    server = grpc.server(futures.ThreadPoolExecutor(4), interceptors=[metrics.MetricsInterceptor()])
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("test.S", handlers),))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    return server, port
+
+
+def _cancel_after_first_message(port, method):
+    with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+        call = channel.unary_stream(method)(b"")
+        next(call)
+        call.cancel()
+
+
+def test_cancelled_stream_is_finished_as_cancelled():
+    server, port = _start_server({"Watch": grpc.unary_stream_rpc_method_handler(_watch)})
+    labels = ("S/Watch",)
+    cancelled = _sample(metrics.rpc_handled, ("S/Watch", "CANCELLED"))
+    try:
+        _cancel_after_first_message(port, "/test.S/Watch")
+        assert _wait_until(lambda: _sample(metrics.rpc_in_flight, labels) == 0)
+        assert _wait_until(lambda: _sample(metrics.rpc_handled, ("S/Watch", "CANCELLED")) == cancelled + 1)
+    finally:
+        server.stop(0)
+
+
+def test_polling_stream_that_returns_after_cancel_is_cancelled():
+    server, port = _start_server({"Poll": grpc.unary_stream_rpc_method_handler(_poll_until_inactive)})
+    labels = ("S/Poll",)
+    cancelled = _sample(metrics.rpc_handled, ("S/Poll", "CANCELLED"))
+    try:
+        _cancel_after_first_message(port, "/test.S/Poll")
+        assert _wait_until(lambda: _sample(metrics.rpc_in_flight, labels) == 0)
+        assert _wait_until(lambda: _sample(metrics.rpc_handled, ("S/Poll", "CANCELLED")) == cancelled + 1)
+        assert _sample(metrics.rpc_handled, ("S/Poll", "OK")) == 0
+    finally:
+        server.stop(0)
+
+
+def test_unary_ok_and_aborted_calls_are_recorded():
+    def unary(request, context):
+        if request == b"bad":
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "bad")
+        return b"ok"
+
+    server, port = _start_server({"Unary": grpc.unary_unary_rpc_method_handler(unary)})
+    try:
+        with grpc.insecure_channel(f"127.0.0.1:{port}") as channel:
+            call = channel.unary_unary("/test.S/Unary")
+            assert call(b"good") == b"ok"
+            try:
+                call(b"bad")
+            except grpc.RpcError as e:
+                assert e.code() == grpc.StatusCode.INVALID_ARGUMENT
+        assert _wait_until(lambda: _sample(metrics.rpc_in_flight, ("S/Unary",)) == 0)
+        assert _sample(metrics.rpc_handled, ("S/Unary", "OK")) == 1
+        assert _sample(metrics.rpc_handled, ("S/Unary", "INVALID_ARGUMENT")) == 1
+    finally:
+        server.stop(0)
+
+
+def test_aio_cancelled_calls_are_finished_as_cancelled():
+    entered = threading.Event()
+
+    async def slow_unary(request, context):
+        entered.set()
+        await asyncio.sleep(30)
+        return b"late"
+
+    async def watch(request, context):
+        while True:
+            yield b"tick"
+            await asyncio.sleep(0.02)
+
+    async def scenario():
+        server = grpc.aio.server(interceptors=[metrics.AsyncMetricsInterceptor()])
+        server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler("test.A", {
+            "Slow": grpc.unary_unary_rpc_method_handler(slow_unary),
+            "Watch": grpc.unary_stream_rpc_method_handler(watch),
+        }),))
+        port = server.add_insecure_port("127.0.0.1:0")
+        await server.start()
+        try:
+            async with grpc.aio.insecure_channel(f"127.0.0.1:{port}") as channel:
+                stream = channel.unary_stream("/test.A/Watch")(b"")
+                await stream.read()
+                stream.cancel()
+                unary = channel.unary_unary("/test.A/Slow")(b"")
+                while not entered.is_set():
+                    await asyncio.sleep(0.01)
+                unary.cancel()
+            for _ in range(100):
+                if all(_sample(metrics.rpc_in_flight, (m,)) == 0 for m in ("A/Watch", "A/Slow")):
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await server.stop(0)
+
+    asyncio.run(scenario())
+    for method in ("A/Watch", "A/Slow"):
+        assert _sample(metrics.rpc_in_flight, (method,)) == 0
+        assert _sample(metrics.rpc_handled, (method, "CANCELLED")) == 1
@@ -0,0 +1,33 @@
+import threading
+
+import pytest
+
+import utils
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    utils.shutdown_password_pool()
+    monkeypatch.setattr(utils, "_password_slots", utils._password_slots)  # max_queue replaces it
+    yield
+    utils.shutdown_password_pool()
+
+
+def test_hashing_runs_in_worker_processes(pool, monkeypatch):
+    monkeypatch.setattr(utils, "PASSWORD_POOL_KIND", "process")
+    utils.start_password_pool(size=1, max_queue=4)
+    hashed = utils.hash_password_pooled("s3cret")
+    assert utils.verify_password_pooled("s3cret", hashed)
+    assert not utils.verify_password_pooled("wrong", hashed)
+
+
+def test_saturated_pool_fails_fast(pool, monkeypatch):
+    monkeypatch.setattr(utils, "PASSWORD_POOL_KIND", "thread")
+    utils.start_password_pool(size=1, max_queue=2)
+    release = threading.Event()
+    busy = [utils.submit_password_work(release.wait, 5) for _ in range(2)]
+    with pytest.raises(utils.PasswordPoolSaturated):
+        utils.submit_password_work(release.wait, 5)
+    release.set()
+    assert all(future.result(5) for future in busy)
+    assert utils.submit_password_work(len, "ok").result(5) == 2  # Slots are returned
@@ -0,0 +1,90 @@
+import threading
+from types import SimpleNamespace
+
+import psycopg2.extensions
+import pytest
+
+from common import pool as pool_module
+from common.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    def connect(dsn, connection_factory=None):
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    monkeypatch.setattr(pool_module.psycopg2, "connect", connect)
+    return opened
+
+
+def test_connections_are_reused(connections):
+    pool = ConnectionPool("dsn", max_size=2)
+    for _ in range(5):
+        with pool.connection():
+            pass
+    assert len(connections) == 1
+    assert pool.stats()["checkouts"] == 5
+
+
+def test_exhausted_pool_waits_for_a_release_then_times_out(connections):
+    pool = ConnectionPool("dsn", max_size=1, timeout=0.2)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    threading.Timer(0.05, pool.release, args=(conn,)).start()
+    assert pool.acquire() is conn  # Handed over instead of a second connection
+    stats = pool.stats()
+    assert len(connections) == 1
+    assert (stats["timeouts"], stats["waits"]) == (1, 1)
+
+
+def test_returned_connections_are_cleaned_or_discarded(connections):
+    pool = ConnectionPool("dsn", max_size=2)
+    with pool.connection() as conn:
+        conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    assert conn.rollbacks == 1  # No dangling transaction for the next caller
+
+    with pool.connection() as conn:
+        conn.closed = 1  # Server went away
+    with pool.connection() as fresh:
+        assert fresh is not conn
+    assert pool.stats()["size"] == 1
+
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql: str, params=None):
+        self.statements.append((sql, params))
+
+
+def test_statements_are_prepared_once_per_connection():
+    conn = SimpleNamespace(prepared={})  # The state PreparedStatementConnection keeps
+    cur = RecordingCursor()
+    sql = "SELECT id FROM users WHERE username = %s AND id > %s;"
+    for username in ("alice", "bob"):
+        pool_module.PreparedStatementConnection.execute_prepared(conn, cur, "lookup", sql, (username, 0))
+    assert cur.statements == [
+        ("PREPARE lookup AS SELECT id FROM users WHERE username = $1 AND id > $2;", None),
+        ("EXECUTE lookup (%s, %s)", ("alice", 0)),
+        ("EXECUTE lookup (%s, %s)", ("bob", 0)),
+    ]
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from generated import auth_pb2
+
+from common.cache import TTLCache
+
+
+def _servicer(profile_server, monkeypatch, user_id: str):
+    servicer = profile_server.ProfileServiceServicer()
+    monkeypatch.setattr(servicer, "_authenticate", lambda method, context: (user_id, ""))
+    return servicer
+
+
+def _seed(profile_server, profiles_cache, monkeypatch, user_id: int, email: str):
+    store = profile_server.profile_store
+    store.invalidate(None)
+    monkeypatch.setattr(store, "_profiles", profiles_cache)
+    profiles_cache.set(user_id, store.Profile(user_id, email, "Old"), 60)
+
+
+def test_get_profile_during_invalidate_does_not_cache_stale_response(profile_server, monkeypatch):
+    store = profile_server.profile_store
+    paused = threading.Event()
+
+    class PausingCache(TTLCache):
+        def delete(self, key):
+            paused.set()
+            time.sleep(0.2)  # GetProfile starts now and still sees the stale entry
+            super().delete(key)
+
+    _seed(profile_server, PausingCache(100), monkeypatch, 7, "old@example.com")
+    servicer = _servicer(profile_server, monkeypatch, "7")
+    invalidator = threading.Thread(target=store.invalidate, args=(7,))
+    get_profiles = store.get_profiles
+
+    def read_then_wait(user_ids):
+        profiles = get_profiles(user_ids)  # Hits the stale entry
+        invalidator.join()  # The invalidation completes before the response is cached
+        return profiles
+
+    monkeypatch.setattr(store, "get_profiles", read_then_wait)
+    invalidator.start()
+    assert paused.wait(2)
+    response = servicer.GetProfile(auth_pb2.GetProfileRequest(), None)
+
+    assert response.email == "old@example.com"  # Read before the invalidation completed
+    assert profile_server.cached_profile_response("7") is None
+    assert store._profiles.get(7) is None
+
+
+def test_response_read_before_invalidate_is_not_cached(profile_server, monkeypatch):
+    store = profile_server.profile_store
+    _seed(profile_server, TTLCache(100), monkeypatch, 8, "old@example.com")
+    servicer = _servicer(profile_server, monkeypatch, "8")
+
+    read_generation = store.generation()
+    profiles = store.get_profiles([8])
+    store.invalidate(8)
+    response = profile_server.build_profile_responses(["8"], profiles)[0]
+    profile_server.remember_profile_response("8", response, read_generation)
+    assert profile_server.cached_profile_response("8") is None
+
+    # With no invalidation in between, the response is cached and served as bytes
+    store._profiles.set(8, store.Profile(8, "new@example.com", "New"), 60)
+    first = servicer.GetProfile(auth_pb2.GetProfileRequest(), None)
+    assert first.email == "new@example.com"
+    assert profile_server.cached_profile_response("8") == first.SerializeToString()
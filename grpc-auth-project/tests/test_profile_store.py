@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+
+import pytest
+
+import profile_store
+from common.cache import TTLCache
+
+
+class FakePool:
+    """Answers the batched profiles SELECT from a dict, recording the ids asked for."""
+
+    def __init__(self, rows: dict):
+        self.rows = rows  # user id -> (user_id, email, full_name)
+        self.queries = []
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql: str, params: tuple):
+        self.queries.append(list(params[0]))
+
+    def fetchall(self):
+        return [self.rows[user_id] for user_id in self.queries[-1] if user_id in self.rows]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePool({1: (1, "a@example.com", "A"), 2: (2, "b@example.com", "B")})
+    monkeypatch.setattr(profile_store, "get_pool", lambda: fake)
+    monkeypatch.setattr(profile_store, "_profiles", TTLCache(100))
+    return fake
+
+
+def test_cache_misses_are_read_in_one_query(pool):
+    profiles = profile_store.get_profiles([2, 1, 2, 3])
+    assert pool.queries == [[2, 1, 3]]  # Distinct ids, one round trip
+    assert profiles[1].email == "a@example.com"
+    assert profiles[3] == profile_store.Profile(3, "", "")  # No row: an empty profile
+
+    profile_store.get_profiles([1, 3, 4])
+    assert pool.queries[1:] == [[4]]  # Only what is not cached yet
@@ -0,0 +1,76 @@
+import threading
+
+from common import revocation
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _revocations(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(revocation, "time", clock)
+    return revocation.RevocationList(), clock
+
+
+def test_expired_entries_are_purged_without_further_revocations(monkeypatch):
+    revoked, clock = _revocations(monkeypatch)
+    for i in range(100):
+        assert revoked.revoke(f"jti-{i}", clock.now + 10)
+    assert revoked.revoke("long-lived", clock.now + 3600)
+    assert revoked.is_revoked("jti-0")
+
+    clock.now += revocation.PURGE_INTERVAL + 1  # The burst has expired; nothing new is revoked
+    assert revoked.is_revoked("long-lived")
+    assert not revoked.is_revoked("jti-0")
+    stats = revoked.stats()
+    assert stats["entries"] == 1
+    assert stats["purged_total"] == 100
+
+
+def test_snapshot_leaves_out_expired_entries(monkeypatch):
+    revoked, clock = _revocations(monkeypatch)
+    revoked.revoke("short", clock.now + 5)
+    revoked.revoke("long", clock.now + 3600)
+    clock.now += 10
+    assert revoked.snapshot() == [("long", clock.now + 3590)]
+
+
+def test_revoke_notifies_listeners_once(monkeypatch):
+    revoked, clock = _revocations(monkeypatch)
+    events = []
+    revoked.add_listener(lambda jti, expires_at: events.append(jti))
+    assert revoked.revoke("a", clock.now + 60)
+    assert not revoked.revoke("a", clock.now + 60)  # Already revoked
+    assert not revoked.revoke("b", clock.now - 1)  # Already expired
+    assert events == ["a"]
+
+
+def test_concurrent_lookups_during_purge(monkeypatch):
+    revoked, clock = _revocations(monkeypatch)
+    for i in range(1000):
+        revoked.revoke(f"jti-{i}", clock.now + 10)
+    clock.now += revocation.PURGE_INTERVAL + 1
+    errors = []
+
+    def look_up():
+        try:
+            for i in range(1000):
+                revoked.is_revoked(f"jti-{i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=look_up) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert revoked.stats()["entries"] == 0
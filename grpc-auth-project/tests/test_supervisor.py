@@ -0,0 +1,80 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import supervisor
+
+
+class FakeWorker:
+    """Stands in for supervisor.Worker without spawning a process."""
+
+    starts_ready = True
+    created = []
+
+    def __init__(self, index: int):
+        self.index = index
+        self.process = SimpleNamespace(pid=1000 + len(self.created), exitcode=None, is_alive=lambda: True)
+        self.healthy = True
+        self.stopped = False
+        self.created.append(self)
+
+    def start(self) -> bool:
+        return self.starts_ready
+
+    def heartbeat_age(self) -> float:
+        return 0.0 if self.healthy else 60.0
+
+    def is_healthy(self) -> bool:
+        return self.healthy and self.process.is_alive()
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.fixture
+def fake_workers(monkeypatch):
+    monkeypatch.setattr(FakeWorker, "starts_ready", True)
+    monkeypatch.setattr(FakeWorker, "created", [])
+    monkeypatch.setattr(supervisor, "Worker", FakeWorker)
+    sup = supervisor.Supervisor(3)
+    for index in range(3):
+        sup._replace(index)
+    return sup
+
+
+def test_worker_health_follows_the_heartbeat():
+    worker = supervisor.Worker(0)
+    worker.process = SimpleNamespace(is_alive=lambda: True)
+    worker.heartbeat.value = time.time()
+    assert worker.is_healthy()
+    worker.heartbeat.value = time.time() - supervisor.WORKER_HEARTBEAT_TIMEOUT - 1
+    assert not worker.is_healthy()  # Alive but wedged
+    worker.heartbeat.value = time.time()
+    worker.process = SimpleNamespace(is_alive=lambda: False)
+    assert not worker.is_healthy()
+
+
+def test_check_workers_replaces_hung_and_dead_workers(fake_workers):
+    hung, healthy, dead = fake_workers.workers
+    hung.healthy = False
+    dead.process.is_alive = lambda: False
+    dead.process.exitcode = -9
+
+    fake_workers._check_workers()
+
+    assert fake_workers.workers[1] is healthy and not healthy.stopped
+    assert hung.stopped and dead.stopped
+    assert fake_workers.workers[0] not in (hung, None) and fake_workers.workers[0].index == 0
+    assert fake_workers.workers[2] not in (dead, None) and fake_workers.workers[2].index == 2
+    assert all(entry["healthy"] for entry in fake_workers.health())
+
+
+def test_replacement_that_never_becomes_ready_keeps_the_old_worker(fake_workers):
+    old = fake_workers.workers[0]
+    FakeWorker.starts_ready = False
+
+    fake_workers.rolling_restart()
+
+    assert fake_workers.workers[0] is old and not old.stopped
+    assert all(worker.stopped for worker in FakeWorker.created[3:])  # Failed replacements are cleaned up
@@ -0,0 +1,99 @@
+from contextlib import contextmanager
+
+import pytest
+
+import db
+from common import cache
+from common.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakePool:
+    """Answers the users-table statements of db.py from a dict, counting queries."""
+
+    def __init__(self):
+        self.rows = {}  # username -> (id, username, hashed_password)
+        self.queries = 0
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql: str, params: tuple):
+        self.queries += 1
+        if sql.startswith("SELECT"):
+            self._result = self.rows.get(params[0])
+        elif sql.startswith("INSERT"):
+            username, hashed_password = params
+            self.rows[username] = (len(self.rows) + 1, username, hashed_password)
+
+    def fetchone(self):
+        return self._result
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture
+def users(monkeypatch):
+    clock = FakeClock()
+    pool = FakePool()
+    monkeypatch.setattr(cache, "time", clock)
+    monkeypatch.setattr(db, "_users", TTLCache(100, size_fn=db._entry_size))
+    monkeypatch.setattr(db, "_unknown_users", TTLCache(100, size_fn=db._entry_size))
+    monkeypatch.setattr(db, "get_pool", lambda: pool)
+    return pool, clock
+
+
+def test_lookups_are_served_from_the_cache_until_the_ttl(users):
+    pool, clock = users
+    pool.rows["alice"] = (1, "alice", "hash")
+    assert db.get_user_by_username("alice") == db.UserRecord(1, "alice", "hash")
+    assert db.get_user_by_username("alice").id == 1
+    assert pool.queries == 1
+
+    clock.now += db.USER_CACHE_TTL + 1
+    db.get_user_by_username("alice")
+    assert pool.queries == 2
+
+
+def test_unknown_users_are_cached_briefly(users):
+    pool, clock = users
+    for _ in range(5):
+        assert db.get_user_by_username("mallory") is None
+    assert pool.queries == 1
+    assert db.user_cache_stats()["users"]["size"] == 0  # Misses do not crowd out real users
+
+    pool.rows["mallory"] = (7, "mallory", "hash")  # Registered by another process
+    clock.now += db.USER_NEGATIVE_CACHE_TTL + 1
+    assert db.get_user_by_username("mallory").id == 7
+
+
+def test_registering_invalidates_the_negative_entry(users):
+    pool, _ = users
+    assert db.get_user_by_username("bob") is None
+    assert db.add_user("bob", "hash")
+    assert db.get_user_by_username("bob") == db.UserRecord(1, "bob", "hash")
+
+
+def test_ttl_cache_evicts_least_recently_used_and_tracks_bytes():
+    entries = TTLCache(2, size_fn=lambda key, value: 10)
+    entries.set("a", 1, 60)
+    entries.set("b", 2, 60)
+    entries.get("a")  # "b" is now the least recently used
+    entries.set("c", 3, 60)
+    assert (entries.get("a"), entries.get("b"), entries.get("c")) == (1, None, 3)
+    assert entries.evictions == 1 and entries.bytes == 20
+    entries.delete("a")
+    assert entries.bytes == 10